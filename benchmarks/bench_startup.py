@@ -0,0 +1,145 @@
+# benchmarks/bench_startup.py
+# Mede o custo de abrir o app: tempo de importação a frio do utils e, para cada
+# página, o tempo até o primeiro elemento aparecer na tela e até o fim da execução.
+# Cada medição roda num processo Python novo (imports e cache_resource vazios),
+# com o storage apontado para a planilha falsa de benchmarks/fake_gspread.py.
+#
+# Uso: python benchmarks/bench_startup.py [--repeat 5] [--size 1000] [--latency-ms 50]
+#                                         [--output resultado.json]
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+PAGES = [
+    "main.py",
+    "pages/1_Matriz_Eisenhower.py",
+    "pages/2_Metodo_Ivy_Lee.py",
+    "pages/3_Agrupamento_de_Tarefas.py",
+    "pages/5_Gerenciar_Tags.py",
+]
+# Dependências pesadas que deveriam ficar de fora até serem usadas (o próprio
+# streamlit já carrega plotly.graph_objects; o que conta é o utils não trazê-las)
+LAZY_MODULES = ["gtts", "plotly.graph_objects", "gspread_dataframe"]
+
+
+# --- MEDIÇÕES (rodam no processo filho) ---
+def measure_import() -> dict:
+    start = time.perf_counter()
+    import streamlit  # noqa: F401
+    streamlit_done = time.perf_counter()
+    already = {name for name in LAZY_MODULES if name in sys.modules}
+    import utils  # noqa: F401
+    utils_done = time.perf_counter()
+    return {
+        "streamlit_ms": round((streamlit_done - start) * 1000, 1),
+        "utils_ms": round((utils_done - streamlit_done) * 1000, 1),
+        "loaded": [name for name in LAZY_MODULES if name in sys.modules and name not in already],
+    }
+
+
+def measure_page(page: str, size: int, latency: float) -> dict:
+    sys.path.insert(0, str(ROOT))
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from bench_storage import seed_spreadsheet
+    from streamlit.runtime.scriptrunner_utils.script_run_context import ScriptRunContext
+    from streamlit.testing.v1 import AppTest
+    import utils
+
+    spreadsheet = seed_spreadsheet(size, latency)
+    # O app abre a planilha falsa no lugar da conexão real
+    utils._connect_spreadsheet = lambda: spreadsheet
+
+    first = {}
+    enqueue = ScriptRunContext.enqueue
+
+    def watch(ctx, msg):
+        if msg.HasField("delta") and "render" not in first:
+            first["render"] = time.perf_counter()
+            first["calls"] = spreadsheet.counters()["calls"]
+        return enqueue(ctx, msg)
+
+    ScriptRunContext.enqueue = watch
+    at = AppTest.from_file(str(ROOT / page), default_timeout=120)
+    # Com algum segredo definido o st.secrets não emite o aviso de arquivo ausente (que contaria como desenho);
+    # a cota folgada mede o custo das chamadas, não o limitador
+    at.secrets["SHEETS_QUOTA_PER_MINUTE"] = 10**9
+    start = time.perf_counter()
+    at.run()
+    total = time.perf_counter() - start
+    return {
+        "first_render_ms": round((first.get("render", start) - start) * 1000, 1),
+        "total_ms": round(total * 1000, 1),
+        "api_calls_before_render": first.get("calls", 0),
+        "api_calls": spreadsheet.counters()["calls"],
+        "loaded": [name for name in LAZY_MODULES if name in sys.modules],
+        "exceptions": [e.value for e in at.exception],
+    }
+
+
+# --- ORQUESTRAÇÃO ---
+def spawn(*args) -> dict:
+    result = subprocess.run(
+        [sys.executable, __file__, "--worker", *map(str, args)],
+        cwd=ROOT, capture_output=True, text=True, env={**os.environ, "PYTHONPATH": str(ROOT)},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "falha no processo filho")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples: list[dict]) -> dict:
+    summary = {key: statistics.median(s[key] for s in samples) for key, value in samples[0].items() if isinstance(value, (int, float))}
+    summary["loaded"] = samples[-1]["loaded"]
+    if "exceptions" in samples[-1]:
+        summary["exceptions"] = samples[-1]["exceptions"]
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de abertura do app: importação a frio e tempo até o primeiro desenho.")
+    parser.add_argument("--repeat", type=int, default=5, help="processos por medição (vale a mediana)")
+    parser.add_argument("--size", type=int, default=1000, help="tarefas na planilha falsa")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="latência simulada por chamada à API")
+    parser.add_argument("--pages", nargs="+", default=PAGES)
+    parser.add_argument("--output", help="arquivo JSON para salvar os resultados")
+    parser.add_argument("--worker", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        kind, *rest = args.worker
+        result = measure_import() if kind == "import" else measure_page(rest[0], int(rest[1]), float(rest[2]))
+        print(json.dumps(result))
+        return
+
+    report = {
+        "size": args.size,
+        "latency_ms": args.latency_ms,
+        "import": summarize([spawn("import") for _ in range(args.repeat)]),
+        "pages": {
+            page: summarize([spawn("page", page, args.size, args.latency_ms / 1000) for _ in range(args.repeat)])
+            for page in args.pages
+        },
+    }
+    imp = report["import"]
+    print(f"importação a frio: streamlit {imp['streamlit_ms']:.0f} ms, utils {imp['utils_ms']:.0f} ms "
+          f"(pesados trazidos pelo utils: {', '.join(imp['loaded']) or 'nenhum'})")
+    print(f"\n{args.size} tarefas, latência {args.latency_ms} ms (mediana de {args.repeat} processos)")
+    print(f"{'página':36}{'1º desenho (ms)':>16}{'total (ms)':>12}{'chamadas antes':>16}{'chamadas':>10}  carregados")
+    for page, r in report["pages"].items():
+        print(f"{page:36}{r['first_render_ms']:>16.0f}{r['total_ms']:>12.0f}{r['api_calls_before_render']:>16.0f}"
+              f"{r['api_calls']:>10.0f}  {', '.join(r['loaded']) or '-'}")
+        if r.get("exceptions"):
+            print(f"{'':36}erro: {r['exceptions'][0]}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# benchmarks/bench_storage.py
+# Mede como as operações do Storage escalam com o número de tarefas, usando a
+# planilha falsa de benchmarks/fake_gspread.py (sem rede, latência configurável).
+#
+# Uso: python benchmarks/bench_storage.py [--sizes 100 10000 100000] [--latency-ms 0]
+#                                         [--mode cached|direct] [--output resultado.json]
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from bench_task_table import TAGS, make_records  # noqa: E402
+from fake_gspread import FakeSpreadsheet  # noqa: E402
+
+OPERATIONS = [
+    "add_task", "update_task", "mark_done", "list_tasks", "get_top_n_pending_tasks",
+    "group_tasks_by_tag", "list_tags", "delete_tag",
+]
+READ_OPERATIONS = {"list_tasks", "get_top_n_pending_tasks", "group_tasks_by_tag", "list_tags"}
+
+
+def configure(mode: str):
+    """'cached' usa a configuração de produção (cache compartilhado + gravação adiada);
+    'direct' desliga as duas camadas e cada operação vai direto à planilha."""
+    flag = "true" if mode == "cached" else "false"
+    os.environ["SHARED_SNAPSHOT"] = flag
+    os.environ["WRITE_BEHIND"] = flag
+    os.environ["WRITE_BEHIND_INTERVAL"] = "0"
+
+
+def seed_spreadsheet(size: int, latency: float) -> FakeSpreadsheet:
+    from utils import TASK_COLUMNS
+    spreadsheet = FakeSpreadsheet(latency=latency, worksheets=("Página1", "Tags"))
+    records = make_records(size)
+    spreadsheet._worksheets["Página1"].data = [list(TASK_COLUMNS)] + [[str(task.get(col, "")) for col in TASK_COLUMNS] for task in records]
+    spreadsheet._worksheets["Tags"].data = [["tag_name"]] + [[tag] for tag in TAGS]
+    return spreadsheet
+
+
+def make_storage(spreadsheet: FakeSpreadsheet):
+    from utils import ApiScheduler, SheetsBackend, Storage
+    # Cota folgada: o benchmark mede o custo das operações, não o limitador
+    return Storage(SheetsBackend(spreadsheet, scheduler=ApiScheduler(quota_per_minute=10**9)))
+
+
+def operation(storage, name: str, rng: random.Random):
+    """Devolve uma função sem argumentos que executa a operação uma vez."""
+    if name == "add_task":
+        return lambda: storage.add_task("Nova tarefa", "criada pelo benchmark", 3, 2, "2026-12-01", [TAGS[0]])
+    if name in ("update_task", "mark_done"):
+        pending = [task["id"] for task in storage.list_tasks() if task["status"] != "done"]
+        task_id = rng.choice(pending)
+        if name == "mark_done":
+            return lambda: storage.mark_done(task_id)
+        return lambda: storage.update_task(task_id, {"title": f"Editada {rng.random():.6f}", "importance": rng.randint(-5, 5)})
+    if name == "get_top_n_pending_tasks":
+        return lambda: storage.get_top_n_pending_tasks(n=6)
+    if name == "delete_tag":
+        storage.add_tag("Temporária")
+        return lambda: storage.delete_tag("Temporária")
+    return getattr(storage, name)
+
+
+def measure(spreadsheet: FakeSpreadsheet, storage, name: str, rng: random.Random, cold: bool) -> dict:
+    fn = operation(storage, name, rng)
+    storage.flush()
+    if cold and storage.snapshot is not None:
+        storage.snapshot.invalidate()
+    before = spreadsheet.counters()
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    # A operação só termina quando chega à planilha (a gravação adiada é esperada aqui)
+    storage.flush()
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    after = spreadsheet.counters()
+    return {
+        "wall_ms": round(wall * 1000, 2),
+        "api_calls": after["calls"] - before["calls"],
+        "bytes_sent": after["bytes_sent"] - before["bytes_sent"],
+        "bytes_received": after["bytes_received"] - before["bytes_received"],
+        "peak_memory_bytes": peak,
+    }
+
+
+def run(size: int, latency: float, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    spreadsheet = seed_spreadsheet(size, latency)
+    storage = make_storage(spreadsheet)
+    storage.list_tasks()
+    results = {}
+    for name in OPERATIONS:
+        results[name] = measure(spreadsheet, storage, name, rng, cold=name in READ_OPERATIONS)
+        if name in READ_OPERATIONS:
+            results[name]["warm"] = measure(spreadsheet, storage, name, rng, cold=False)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das operações do Storage contra uma planilha falsa.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="latência simulada por chamada à API")
+    parser.add_argument("--mode", choices=["cached", "direct"], default="cached")
+    parser.add_argument("--output", help="arquivo JSON para salvar os resultados")
+    args = parser.parse_args()
+
+    configure(args.mode)
+    report = {
+        "mode": args.mode,
+        "latency_ms": args.latency_ms,
+        "results": {str(size): run(size, args.latency_ms / 1000) for size in args.sizes},
+    }
+    for size, results in report["results"].items():
+        print(f"\n{size} tarefas ({args.mode}, latência {args.latency_ms} ms)")
+        print(f"{'operação':26}{'tempo (ms)':>12}{'chamadas':>10}{'enviado (B)':>13}{'recebido (B)':>14}{'pico mem (KB)':>15}")
+        for name, r in results.items():
+            print(f"{name:26}{r['wall_ms']:>12.1f}{r['api_calls']:>10}{r['bytes_sent']:>13}{r['bytes_received']:>14}{r['peak_memory_bytes'] / 1024:>15.0f}")
+            if "warm" in r:
+                w = r["warm"]
+                print(f"{'  (cache quente)':26}{w['wall_ms']:>12.1f}{w['api_calls']:>10}{w['bytes_sent']:>13}{w['bytes_received']:>14}{w['peak_memory_bytes'] / 1024:>15.0f}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# benchmarks/bench_task_table.py
+# Compara a tabela de tarefas compacta (int8 + category + quadrante vetorizado)
+# com a representação antiga (object/int64 + quadrante calculado linha a linha).
+#
+# Uso: python benchmarks/bench_task_table.py [--sizes 10000 100000] [--output resultado.json]
+
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from utils import TASK_COLUMNS, Storage, _normalize_tasks_df, classify_quadrants  # noqa: E402
+
+TAGS = ["Trabalho", "Casa", "Estudos", "Saúde", "Finanças", "Família"]
+
+
+def make_records(n: int, seed: int = 42) -> list[dict]:
+    """Gera linhas no mesmo formato devolvido por get_all_records."""
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        importance, urgency = rng.randint(-5, 5), rng.randint(-5, 5)
+        records.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "title": f"Tarefa {i}",
+            "description": "Descrição da tarefa" if i % 3 else "",
+            "importance": importance,
+            "urgency": urgency,
+            "due_date": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" if i % 4 else "",
+            "tags": ", ".join(rng.sample(TAGS, rng.randint(0, 2))),
+            "quadrant": Storage._get_quadrant(importance, urgency),
+            "status": "done" if rng.random() < 0.3 else "pending",
+        })
+    return records
+
+
+def legacy_table(records: list[dict]) -> pd.DataFrame:
+    """Reproduz o _read_data original: colunas object e notas em int64."""
+    df = pd.DataFrame(records)
+    for col in TASK_COLUMNS:
+        if col not in df.columns: df[col] = pd.Series(dtype='object')
+    df['importance'] = pd.to_numeric(df['importance'], errors='coerce').fillna(0).astype(int)
+    df['urgency'] = pd.to_numeric(df['urgency'], errors='coerce').fillna(0).astype(int)
+    return df[TASK_COLUMNS]
+
+
+def compact_table(records: list[dict]) -> pd.DataFrame:
+    return _normalize_tasks_df(pd.DataFrame(records))
+
+
+def legacy_quadrants(df: pd.DataFrame) -> pd.Series:
+    return df.apply(lambda row: Storage._get_quadrant(row['importance'], row['urgency']), axis=1)
+
+
+def compact_quadrants(df: pd.DataFrame):
+    return classify_quadrants(df['importance'].to_numpy(), df['urgency'].to_numpy())
+
+
+def top_pending(df: pd.DataFrame) -> pd.DataFrame:
+    pending = df[df['status'] != 'done']
+    return pending.sort_values(by=['importance', 'urgency'], ascending=[False, False]).head(6)
+
+
+def timed(fn, *args, repeat: int = 3) -> tuple[float, object]:
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def run(size: int) -> dict:
+    records = make_records(size)
+    results = {}
+    for name, build, classify in (("legacy", legacy_table, legacy_quadrants), ("compact", compact_table, compact_quadrants)):
+        build_ms, df = timed(build, records)
+        classify_ms, quadrants = timed(classify, df, repeat=1 if name == "legacy" else 3)
+        top_ms, _ = timed(top_pending, df)
+        results[name] = {
+            "memory_bytes": int(df.memory_usage(deep=True).sum()),
+            "build_ms": round(build_ms, 2),
+            "classify_quadrants_ms": round(classify_ms, 2),
+            "top_pending_ms": round(top_ms, 2),
+        }
+    assert list(legacy_quadrants(legacy_table(records[:1000]))) == list(compact_quadrants(compact_table(records[:1000])))
+    results["memory_ratio"] = round(results["compact"]["memory_bytes"] / results["legacy"]["memory_bytes"], 3)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a tabela de tarefas compacta com a representação antiga.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--output", help="arquivo JSON para salvar os resultados")
+    args = parser.parse_args()
+
+    report = {str(size): run(size) for size in args.sizes}
+    for size, results in report.items():
+        print(f"\n{size} tarefas (memória compacta = {results['memory_ratio']:.0%} da antiga)")
+        print(f"{'':10}{'memória (MB)':>14}{'montagem (ms)':>15}{'quadrantes (ms)':>17}{'top-6 (ms)':>12}")
+        for name in ("legacy", "compact"):
+            r = results[name]
+            print(f"{name:10}{r['memory_bytes'] / 1e6:>14.2f}{r['build_ms']:>15.1f}{r['classify_quadrants_ms']:>17.1f}{r['top_pending_ms']:>12.1f}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
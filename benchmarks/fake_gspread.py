@@ -0,0 +1,270 @@
+# benchmarks/fake_gspread.py
+# Planilha falsa, em memória, com a parte da API do gspread usada pelo SheetsBackend.
+# Simula latência por chamada e contabiliza chamadas e bytes trafegados, sem acesso à rede.
+
+import json
+import re
+import threading
+import time
+
+import gspread
+from gspread.cell import Cell
+from gspread.utils import a1_to_rowcol, rowcol_to_a1
+
+
+def _payload_size(value) -> int:
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode('utf-8'))
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet: "FakeSpreadsheet", title: str, rows: int = 1000, cols: int = 26):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.id = len(spreadsheet._worksheets)
+        self.row_count = int(rows)
+        self.col_count = int(cols)
+        self.data = []
+
+    # --- contabilidade ---
+    def _call(self, name: str, sent=None, received=None):
+        self.spreadsheet._record(name, _payload_size(sent) if sent is not None else 0,
+                                 _payload_size(received) if received is not None else 0)
+        return received
+
+    # --- acesso às células ---
+    def _ensure(self, row: int, col: int):
+        while len(self.data) < row:
+            self.data.append([])
+        cells = self.data[row - 1]
+        if len(cells) < col:
+            cells.extend([''] * (col - len(cells)))
+        self.row_count = max(self.row_count, row)
+        self.col_count = max(self.col_count, col)
+
+    def _set(self, row: int, col: int, value):
+        self._ensure(row, col)
+        self.data[row - 1][col - 1] = '' if value is None else value
+
+    def _parse_range(self, a1: str) -> tuple[int, int, int, int]:
+        a1 = a1.split('!')[-1].replace('$', '')
+        start, _, end = a1.partition(':')
+        end = end or start
+        if re.fullmatch(r'\d+', start):
+            return int(start), 1, int(end), self.col_count
+        if re.fullmatch(r'[A-Z]+', start):
+            return 1, a1_to_rowcol(f"{start}1")[1], max(len(self.data), 1), a1_to_rowcol(f"{end}1")[1]
+        row1, col1 = a1_to_rowcol(start)
+        row2, col2 = a1_to_rowcol(end)
+        return row1, col1, row2, col2
+
+    def _last_row(self) -> int:
+        row = len(self.data)
+        while row and not any(str(value) for value in self.data[row - 1]):
+            row -= 1
+        return row
+
+    def _values(self) -> list[list]:
+        width = max((len(row) for row in self.data), default=0)
+        rows = [[str(value) for value in row] + [''] * (width - len(row)) for row in self.data]
+        while rows and not any(rows[-1]):
+            rows.pop()
+        return rows
+
+    def _write_values(self, row: int, col: int, values: list[list]):
+        for i, cells in enumerate(values):
+            for j, value in enumerate(cells):
+                self._set(row + i, col + j, value)
+
+    # --- API do gspread ---
+    def get_all_values(self, **kwargs):
+        return self._call('get_all_values', received=self._values())
+
+    def get_all_records(self, head: int = 1, **kwargs):
+        rows = self._call('get_all_records', received=self._values())
+        if len(rows) < head:
+            return []
+        header = rows[head - 1]
+        return [
+            {key: int(value) if re.fullmatch(r'-?\d+', value) else value for key, value in zip(header, row)}
+            for row in rows[head:]
+        ]
+
+    def row_values(self, row: int, **kwargs):
+        values = [str(value) for value in self.data[row - 1]] if row <= len(self.data) else []
+        while values and values[-1] == '':
+            values.pop()
+        return self._call('row_values', received=values)
+
+    def col_values(self, col: int, **kwargs):
+        values = [str(row[col - 1]) if len(row) >= col else '' for row in self.data]
+        while values and values[-1] == '':
+            values.pop()
+        return self._call('col_values', received=values)
+
+    def batch_get(self, ranges: list[str], **kwargs):
+        result = []
+        for a1 in ranges:
+            row1, col1, row2, col2 = self._parse_range(a1)
+            rows = self._values()[row1 - 1:min(row2, len(self.data))]
+            result.append([(row + [''] * col2)[col1 - 1:col2] for row in rows])
+        return self._call('batch_get', sent=ranges, received=result)
+
+    def append_row(self, values: list, **kwargs):
+        return self.append_rows([values], **kwargs)
+
+    def append_rows(self, values: list[list], **kwargs):
+        self._call('append_rows', sent=values)
+        first_row = self._last_row() + 1
+        self._write_values(first_row, 1, values)
+        last_col = max((len(row) for row in values), default=1)
+        updated = f"'{self.title}'!{rowcol_to_a1(first_row, 1)}:{rowcol_to_a1(first_row + len(values) - 1, last_col)}"
+        return {'updates': {'updatedRange': updated, 'updatedRows': len(values)}}
+
+    def update(self, range_name, values=None, **kwargs):
+        if not isinstance(values, list):
+            values = [[values]]
+        elif values and not isinstance(values[0], list):
+            values = [values]
+        self._call('update', sent=values)
+        row, col, _, _ = self._parse_range(range_name)
+        self._write_values(row, col, values)
+
+    def batch_update(self, data: list[dict], **kwargs):
+        self._call('batch_update', sent=data)
+        for item in data:
+            row, col, _, _ = self._parse_range(item['range'])
+            self._write_values(row, col, item['values'])
+
+    def update_cells(self, cells: list[Cell], **kwargs):
+        self._call('update_cells', sent=[[cell.row, cell.col, cell.value] for cell in cells])
+        for cell in cells:
+            self._set(cell.row, cell.col, cell.value)
+
+    def resize(self, rows=None, cols=None):
+        self._call('resize')
+        if rows is not None:
+            self.row_count = int(rows)
+            del self.data[int(rows):]
+        if cols is not None:
+            self.col_count = int(cols)
+            for row in self.data:
+                del row[int(cols):]
+
+    def find(self, query, **kwargs):
+        self._call('find')
+        for i, row in enumerate(self.data):
+            for j, value in enumerate(row):
+                if str(value) == str(query):
+                    return Cell(i + 1, j + 1, value)
+        return None
+
+    def delete_rows(self, start_index: int, end_index: int | None = None):
+        self._call('delete_rows')
+        del self.data[start_index - 1:(end_index or start_index)]
+
+    def clear(self):
+        self._call('clear')
+        self.data = []
+
+
+def _grid_rows(worksheet: FakeWorksheet, grid: dict) -> tuple[list[list], int, int]:
+    """Linhas de um GridRange (índices a partir de 0, fim exclusivo) e o intervalo de colunas."""
+    rows = worksheet.data[grid.get('startRowIndex', 0):grid.get('endRowIndex')]
+    return rows, grid.get('startColumnIndex', 0), grid.get('endColumnIndex', worksheet.col_count)
+
+
+def _find_replace(worksheets: dict, request: dict) -> dict:
+    if not (request.get('matchEntireCell') and request.get('matchCase')) or request.get('searchByRegex'):
+        raise NotImplementedError("só findReplace de célula inteira, com maiúsculas e minúsculas")
+    rows, first, last = _grid_rows(worksheets[request['range']['sheetId']], request['range'])
+    changed = 0
+    for row in rows:
+        for col in range(first, min(last, len(row))):
+            if str(row[col]) == request['find']:
+                row[col] = request['replacement']
+                changed += 1
+    return {'occurrencesChanged': changed, 'valuesChanged': changed} if changed else {}
+
+
+def _sort_range(worksheets: dict, request: dict):
+    """Ordena as linhas do intervalo pela primeira chave; como no Sheets, células vazias vão para o fim."""
+    worksheet = worksheets[request['range']['sheetId']]
+    rows, first, last = _grid_rows(worksheet, request['range'])
+    spec = request['sortSpecs'][0]
+    cells = [[str(value) for value in row[first:last]] for row in rows]
+    width = max((len(cell_row) for cell_row in cells), default=0)
+    cells = [cell_row + [''] * (width - len(cell_row)) for cell_row in cells]
+    key = spec['dimensionIndex'] - first
+    filled = sorted((cell_row for cell_row in cells if cell_row[key] != ''), key=lambda cell_row: cell_row[key],
+                    reverse=spec.get('sortOrder') == 'DESCENDING')
+    for row, cell_row in zip(rows, filled + [cell_row for cell_row in cells if cell_row[key] == '']):
+        row[first:first + width] = cell_row
+
+
+class FakeSpreadsheet:
+    """Planilha em memória; `latency` (segundos) é somada a cada chamada à API."""
+
+    def __init__(self, latency: float = 0.0, worksheets: tuple[str, ...] = ("Página1",)):
+        self.latency = latency
+        self.calls = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.calls_by_method = {}
+        self._worksheets = {}
+        self._lock = threading.RLock()
+        for title in worksheets:
+            self._worksheets[title] = FakeWorksheet(self, title)
+
+    def _record(self, name: str, sent: int = 0, received: int = 0):
+        with self._lock:
+            self.calls += 1
+            self.bytes_sent += sent
+            self.bytes_received += received
+            self.calls_by_method[name] = self.calls_by_method.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def counters(self) -> dict:
+        with self._lock:
+            return {'calls': self.calls, 'bytes_sent': self.bytes_sent, 'bytes_received': self.bytes_received}
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        self._record('worksheet')
+        if title not in self._worksheets:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self._worksheets[title]
+
+    def worksheets(self) -> list[FakeWorksheet]:
+        self._record('worksheets')
+        return list(self._worksheets.values())
+
+    def add_worksheet(self, title: str, rows=1000, cols=26, **kwargs) -> FakeWorksheet:
+        self._record('add_worksheet')
+        worksheet = FakeWorksheet(self, title, rows, cols)
+        self._worksheets[title] = worksheet
+        return worksheet
+
+    def del_worksheet(self, worksheet: FakeWorksheet):
+        self._record('del_worksheet')
+        self._worksheets.pop(worksheet.title, None)
+
+    def batch_update(self, body: dict):
+        """Pedidos deleteDimension (linhas), findReplace (célula inteira) e sortRange, aplicados em ordem."""
+        self._record('batch_update', _payload_size(body))
+        worksheets = {worksheet.id: worksheet for worksheet in self._worksheets.values()}
+        replies = []
+        for request in body.get('requests', []):
+            if 'deleteDimension' in request:
+                target = request['deleteDimension']['range']
+                if target['dimension'] != 'ROWS':
+                    raise NotImplementedError(target['dimension'])
+                del worksheets[target['sheetId']].data[target['startIndex']:target['endIndex']]
+                replies.append({})
+            elif 'findReplace' in request:
+                replies.append({'findReplace': _find_replace(worksheets, request['findReplace'])})
+            elif 'sortRange' in request:
+                _sort_range(worksheets, request['sortRange'])
+                replies.append({})
+            else:
+                raise NotImplementedError(next(iter(request)))
+        return {'replies': replies}
@@ -0,0 +1,354 @@
+# benchmarks/load_test.py
+# Teste de carga das páginas: várias sessões simuladas (AppTest, sem navegador)
+# usam o app ao mesmo tempo contra uma única planilha falsa compartilhada.
+# Cada sessão conclui tarefas (✔️ na matriz e na lista de urgências da página
+# inicial), edita e cadastra tarefas pelos formulários e cria/remove tags. Ao fim de cada nível de concorrência o script confere o
+# estado final da planilha e conta as atualizações perdidas.
+#
+# O AppTest troca estado global do Streamlit (Runtime, st.secrets) a cada
+# execução e não pode rodar em várias threads; por isso cada sessão roda num
+# processo próprio, como uma réplica do app apontada para a mesma planilha. A
+# planilha fica num processo servidor (multiprocessing.managers) e a latência
+# simulada é aplicada do lado de cada sessão, então as chamadas se sobrepõem.
+#
+# Uso: python benchmarks/load_test.py [--sessions 1 4 8] [--rounds 3] [--size 500]
+#                                     [--latency-ms 20] [--output resultado.json]
+
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.managers import BaseManager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from fake_gspread import FakeWorksheet  # noqa: E402
+
+MAIN_PAGE = "main.py"
+MATRIX_PAGE = "pages/1_Matriz_Eisenhower.py"
+IVY_LEE_PAGE = "pages/2_Metodo_Ivy_Lee.py"
+GROUPING_PAGE = "pages/3_Agrupamento_de_Tarefas.py"
+TAGS_PAGE = "pages/5_Gerenciar_Tags.py"
+# Tarefas disputadas por todas as sessões no formulário de edição
+HOT_TASKS = 5
+CONFLICT_WARNING = "alterada em outra sessão"
+
+
+# --- PLANILHA COMPARTILHADA ENTRE PROCESSOS ---
+class SharedSheets:
+    """Lado servidor: a planilha falsa, acessada por (aba, método) sob um lock."""
+
+    def __init__(self, size: int):
+        from bench_storage import seed_spreadsheet
+        self.spreadsheet = seed_spreadsheet(size, latency=0.0)
+        self._lock = threading.Lock()
+
+    def call(self, title, method: str, args=(), kwargs=None):
+        with self._lock:
+            target = self.spreadsheet if title is None else self.spreadsheet._worksheets[title]
+            result = getattr(target, method)(*args, **(kwargs or {}))
+        # Abas não atravessam o processo: o cliente recebe só o título
+        if isinstance(result, FakeWorksheet):
+            return {'worksheet': result.title}
+        if isinstance(result, list) and result and isinstance(result[0], FakeWorksheet):
+            return [{'worksheet': worksheet.title} for worksheet in result]
+        return result
+
+    def attribute(self, title: str, name: str):
+        with self._lock:
+            return getattr(self.spreadsheet._worksheets[title], name)
+
+    def counters(self) -> dict:
+        return {**self.spreadsheet.counters(), 'by_method': dict(self.spreadsheet.calls_by_method)}
+
+
+_SHEETS = None
+
+
+def _init_server(size: int):
+    global _SHEETS
+    _SHEETS = SharedSheets(size)
+
+
+def _get_sheets():
+    return _SHEETS
+
+
+class SheetsManager(BaseManager):
+    pass
+
+
+SheetsManager.register('sheets', callable=_get_sheets)
+
+
+class RemoteWorksheet:
+    """Lado cliente: repassa os métodos do gspread ao servidor, com a latência simulada."""
+
+    def __init__(self, sheets, title: str, latency: float):
+        self._sheets, self.title, self._latency = sheets, title, latency
+
+    @property
+    def id(self):
+        return self._sheets.attribute(self.title, 'id')
+
+    @property
+    def row_count(self):
+        return self._sheets.attribute(self.title, 'row_count')
+
+    @property
+    def col_count(self):
+        return self._sheets.attribute(self.title, 'col_count')
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+
+        def call(*args, **kwargs):
+            time.sleep(self._latency)
+            return self._sheets.call(self.title, method, args, kwargs)
+        return call
+
+
+class RemoteSpreadsheet(RemoteWorksheet):
+    def __init__(self, sheets, latency: float):
+        super().__init__(sheets, None, latency)
+
+    def _wrap(self, result):
+        if isinstance(result, list):
+            return [self._wrap(item) for item in result]
+        return RemoteWorksheet(self._sheets, result['worksheet'], self._latency)
+
+    def worksheet(self, title: str):
+        return self._wrap(self.__getattr__('worksheet')(title))
+
+    def worksheets(self):
+        return self._wrap(self.__getattr__('worksheets')())
+
+    def add_worksheet(self, title: str, rows=1000, cols=26, **kwargs):
+        return self._wrap(self.__getattr__('add_worksheet')(title, rows, cols, **kwargs))
+
+
+# --- SESSÃO SIMULADA (roda no processo filho) ---
+def _widget(widgets, label: str):
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"widget '{label}' não encontrado")
+
+
+def run_session(session: int, address, authkey: bytes, latency: float, rounds: int, start_at: float,
+                hot_tasks: list[dict], own_tasks: list[dict]) -> dict:
+    os.environ.setdefault("SHEETS_QUOTA_PER_MINUTE", str(10**9))
+    from streamlit.testing.v1 import AppTest
+    import utils
+
+    manager = SheetsManager(address=address, authkey=authkey)
+    manager.connect()
+    spreadsheet = RemoteSpreadsheet(manager.sheets(), latency)
+    utils._connect_spreadsheet = lambda: spreadsheet
+
+    latencies, result = [], {'edits': [], 'added': [], 'marked': [], 'tags': [], 'errors': []}
+
+    def interact(name: str, at, action=None):
+        start = time.perf_counter()
+        (action(at) if action is not None else at).run()
+        latencies.append((name, time.perf_counter() - start))
+        result['errors'] += [str(e.value) for e in at.exception]
+        return at
+
+    def app(page: str):
+        at = AppTest.from_file(str(ROOT / page), default_timeout=300)
+        at.secrets["SHEETS_QUOTA_PER_MINUTE"] = 10**9
+        return at
+
+    pages = {page: app(page) for page in (MAIN_PAGE, MATRIX_PAGE, IVY_LEE_PAGE, GROUPING_PAGE, TAGS_PAGE)}
+    # Todas as sessões começam juntas, depois que cada processo terminou de importar o app
+    time.sleep(max(0.0, start_at - time.time()))
+    started = time.time()
+    for page, at in pages.items():
+        interact(f"abrir {Path(page).stem}", at)
+
+    for round_number in range(rounds):
+        try:
+            run_round(session, round_number, pages, interact, result, hot_tasks, own_tasks)
+        except LookupError as e:
+            # A página não chegou a desenhar o que a sessão esperava (por exemplo, após uma exceção)
+            page_errors = [str(error.value) for at in pages.values() for error in at.exception]
+            result['errors'].append(f"{e}; exceções: {page_errors}" if page_errors else str(e))
+
+    storage = pages[MATRIX_PAGE].session_state['storage']
+    storage.flush(timeout=120)
+    result.update(latencies=latencies, started=started, finished=time.time(), conflicts=storage.sync_status()['conflicts'])
+    return result
+
+
+def run_round(session: int, round_number: int, pages: dict, interact, result: dict, hot_tasks: list[dict], own_tasks: list[dict]):
+    matrix, tags_page = pages[MATRIX_PAGE], pages[TAGS_PAGE]
+    # ✔️ numa tarefa só desta sessão (achada pela busca)
+    task = own_tasks[round_number % len(own_tasks)]
+    interact("buscar", matrix, lambda at: _widget(at.text_input, "Buscar no título").set_value(task['title']))
+    if any(button.key == f"done_{task['id']}" for button in matrix.button):
+        interact("concluir", matrix, lambda at: at.button(key=f"done_{task['id']}").click())
+        result['marked'].append(task['id'])
+
+    # ✔ na lista de urgências do dia (página inicial), numa tarefa só desta sessão
+    main = interact("abrir main", pages[MAIN_PAGE])
+    own_ids = {task['id'] for task in own_tasks} - set(result['marked'])
+    boxes = [box.key for box in main.checkbox if box.key and box.key.removeprefix("done_main_") in own_ids]
+    if boxes:
+        interact("concluir urgente", main, lambda at: at.checkbox(key=boxes[0]).check())
+        result['marked'].append(boxes[0].removeprefix("done_main_"))
+
+    # Edição da descrição de uma tarefa disputada por todas as sessões
+    hot = hot_tasks[(session + round_number) % len(hot_tasks)]
+    interact("buscar", matrix, lambda at: _widget(at.text_input, "Buscar no título").set_value(hot['title']))
+    if any(button.key == f"edit_{hot['id']}" for button in matrix.button):
+        interact("abrir edição", matrix, lambda at: at.button(key=f"edit_{hot['id']}").click())
+        token = f"sessão {session} rodada {round_number} {uuid.uuid4().hex[:8]}"
+        base_version = matrix.session_state['task_to_edit_version']
+        _widget(matrix.text_area, "Descrição").set_value(token)
+        interact("salvar edição", matrix, lambda at: _widget(at.button, "Salvar Alterações").click())
+        rejected = any(CONFLICT_WARNING in str(warning.value) for warning in matrix.warning)
+        if rejected:
+            interact("cancelar edição", matrix, lambda at: _widget(at.button, "Cancelar").click())
+        result['edits'].append({'id': hot['id'], 'base_version': base_version, 'token': token, 'acked': not rejected})
+
+    # Nova tarefa pelo formulário
+    title = f"Carga {session}-{round_number} {uuid.uuid4().hex[:8]}"
+    _widget(matrix.text_input, "Título da Tarefa*").set_value(title)
+    interact("adicionar", matrix, lambda at: _widget(at.button, "Adicionar Tarefa").click())
+    result['added'].append(title)
+
+    # Tag criada e removida por esta sessão
+    tag = f"carga-{session}-{round_number}"
+    _widget(tags_page.text_input, "Nome da nova tag:").set_value(tag)
+    interact("criar tag", tags_page, lambda at: _widget(at.button, "Adicionar").click())
+    if any(button.key == f"delete_{tag}" for button in tags_page.button):
+        interact("remover tag", tags_page, lambda at: at.button(key=f"delete_{tag}").click())
+    result['tags'].append(tag)
+
+    interact("abrir 2_Metodo_Ivy_Lee", pages[IVY_LEE_PAGE])
+    interact("abrir 3_Agrupamento_de_Tarefas", pages[GROUPING_PAGE])
+
+
+# --- ORQUESTRAÇÃO ---
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def final_state(sheets) -> tuple[dict, list[str]]:
+    rows = sheets.call("Página1", "get_all_values")
+    header = rows[0]
+    tasks = [dict(zip(header, row + [''] * (len(header) - len(row)))) for row in rows[1:]]
+    tags = [row[0] for row in sheets.call("Tags", "get_all_values")[1:] if row and row[0]]
+    return tasks, tags
+
+
+def run_level(sessions: int, args) -> dict:
+    from bench_task_table import TAGS, make_records
+    authkey = uuid.uuid4().bytes
+    manager = SheetsManager(address=('127.0.0.1', 0), authkey=authkey, ctx=multiprocessing.get_context('fork'))
+    manager.start(_init_server, (args.size,))
+    sheets = manager.sheets()
+
+    pending = [task for task in make_records(args.size) if task['status'] != 'done']
+    hot_tasks = pending[:HOT_TASKS]
+    others = pending[HOT_TASKS:]
+    own = [others[i::sessions] for i in range(sessions)]
+    before = sheets.counters()
+
+    start_at = time.time() + 5 + sessions
+    with ProcessPoolExecutor(max_workers=sessions, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [
+            pool.submit(run_session, i, manager.address, authkey, args.latency_ms / 1000, args.rounds, start_at, hot_tasks, own[i])
+            for i in range(sessions)
+        ]
+        results = [future.result() for future in futures]
+    after = sheets.counters()
+    tasks, tags = final_state(sheets)
+    manager.shutdown()
+
+    # --- Conferência do estado final ---
+    by_id = {task['id']: task for task in tasks}
+    titles = [task['title'] for task in tasks]
+    added = [title for r in results for title in r['added']]
+    lost_adds = sum(1 for title in added if titles.count(title) != 1)
+    lost_marks = sum(1 for r in results for task_id in r['marked'] if by_id.get(task_id, {}).get('status') != 'done')
+    # Cada edição gravada sobe a versão em 1; edições aceitas que não viraram versão
+    # nova precisam ter sido avisadas como conflito, senão foram perdidas em silêncio
+    acked = [edit for r in results for edit in r['edits'] if edit['acked']]
+    persisted = sum(int(by_id[task['id']].get('version') or 0) for task in hot_tasks if task['id'] in by_id)
+    reported = sum(r['conflicts'] for r in results)
+    lost_edits = max(0, len(acked) - persisted - reported)
+    lost_tags = sum(1 for tag in TAGS if tag not in tags) + sum(1 for r in results for tag in r['tags'] if tag in tags)
+
+    latencies = {}
+    for r in results:
+        for name, seconds in r['latencies']:
+            latencies.setdefault(name, []).append(seconds * 1000)
+    wall = max(r['finished'] for r in results) - min(r['started'] for r in results)
+    interactions = sum(len(values) for values in latencies.values())
+    return {
+        "sessions": sessions,
+        "interactions": interactions,
+        "wall_s": round(wall, 2),
+        "throughput_per_s": round(interactions / wall, 2) if wall else 0,
+        "backend_calls": after["calls"] - before["calls"],
+        "backend_calls_by_method": {
+            method: count - before["by_method"].get(method, 0)
+            for method, count in after["by_method"].items() if count != before["by_method"].get(method, 0)
+        },
+        "latency_ms": {
+            name: {
+                "n": len(values),
+                "p50": round(statistics.median(values), 1),
+                "p95": round(percentile(values, 0.95), 1),
+                "p99": round(percentile(values, 0.99), 1),
+            }
+            for name, values in sorted(latencies.items())
+        },
+        "edits": {"acked": len(acked), "rejected_on_submit": sum(not e['acked'] for r in results for e in r['edits']),
+                  "persisted": persisted, "conflicts_reported": reported},
+        "lost_updates": {"tasks_added": lost_adds, "marked_done": lost_marks, "edits": lost_edits, "tags": lost_tags},
+        "errors": sorted({error for r in results for error in r['errors']})[:5],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga das páginas com sessões simultâneas contra uma planilha falsa.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 8], help="níveis de concorrência")
+    parser.add_argument("--rounds", type=int, default=3, help="rodadas de interações por sessão")
+    parser.add_argument("--size", type=int, default=500, help="tarefas na planilha falsa")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="latência simulada por chamada à API")
+    parser.add_argument("--output", help="arquivo JSON para salvar os resultados")
+    args = parser.parse_args()
+
+    report = {"size": args.size, "latency_ms": args.latency_ms, "rounds": args.rounds,
+              "levels": [run_level(sessions, args) for sessions in args.sessions]}
+    for level in report["levels"]:
+        print(f"\n{level['sessions']} sessão(ões): {level['interactions']} interações em {level['wall_s']} s "
+              f"({level['throughput_per_s']}/s), {level['backend_calls']} chamadas à API")
+        print(f"{'interação':32}{'n':>5}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}")
+        for name, stats in level["latency_ms"].items():
+            print(f"{name:32}{stats['n']:>5}{stats['p50']:>10.0f}{stats['p95']:>10.0f}{stats['p99']:>10.0f}")
+        edits, lost = level["edits"], level["lost_updates"]
+        print(f"edições: {edits['acked']} aceitas, {edits['rejected_on_submit']} recusadas no envio, "
+              f"{edits['persisted']} gravadas, {edits['conflicts_reported']} conflitos avisados depois")
+        print("atualizações perdidas: " + ", ".join(f"{name}={count}" for name, count in lost.items()))
+        for error in level["errors"]:
+            print(f"erro: {error}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,69 @@
 # main.py
 import streamlit as st
+import io
+from datetime import date
 from pathlib import Path
-from utils import Storage, generate_audio_from_text
+from utils import (Storage, begin_rerun_trace, generate_summary_audio, get_config_flag, paginated_query,
+                   render_debug_panel, render_pagination, render_sync_status)
 
 APP_TITLE = "Painel de Produtividade"
 st.set_page_config(page_title=APP_TITLE, page_icon="🚀", layout="wide")
+begin_rerun_trace("main")
+# O cabeçalho sai antes de qualquer leitura do storage: a página aparece enquanto os dados carregam
+st.title(APP_TITLE)
+st.markdown("Bem-vindo à sua central de produtividade. Use o menu à esquerda para navegar entre as ferramentas.")
 
 if 'storage' not in st.session_state:
     st.session_state.storage = Storage()
 storage = st.session_state.storage
+render_sync_status(storage)
 
-st.title(APP_TITLE)
-st.markdown("Bem-vindo à sua central de produtividade. Use o menu à esquerda para navegar entre as ferramentas.")
+today = date.today().isoformat()
+# No modo de urgência por prazo, recalcula urgência e quadrantes uma vez por dia, num único lote
+if storage.deadline_urgency and st.session_state.get('deadline_urgency_day') != today:
+    if storage.apply_deadline_urgency() is not None:
+        st.session_state.deadline_urgency_day = today
+# Com AUTO_ARCHIVE, as concluídas vão para o arquivo mensal uma vez por dia
+if get_config_flag("AUTO_ARCHIVE") and st.session_state.get('archive_day') != today:
+    if storage.compact() is not None:
+        st.session_state.archive_day = today
 
 with st.sidebar:
     st.header("Configurações Gerais")
     if st.button("⚠️ Resetar todas as tarefas"):
-        storage.reset()
-        st.success("Dados resetados.")
-        st.rerun()
+        if storage.reset():
+            st.success("Dados resetados.")
+            st.rerun()
+    if st.button("🗄️ Arquivar tarefas concluídas", help="Move as concluídas para o arquivo mensal"):
+        moved = storage.compact()
+        if moved is not None:
+            st.success(f"{sum(moved.values())} tarefa(s) arquivada(s)." if moved else "Nenhuma tarefa concluída para arquivar.")
+    with st.expander("📥 Importar / exportar tarefas"):
+        uploaded = st.file_uploader("Arquivo CSV ou JSONL", type=["csv", "jsonl"])
+        create_tags = st.checkbox("Criar tags que ainda não existem")
+        if uploaded is not None and st.button("Importar"):
+            progress_text = st.empty()
+            report = storage.import_tasks(
+                io.TextIOWrapper(uploaded, encoding="utf-8-sig", newline=""), fmt=uploaded.name.rsplit(".", 1)[-1].lower(),
+                create_tags=create_tags, progress=lambda done: progress_text.caption(f"{done} tarefa(s) gravada(s)..."),
+            )
+            if report is not None:
+                progress_text.success(f"{report['imported']} tarefa(s) importada(s).")
+                if report['rejected']:
+                    st.warning(f"{report['rejected']} linha(s) recusada(s). Exemplos: "
+                               + "; ".join(f"linha {line}: {reason}" for line, reason in report['errors'][:5]))
+                if report['unknown_tags'] and not create_tags:
+                    st.info(f"Tags ignoradas por não existirem: {', '.join(sorted(report['unknown_tags']))}")
+        export_format = st.radio("Formato da exportação", ["csv", "jsonl"], horizontal=True)
+        include_archived = st.checkbox("Incluir tarefas arquivadas")
+        # O arquivo só é montado quando pedido, não a cada execução da página
+        if st.button("Preparar exportação"):
+            buffer = io.StringIO()
+            if storage.export_tasks(buffer, fmt=export_format, include_archived=include_archived) is not None:
+                st.session_state.export_data = (export_format, buffer.getvalue().encode("utf-8"))
+        if 'export_data' in st.session_state:
+            export_format, data = st.session_state.export_data
+            st.download_button("⬇️ Baixar tarefas", data, file_name=f"tarefas.{export_format}")
     st.markdown("---")
     st.header("Opções de Voz")
     accents = {"Português (Brasil)": "com.br", "Português (Portugal)": "pt"}
@@ -27,21 +72,26 @@ with st.sidebar:
     st.session_state.tts_slow = st.toggle("Fala Lenta", value=False)
 
 st.header("⚡ Urgências do Dia")
-urgent_tasks = storage.get_urgent_tasks()
+# Urgências do dia = tarefas vencidas, que vencem hoje ou marcadas como urgentes (mesmo sem prazo).
+# A lista mostra só uma página; o resumo em áudio busca todas ao ser pedido
+urgent_tasks, total_urgent = paginated_query(storage, "urgent_page", due_to=today, include_urgent=True)
 
 if st.button("🔊 Ouvir Resumo do Dia"):
+    all_urgent_tasks, _ = storage.query_tasks(due_to=today, include_urgent=True)
     tld = st.session_state.get('tts_tld', 'com.br')
     slow = st.session_state.get('tts_slow', False)
-    if not urgent_tasks:
-        summary_text = "Ótima notícia! Você não tem nenhuma tarefa urgente para hoje. Bom trabalho!"
+    # Uma frase por trecho: cada uma é sintetizada e guardada em cache separadamente.
+    # O número da posição é um trecho à parte: o título de uma tarefa reaproveita o áudio em qualquer posição
+    if not all_urgent_tasks:
+        summary_segments = ["Ótima notícia! Você não tem nenhuma tarefa urgente para hoje. Bom trabalho!"]
     else:
-        num_tasks = len(urgent_tasks)
+        num_tasks = len(all_urgent_tasks)
         plural = 's' if num_tasks > 1 else ''
-        summary_text = f"Olá! Você tem {num_tasks} tarefa{plural} urgente{plural} para hoje. São elas: "
-        for i, task in enumerate(urgent_tasks, start=1):
-            summary_text += f"{i}. {task['title']}. "
+        summary_segments = [f"Olá! Você tem {num_tasks} tarefa{plural} urgente{plural} para hoje. São elas: "]
+        for i, task in enumerate(all_urgent_tasks, start=1):
+            summary_segments += [f"{i}. ", f"{task['title']}. "]
     with st.spinner("Gerando seu resumo em áudio..."):
-        audio_buffer = generate_audio_from_text(summary_text, tld=tld, slow=slow)
+        audio_buffer = generate_summary_audio(summary_segments, tld=tld, slow=slow)
         if audio_buffer:
             st.audio(audio_buffer, format='audio/mp3')
         else:
@@ -55,10 +105,15 @@ else:
         col1, col2 = st.columns([0.9, 0.1])
         with col1:
             st.markdown(f"**{task['title']}**")
+            if task['due_date'] and task['due_date'] < today:
+                st.caption(f"⏰ Vencida em {task['due_date']}")
             if task.get('description'):
                 st.caption(task['description'])
         with col2:
             if st.checkbox("✔", value=is_done, key=f"done_main_{task['id']}", help="Marcar como concluída"):
                 if not is_done:
                     storage.mark_done(task['id'])
-                    st.rerun()
\ No newline at end of file
+                    st.rerun()
+    render_pagination("urgent_page", total_urgent)
+
+render_debug_panel()
@@ -1,14 +1,17 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from utils import Storage
+from utils import (QUADRANTS, Storage, begin_rerun_trace, finish_rerun_trace, get_config, paginated_query,
+                   render_pagination, render_sync_status, timed)
 
 st.set_page_config(layout="wide")
+begin_rerun_trace("matriz")
+st.header("🗺️ Mapa de Produtividade (Matriz de Eisenhower)")
 
 # Inicializa a conexão com o storage
 if 'storage' not in st.session_state:
     st.session_state.storage = Storage()
 storage = st.session_state.storage
+render_sync_status(storage)
 
 # Inicializa o estado de edição se não existir
 if 'task_to_edit' not in st.session_state:
@@ -19,7 +22,7 @@ available_tags = storage.list_tags()
 
 # --- LÓGICA DA JANELA DE EDIÇÃO (POP-UP) ---
 if st.session_state.task_to_edit:
-    task_data = next((t for t in storage.list_tasks() if str(t['id']) == str(st.session_state.task_to_edit)), None)
+    task_data = storage.get_task(st.session_state.task_to_edit)
     
     if task_data:
         with st.expander("✏️ Reconfigurar Tarefa", expanded=True):
@@ -39,8 +42,8 @@ if st.session_state.task_to_edit:
                 new_due_date = pd.to_datetime(new_due_date_str).date() if new_due_date_str else None
                 new_due_date = st.date_input("Data de Entrega", value=new_due_date)
 
-                # Converte a string de tags da planilha em uma lista para o multiselect
-                default_tags = [tag.strip() for tag in task_data.get('tags', '').split(',') if tag.strip()]
+                # Tags da tarefa já separadas pelo índice de tags do storage
+                default_tags = [tag for tag in storage.task_tags(task_data['id']) if tag in available_tags]
                 
                 # --- CAMPO DE TAGS ATUALIZADO ---
                 selected_tags = st.multiselect(
@@ -59,16 +62,18 @@ if st.session_state.task_to_edit:
                         "due_date": new_due_date.isoformat() if new_due_date else "",
                         "tags": ", ".join(selected_tags) # Converte a lista de volta para string
                     }
-                    storage.update_task(task_data['id'], updates)
-                    st.session_state.task_to_edit = None
-                    st.rerun()
+                    # A versão guardada ao abrir o formulário detecta edições feitas por outra sessão nesse meio-tempo
+                    if storage.update_task(task_data['id'], updates, expected_version=st.session_state.get('task_to_edit_version')):
+                        st.session_state.task_to_edit = None
+                        st.rerun()
+                    else:
+                        st.session_state.task_to_edit_version = (storage.get_task(task_data['id']) or {}).get('version')
                 
                 if btn_col2.form_submit_button("Cancelar", type="secondary", use_container_width=True):
                     st.session_state.task_to_edit = None
                     st.rerun()
 
 # --- INTERFACE PRINCIPAL DA PÁGINA ---
-st.header("🗺️ Mapa de Produtividade (Matriz de Eisenhower)")
 with st.expander("➕ Adicionar nova tarefa"):
     with st.form(key="add_task_form", clear_on_submit=True):
         title = st.text_input("Título da Tarefa*")
@@ -99,63 +104,120 @@ with st.expander("➕ Adicionar nova tarefa"):
                 st.warning("O título é obrigatório.")
 
 # --- Exibe o gráfico e a lista de tarefas ---
-tasks = [t for t in storage.list_tasks() if t.get('status') != 'done']
+pending_df = storage.pending_tasks_df()
 
-if not tasks:
+if pending_df.empty:
     st.info("Nenhuma tarefa ativa. Adicione uma para começar.")
 else:
-    df = pd.DataFrame(tasks)
-    
-    # Adiciona a coluna de cores para o gráfico
-    color_map = {
-        "Faça Primeiro": "#1f77b4", # Azul
-        "Agende": "#ff7f0e",       # Laranja
-        "Delegue": "#d62728",      # Vermelho
-        "Elimine": "#7f7f7f",       # Cinza
-    }
-    df['color'] = df['quadrant'].map(color_map).fillna('#7f7f7f')
-
-    # Cria o hover text mais detalhado
-    df['hover_text'] = df.apply(
-        lambda row: f"<b>{row['title']}</b><br><br>" +
-                    f"Descrição: {row.get('description', 'N/A')}<br>" +
-                    f"Entrega: {row.get('due_date', 'N/A')}<br>" +
-                    f"Tags: {row.get('tags', 'N/A')}",
-        axis=1
+    # Acima destes tamanhos o gráfico agrupa as tarefas por célula / passa a usar WebGL
+    aggregate_threshold = int(get_config("MATRIX_AGGREGATE_THRESHOLD", 300))
+    webgl_threshold = int(get_config("MATRIX_WEBGL_THRESHOLD", 1000))
+    max_hover_titles = 10
+    aggregated = st.toggle(
+        "Agrupar tarefas por célula", value=len(pending_df) > aggregate_threshold,
+        help="Mostra uma bolha por combinação de urgência e importância, com tamanho proporcional à quantidade de tarefas."
     )
+
+    # O plotly só é carregado quando há um gráfico para desenhar
+    with timed("plotly.import"):
+        import plotly.graph_objects as go
+
+    with timed("plotly.figure"):
+        df = pending_df
     
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=df['urgency'], 
-        y=df['importance'],
-        mode='markers',
-        marker=dict(size=15, color=df['color'], opacity=0.8, line=dict(width=1, color='DarkSlateGrey')),
-        text=df['hover_text'],
-        hoverinfo='text'
-    ))
-
-    # Layout do gráfico
-    fig.update_layout(
-        xaxis_title="Urgência", yaxis_title="Importância",
-        xaxis=dict(range=[-5.5, 5.5], zeroline=True, zerolinewidth=2, zerolinecolor='black', gridcolor='rgba(200, 200, 200, 0.2)'),
-        yaxis=dict(range=[-5.5, 5.5], zeroline=True, zerolinewidth=2, zerolinecolor='black', gridcolor='rgba(200, 200, 200, 0.2)'),
-        height=600, plot_bgcolor='rgba(240, 242, 246, 1)',
-        shapes=[
-            dict(type="rect", xref="paper", yref="paper", x0=0.5, y0=0.5, x1=1, y1=1, fillcolor="#d4edda", opacity=0.3, layer="below", line_width=0),
-            dict(type="rect", xref="paper", yref="paper", x0=0, y0=0.5, x1=0.5, y1=1, fillcolor="#fff3cd", opacity=0.3, layer="below", line_width=0),
-            dict(type="rect", xref="paper", yref="paper", x0=0.5, y0=0, x1=1, y1=0.5, fillcolor="#f8d7da", opacity=0.3, layer="below", line_width=0),
-            dict(type="rect", xref="paper", yref="paper", x0=0, y0=0, x1=0.5, y1=0.5, fillcolor="#e2e3e5", opacity=0.3, layer="below", line_width=0),
-        ],
-        annotations=[
-            dict(x=2.75, y=2.75, text="Faça Primeiro", showarrow=False, font=dict(size=16, color="#155724")),
-            dict(x=-2.75, y=2.75, text="Agende", showarrow=False, font=dict(size=16, color="#856404")),
-            dict(x=2.75, y=-2.75, text="Delegue", showarrow=False, font=dict(size=16, color="#721c24")),
-            dict(x=-2.75, y=-2.75, text="Elimine", showarrow=False, font=dict(size=16, color="#383d41")),
-        ]
-    )
-    st.plotly_chart(fig, use_container_width=True)
+        # Adiciona a coluna de cores para o gráfico
+        color_map = {
+            "Faça Primeiro": "#1f77b4", # Azul
+            "Agende": "#ff7f0e",       # Laranja
+            "Delegue": "#d62728",      # Vermelho
+            "Elimine": "#7f7f7f",       # Cinza
+        }
+        df['color'] = df['quadrant'].astype(str).map(color_map).fillna('#7f7f7f')
+
+        fig = go.Figure()
+        if aggregated:
+            # Notas são inteiras: no máximo 11x11 bolhas, qualquer que seja o tamanho do backlog
+            cells = df.groupby(['urgency', 'importance'], sort=False).agg(
+                count=('id', 'size'),
+                color=('color', 'first'),
+                titles=('title', lambda titles: '<br>'.join(titles.astype(str).head(max_hover_titles))),
+            ).reset_index()
+            remaining = (cells['count'] - max_hover_titles).clip(lower=0)
+            cells['hover_text'] = (
+                "<b>" + cells['count'].astype(str) + " tarefa(s)</b><br><br>" + cells['titles']
+                + remaining.map(lambda n: f"<br>... e mais {n}" if n else "")
+            )
+            fig.add_trace(go.Scatter(
+                x=cells['urgency'],
+                y=cells['importance'],
+                mode='markers+text',
+                marker=dict(
+                    size=cells['count'], sizemode='area', sizeref=2 * cells['count'].max() / 45 ** 2, sizemin=8,
+                    color=cells['color'], opacity=0.8, line=dict(width=1, color='DarkSlateGrey')
+                ),
+                text=cells['count'],
+                textfont=dict(color='white'),
+                hovertext=cells['hover_text'],
+                hoverinfo='text'
+            ))
+        else:
+            # Cria o hover text mais detalhado (concatenação vetorizada das colunas)
+            df['hover_text'] = (
+                "<b>" + df['title'].astype(str) + "</b><br><br>"
+                + "Descrição: " + df['description'].astype(str) + "<br>"
+                + "Entrega: " + df['due_date'].astype(str) + "<br>"
+                + "Tags: " + df['tags'].astype(str)
+            )
+            scatter = go.Scattergl if len(df) > webgl_threshold else go.Scatter
+            fig.add_trace(scatter(
+                x=df['urgency'], 
+                y=df['importance'],
+                mode='markers',
+                marker=dict(size=15, color=df['color'], opacity=0.8, line=dict(width=1, color='DarkSlateGrey')),
+                text=df['hover_text'],
+                hoverinfo='text'
+            ))
+
+        # Layout do gráfico
+        fig.update_layout(
+            xaxis_title="Urgência", yaxis_title="Importância",
+            xaxis=dict(range=[-5.5, 5.5], zeroline=True, zerolinewidth=2, zerolinecolor='black', gridcolor='rgba(200, 200, 200, 0.2)'),
+            yaxis=dict(range=[-5.5, 5.5], zeroline=True, zerolinewidth=2, zerolinecolor='black', gridcolor='rgba(200, 200, 200, 0.2)'),
+            height=600, plot_bgcolor='rgba(240, 242, 246, 1)',
+            shapes=[
+                dict(type="rect", xref="paper", yref="paper", x0=0.5, y0=0.5, x1=1, y1=1, fillcolor="#d4edda", opacity=0.3, layer="below", line_width=0),
+                dict(type="rect", xref="paper", yref="paper", x0=0, y0=0.5, x1=0.5, y1=1, fillcolor="#fff3cd", opacity=0.3, layer="below", line_width=0),
+                dict(type="rect", xref="paper", yref="paper", x0=0.5, y0=0, x1=1, y1=0.5, fillcolor="#f8d7da", opacity=0.3, layer="below", line_width=0),
+                dict(type="rect", xref="paper", yref="paper", x0=0, y0=0, x1=0.5, y1=0.5, fillcolor="#e2e3e5", opacity=0.3, layer="below", line_width=0),
+            ],
+            annotations=[
+                dict(x=2.75, y=2.75, text="Faça Primeiro", showarrow=False, font=dict(size=16, color="#155724")),
+                dict(x=-2.75, y=2.75, text="Agende", showarrow=False, font=dict(size=16, color="#856404")),
+                dict(x=2.75, y=-2.75, text="Delegue", showarrow=False, font=dict(size=16, color="#721c24")),
+                dict(x=-2.75, y=-2.75, text="Elimine", showarrow=False, font=dict(size=16, color="#383d41")),
+            ]
+        )
+    with timed("plotly.render"):
+        st.plotly_chart(fig, use_container_width=True)
 
     st.subheader("📋 Lista de Tarefas Ativas")
+    # Os filtros rodam nos índices do storage e só a página visível vira widgets
+    with st.expander("🔎 Filtrar tarefas"):
+        filter_col1, filter_col2 = st.columns(2)
+        quadrant_filter = filter_col1.selectbox("Quadrante", ["Todos"] + QUADRANTS)
+        tag_filter = filter_col2.selectbox("Tag", ["Todas"] + available_tags)
+        search_filter = filter_col1.text_input("Buscar no título")
+        due_range = filter_col2.date_input("Entrega entre", value=(), format="DD/MM/YYYY")
+    filters = {
+        "quadrant": None if quadrant_filter == "Todos" else quadrant_filter,
+        "tag": None if tag_filter == "Todas" else tag_filter,
+        "search": search_filter.strip() or None,
+        "due_from": due_range[0].isoformat() if len(due_range) > 0 else None,
+        "due_to": due_range[1].isoformat() if len(due_range) > 1 else None,
+    }
+    tasks, total_tasks = paginated_query(storage, "matrix_page", **filters)
+    if not tasks:
+        st.info("Nenhuma tarefa ativa corresponde aos filtros.")
     for task in tasks:
         st.markdown("---")
         col1, col2, col3 = st.columns([0.8, 0.1, 0.1])
@@ -166,9 +228,12 @@ else:
         with col2:
             if st.button("✏️", key=f"edit_{task['id']}", help="Editar esta tarefa"):
                 st.session_state.task_to_edit = task['id']
+                st.session_state.task_to_edit_version = task.get('version')
                 st.rerun()
         with col3:
             if st.button("✔️", key=f"done_{task['id']}", help="Concluir esta tarefa"):
                 storage.mark_done(task['id'])
                 st.rerun()
+    render_pagination("matrix_page", total_tasks)
 
+finish_rerun_trace()
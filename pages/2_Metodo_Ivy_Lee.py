@@ -1,16 +1,18 @@
 # pages/2_Metodo_Ivy_Lee.py
 import streamlit as st
-from utils import Storage
+from utils import Storage, begin_rerun_trace, finish_rerun_trace, render_sync_status
 
 st.set_page_config(layout="wide")
-if 'storage' not in st.session_state:
-    st.session_state.storage = Storage()
-storage = st.session_state.storage
-
+begin_rerun_trace("ivy_lee")
 st.header("🎯 Método Ivy Lee: As 6 Tarefas Mais Importantes")
 st.markdown("Ao final de cada dia, defina as 6 tarefas mais importantes para amanhã. Comece pela primeira e siga a lista em ordem.")
 st.info("A lista abaixo é priorizada automaticamente com base na sua Matriz de Eisenhower (Importância > Urgência).")
 
+if 'storage' not in st.session_state:
+    st.session_state.storage = Storage()
+storage = st.session_state.storage
+render_sync_status(storage)
+
 top_tasks = storage.get_top_n_pending_tasks(n=6)
 if not top_tasks:
     st.success("✨ Nenhuma tarefa prioritária pendente! Adicione novas na Matriz de Eisenhower.")
@@ -26,4 +28,6 @@ else:
             if st.checkbox("✔", value=is_done, key=f"ivylee_done_{task['id']}", help="Marcar como concluída"):
                 if not is_done:
                     storage.mark_done(task['id'])
-                    st.rerun()
\ No newline at end of file
+                    st.rerun()
+
+finish_rerun_trace()
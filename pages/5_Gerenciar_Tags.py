@@ -1,7 +1,8 @@
 import streamlit as st
-from utils import Storage
+from utils import Storage, begin_rerun_trace, finish_rerun_trace, render_sync_status
 
 st.set_page_config(layout="wide")
+begin_rerun_trace("tags")
 st.header("⚙️ Gerenciar Tags (Categorias de Trabalho)")
 st.markdown("Adicione, visualize e remova as categorias que você usa para organizar suas tarefas.")
 
@@ -9,6 +10,7 @@ st.markdown("Adicione, visualize e remova as categorias que você usa para organ
 if 'storage' not in st.session_state:
     st.session_state.storage = Storage()
 storage = st.session_state.storage
+render_sync_status(storage)
 
 # Formulário para adicionar uma nova tag
 st.subheader("Adicionar Nova Tag")
@@ -42,3 +44,5 @@ else:
                     st.rerun() # Recarrega a página para atualizar a lista
         
         col_index = (col_index + 1) % 3
+
+finish_rerun_trace()
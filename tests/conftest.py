@@ -0,0 +1,117 @@
+# tests/conftest.py
+# Fixtures comuns dos testes: a planilha falsa de benchmarks/fake_gspread.py (sem rede),
+# um SQLite em memória e um motor de voz local no lugar do gTTS.
+
+import sys
+from pathlib import Path
+
+import gspread
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import utils  # noqa: E402
+from fake_gspread import FakeSpreadsheet  # noqa: E402
+
+TAGS = ["Casa", "Trabalho", "Estudo"]
+
+
+def make_task(task_id: str, **fields) -> dict:
+    """Tarefa completa com valores padrão; `fields` sobrescreve qualquer coluna."""
+    task = {
+        'id': task_id, 'title': f"Tarefa {task_id}", 'description': '', 'importance': 1, 'urgency': 1,
+        'due_date': '', 'tags': '', 'quadrant': 'Faça Primeiro', 'status': 'pending',
+        'updated_at': '2026-09-15T12:00:00+00:00', 'version': 1,
+    }
+    task.update(fields)
+    return task
+
+
+def seed_sheet(spreadsheet: FakeSpreadsheet, tasks: list[dict]):
+    spreadsheet._worksheets["Página1"].data = [list(utils.TASK_COLUMNS)] + [
+        [str(task[col]) for col in utils.TASK_COLUMNS] for task in tasks
+    ]
+
+
+def sheet_rows(spreadsheet: FakeSpreadsheet, title: str = "Página1") -> list[dict]:
+    """Linhas atuais de uma aba como dicts (cabeçalho na primeira linha)."""
+    header, *rows = spreadsheet._worksheets[title]._values()
+    return [dict(zip(header, row)) for row in rows]
+
+
+class FakeResponse:
+    """Resposta HTTP mínima para montar um gspread APIError com o código desejado."""
+
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.text = f"erro {status_code}"
+
+    def json(self):
+        return {'error': {'code': self.status_code, 'message': self.text, 'status': 'FAILED'}}
+
+
+def api_error(status_code: int) -> gspread.exceptions.APIError:
+    return gspread.exceptions.APIError(FakeResponse(status_code))
+
+
+@pytest.fixture
+def tasks() -> list[dict]:
+    return [make_task(f"t{i}") for i in range(6)]
+
+
+@pytest.fixture
+def sheet(tasks) -> FakeSpreadsheet:
+    spreadsheet = FakeSpreadsheet(worksheets=("Página1", "Tags"))
+    seed_sheet(spreadsheet, tasks)
+    spreadsheet._worksheets["Tags"].data = [["tag_name"]] + [[tag] for tag in TAGS]
+    return spreadsheet
+
+
+@pytest.fixture
+def sheets_backend():
+    """Fábrica de SheetsBackend sobre uma planilha falsa; cada chamada é uma réplica independente."""
+    def factory(spreadsheet: FakeSpreadsheet) -> utils.SheetsBackend:
+        return utils.SheetsBackend(spreadsheet, scheduler=utils.ApiScheduler(quota_per_minute=10**9))
+    return factory
+
+
+@pytest.fixture
+def make_storage(monkeypatch, sheets_backend):
+    """Fábrica de Storage; `cached=True` liga o cache compartilhado e a gravação adiada, como em produção."""
+    def factory(source, cached: bool = True) -> utils.Storage:
+        flag = "true" if cached else "false"
+        monkeypatch.setenv("SHARED_SNAPSHOT", flag)
+        monkeypatch.setenv("WRITE_BEHIND", flag)
+        monkeypatch.setenv("WRITE_BEHIND_INTERVAL", "0")
+        backend = sheets_backend(source) if isinstance(source, FakeSpreadsheet) else source
+        return utils.Storage(backend)
+    return factory
+
+
+@pytest.fixture
+def sqlite_backend(tasks) -> utils.SQLiteBackend:
+    backend = utils.SQLiteBackend(":memory:")
+    backend.insert_tasks(tasks)
+    for tag in TAGS:
+        backend.add_tag(tag)
+    return backend
+
+
+class FakeTTSEngine(utils.TTSEngine):
+    """Motor de voz local: devolve bytes determinísticos e conta as sínteses, sem rede."""
+
+    def __init__(self, size: int = 100):
+        self.size = size
+        self.calls = []
+
+    def synthesize(self, text: str, lang: str, tld: str, slow: bool) -> bytes:
+        self.calls.append(text)
+        payload = f"{lang}|{tld}|{slow}|{text}".encode('utf-8')
+        return (payload * (self.size // len(payload) + 1))[:self.size]
+
+
+@pytest.fixture
+def tts_engine() -> FakeTTSEngine:
+    return FakeTTSEngine()
@@ -0,0 +1,90 @@
+# tests/test_archive.py
+# Arquivamento mensal das concluídas (Sheets e SQLite) e réplicas que ficaram com o layout antigo.
+
+import pytest
+
+from conftest import make_task, sheet_rows
+
+
+@pytest.fixture
+def tasks():
+    return [
+        make_task('t0', status='done', updated_at='2026-08-20T10:00:00+00:00'),
+        make_task('t1'),
+        make_task('t2', status='done', updated_at='2026-09-02T10:00:00+00:00'),
+        make_task('t3', status='done', updated_at='2026-09-03T10:00:00+00:00'),
+        make_task('t4'),
+        make_task('t5'),
+        make_task('t6'),
+    ]
+
+
+def test_compactacao_na_planilha_move_concluidas_para_abas_mensais(sheet, make_storage):
+    storage = make_storage(sheet)
+
+    assert storage.compact() == {'2026-08': 1, '2026-09': 2}
+
+    assert [row['id'] for row in sheet_rows(sheet)] == ['t1', 't4', 't5', 't6']
+    assert [row['id'] for row in sheet_rows(sheet, "Arquivo 2026-09")] == ['t2', 't3']
+    assert storage.archive_months() == ['2026-08', '2026-09']
+    assert list(storage.archived_tasks('2026-08', '2026-08')['id']) == ['t0']
+    assert sorted(storage.archived_tasks()['id']) == ['t0', 't2', 't3']
+    assert [task['id'] for task in storage.list_tasks()] == ['t1', 't4', 't5', 't6']
+    # Uma segunda compactação não encontra nada para mover
+    assert storage.compact() == {}
+
+
+def test_compactacao_remove_so_as_linhas_das_concluidas(sheet, sheets_backend, monkeypatch):
+    backend = sheets_backend(sheet)
+    delete_rows = backend._delete_task_rows
+
+    def concurrent_insert(header, task_ids):
+        # Outra sessão inclui uma tarefa depois da leitura da aba e antes da remoção
+        sheet._worksheets["Página1"].append_rows([[str(value) for value in make_task('t9').values()]])
+        return delete_rows(header, task_ids)
+
+    monkeypatch.setattr(backend, '_delete_task_rows', concurrent_insert)
+    backend.archive_done_tasks()
+
+    assert [row['id'] for row in sheet_rows(sheet)] == ['t1', 't4', 't5', 't6', 't9']
+    assert sheet.calls_by_method['batch_update'] == 1
+
+
+def test_replica_com_layout_antigo_edita_a_tarefa_certa_depois_da_compactacao(sheet, make_storage):
+    archiver, stale = make_storage(sheet), make_storage(sheet)
+    stale.list_tasks()
+
+    archiver.compact()
+    # A réplica antiga ainda tem no cache as linhas de antes da compactação
+    stale.update_task('t4', {'title': 'Editada'})
+    stale.mark_done('t1')
+    assert stale.flush(5)
+
+    rows = {row['id']: row for row in sheet_rows(sheet)}
+    assert stale.sync_status()['conflicts'] == 0
+    assert rows['t4']['title'] == 'Editada'
+    assert rows['t5']['title'] == 'Tarefa t5'
+    assert rows['t1']['status'] == 'done'
+    assert [row['id'] for row in sheet_rows(sheet) if row['status'] == 'done'] == ['t1']
+
+
+def test_replica_antiga_nao_edita_tarefa_que_ja_foi_arquivada(sheet, make_storage):
+    archiver, stale = make_storage(sheet), make_storage(sheet)
+    stale.list_tasks()
+    archiver.compact()
+
+    stale.update_task('t2', {'title': 'Tarde demais'})
+    assert stale.flush(5)
+
+    assert stale.sync_status()['conflicts'] == 1
+    assert 'Tarde demais' not in {row['title'] for row in sheet_rows(sheet)}
+
+
+def test_compactacao_no_sqlite(sqlite_backend, make_storage):
+    storage = make_storage(sqlite_backend, cached=False)
+
+    assert storage.compact() == {'2026-08': 1, '2026-09': 2}
+
+    assert [task['id'] for task in storage.list_tasks()] == ['t1', 't4', 't5', 't6']
+    assert storage.archive_months() == ['2026-08', '2026-09']
+    assert sorted(storage.archived_tasks('2026-09')['id']) == ['t2', 't3']
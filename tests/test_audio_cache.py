@@ -0,0 +1,68 @@
+# tests/test_audio_cache.py
+# Cache de áudio com o motor de voz local no lugar do gTTS: acertos, despejo e resumo segmentado.
+
+import utils
+
+
+def test_repeticao_vem_da_memoria_e_de_outra_instancia_vem_do_disco(tmp_path, tts_engine):
+    cache = utils.AudioCache(tmp_path, engine=tts_engine)
+
+    first = cache.get_or_synthesize("Bom dia", 'pt', 'com.br', False)
+    again = cache.get_or_synthesize("Bom dia", 'pt', 'com.br', False)
+    # Mudar o sotaque ou a velocidade é outra entrada
+    cache.get_or_synthesize("Bom dia", 'pt', 'pt', False)
+    cache.get_or_synthesize("Bom dia", 'pt', 'com.br', True)
+
+    assert again == first
+    assert tts_engine.calls == ["Bom dia"] * 3
+    assert cache.stats == {'memory_hits': 1, 'disk_hits': 0, 'misses': 3, 'evictions': 0}
+
+    restarted = utils.AudioCache(tmp_path, engine=tts_engine)
+    assert restarted.get_or_synthesize("Bom dia", 'pt', 'com.br', False) == first
+    assert restarted.stats['disk_hits'] == 1
+    assert len(tts_engine.calls) == 3
+
+
+def test_disco_cheio_despeja_o_item_usado_ha_mais_tempo(tmp_path, tts_engine):
+    # Cabem dois áudios de 100 bytes no disco e um na memória
+    cache = utils.AudioCache(tmp_path, engine=tts_engine, max_bytes=250, hot_max_bytes=100)
+
+    cache.get_or_synthesize("um", 'pt', 'com.br', False)
+    cache.get_or_synthesize("dois", 'pt', 'com.br', False)
+    cache.get_or_synthesize("um", 'pt', 'com.br', False)
+    cache.get_or_synthesize("três", 'pt', 'com.br', False)
+
+    assert cache.stats['evictions'] == 1
+    assert len(list(tmp_path.glob("*.mp3"))) == 2
+    assert cache.get(utils.AudioCache.key("dois", 'pt', 'com.br', False)) is None
+    assert cache.get(utils.AudioCache.key("um", 'pt', 'com.br', False)) is not None
+    assert tts_engine.calls == ["um", "dois", "três"]
+
+
+def test_geracao_de_audio_devolve_um_buffer_do_cache(tmp_path, tts_engine):
+    cache = utils.AudioCache(tmp_path, engine=tts_engine)
+
+    first = utils.generate_audio_from_text("Olá", cache=cache)
+    second = utils.generate_audio_from_text("Olá", cache=cache)
+
+    assert first.read() == second.read() == cache.get(utils.AudioCache.key("Olá", 'pt', 'com.br', False))
+    assert tts_engine.calls == ["Olá"]
+
+
+def test_resumo_segmentado_sintetiza_so_a_frase_nova(tmp_path, tts_engine):
+    cache = utils.AudioCache(tmp_path, engine=tts_engine)
+
+    first = utils.generate_summary_audio(["Olá! Você tem 2 tarefas.", "1. Pagar contas.", "2. Ler."], cache=cache)
+    second = utils.generate_summary_audio(["Olá! Você tem 2 tarefas.", "1. Pagar contas.", "2. Escrever."], cache=cache)
+
+    assert first.getvalue() and second.getvalue() != first.getvalue()
+    assert tts_engine.calls.count("1. Pagar contas.") == 1
+    assert tts_engine.calls[-1] == "2. Escrever."
+    assert len(tts_engine.calls) == 4
+
+
+def test_resumo_sem_frases_devolve_none(tmp_path, tts_engine):
+    cache = utils.AudioCache(tmp_path, engine=tts_engine)
+
+    assert utils.generate_summary_audio(["", "  "], cache=cache) is None
+    assert tts_engine.calls == []
@@ -0,0 +1,91 @@
+# tests/test_backends.py
+# Motores de armazenamento: o SQLite indexado responde às consultas como a implementação
+# padrão sobre o DataFrame completo.
+
+import pandas as pd
+import pytest
+
+import utils
+from conftest import TAGS, make_task
+
+
+class MemoryBackend(utils.StorageBackend):
+    """Motor mínimo sobre um DataFrame em memória: só usa as consultas padrão da interface."""
+
+    def __init__(self):
+        self.df = utils._normalize_tasks_df(pd.DataFrame(columns=utils.TASK_COLUMNS))
+        self.tags = []
+
+    def read_tasks(self) -> pd.DataFrame:
+        return self.df.copy()
+
+    def write_tasks(self, df: pd.DataFrame):
+        self.df = utils._normalize_tasks_df(df.copy())
+
+    def list_tags(self) -> list[str]:
+        return list(self.tags)
+
+    def add_tag(self, tag_name: str):
+        self.tags.append(tag_name)
+
+    def delete_tag(self, tag_name: str) -> bool:
+        if tag_name not in self.tags:
+            return False
+        self.tags.remove(tag_name)
+        return True
+
+
+@pytest.fixture
+def tasks():
+    return [
+        make_task('a', importance=3, urgency=4, tags='Casa, Trabalho'),
+        make_task('b', importance=5, urgency=-2, tags='Trabalho', quadrant='Agende'),
+        make_task('c', importance=-1, urgency=2, tags='Estudo', quadrant='Delegue'),
+        make_task('d', importance=5, urgency=5, tags='Casa', status='done'),
+        make_task('e', importance=-3, urgency=-3, quadrant='Elimine'),
+    ]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tasks):
+    backend = MemoryBackend() if request.param == "memory" else utils.SQLiteBackend(":memory:")
+    for task in tasks:
+        backend.insert_task(task)
+    for tag in TAGS:
+        backend.add_tag(tag)
+    return backend
+
+
+def _ids(tasks: list[dict]) -> list[str]:
+    return [task['id'] for task in tasks]
+
+
+def test_consultas_iguais_nos_dois_motores(backend):
+    assert _ids(backend.list_tasks()) == ['a', 'b', 'c', 'd', 'e']
+    assert _ids(backend.get_urgent_tasks()) == ['a', 'c']
+    assert _ids(backend.get_top_n_pending_tasks(2)) == ['b', 'a']
+    assert {tag: _ids(group) for tag, group in backend.group_pending_tasks_by_tag().items()} == {
+        'Casa': ['a'], 'Estudo': ['c'], 'Trabalho': ['a', 'b'],
+    }
+
+
+def test_edicao_e_remocao_de_tag(backend):
+    assert backend.update_task('c', {'tags': 'Casa', 'status': 'done'}) is True
+    assert backend.update_task('inexistente', {'title': 'x'}) is False
+    assert backend.delete_tag('Estudo') is True
+    assert backend.delete_tag('Estudo') is False
+
+    assert backend.get_task('c')['status'] == 'done'
+    assert sorted(backend.list_tags()) == ['Casa', 'Trabalho']
+    assert 'Estudo' not in backend.group_pending_tasks_by_tag()
+
+
+def test_storage_recalcula_o_quadrante_ao_mudar_a_prioridade(sqlite_backend):
+    storage = utils.Storage(sqlite_backend)
+
+    storage.update_task('a', {'urgency': -2})
+    storage.mark_done('c')
+
+    assert sqlite_backend.get_task('a')['quadrant'] == 'Agende'
+    assert sqlite_backend.get_task('c')['status'] == 'done'
+    assert storage.get_urgent_tasks() == []
@@ -0,0 +1,105 @@
+# tests/test_bulk.py
+# Importação e exportação em lote (CSV e JSONL): ida e volta, linhas recusadas e gravação em blocos.
+
+import io
+import json
+
+import pytest
+
+import utils
+from conftest import TAGS, make_task
+
+COMPARED = ['title', 'description', 'importance', 'urgency', 'due_date', 'tags', 'quadrant', 'status']
+
+
+@pytest.fixture
+def tasks():
+    return [
+        make_task('a', title='Relatório, versão "final"', description='linha 1\nlinha 2', importance=3, urgency=-2,
+                  due_date='2026-11-05', tags='Trabalho, Estudo', quadrant='Agende'),
+        make_task('b', title='Ação com acento', importance=-4, urgency=4, tags='Casa', quadrant='Delegue'),
+        make_task('c', title='Concluída', importance=1, urgency=1, status='done'),
+    ]
+
+
+def _empty_storage(make_storage) -> utils.Storage:
+    backend = utils.SQLiteBackend(":memory:")
+    for tag in TAGS:
+        backend.add_tag(tag)
+    return make_storage(backend, cached=False)
+
+
+def _comparable(storage) -> list[dict]:
+    return sorted(({key: str(task[key]) for key in COMPARED} for task in storage.list_tasks()), key=lambda t: t['title'])
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_exportar_e_importar_preserva_as_tarefas(sqlite_backend, make_storage, tmp_path, fmt):
+    source = make_storage(sqlite_backend, cached=False)
+    path = tmp_path / f"tarefas.{fmt}"
+
+    assert source.export_tasks(path) == 3
+    target = _empty_storage(make_storage)
+    report = target.import_tasks(path)
+
+    assert report['imported'] == 3
+    assert report['rejected'] == 0
+    assert _comparable(target) == _comparable(source)
+    # Cada tarefa importada ganha um id novo
+    assert not {task['id'] for task in target.list_tasks()} & {'a', 'b', 'c'}
+
+
+def test_exportacao_inclui_arquivadas_quando_pedido(sqlite_backend, make_storage):
+    sqlite_backend.update_task('b', {'status': 'done'})
+    storage = make_storage(sqlite_backend, cached=False)
+    storage.compact()
+
+    active, everything = io.StringIO(), io.StringIO()
+    storage.export_tasks(active, fmt='jsonl')
+    storage.export_tasks(everything, fmt='jsonl', include_archived=True)
+
+    assert [json.loads(line)['id'] for line in active.getvalue().splitlines()] == ['a']
+    assert sorted(json.loads(line)['id'] for line in everything.getvalue().splitlines()) == ['a', 'b', 'c']
+
+
+def test_importacao_de_csv_com_bom_do_excel(make_storage, tmp_path):
+    path = tmp_path / "excel.csv"
+    path.write_bytes("title,importance,urgency,tags\nPrimeira,2,3,Casa\nSegunda,-1,0,\n".encode('utf-8-sig'))
+    storage = _empty_storage(make_storage)
+
+    report = storage.import_tasks(path)
+
+    assert report['imported'] == 2
+    assert {task['title']: task['quadrant'] for task in storage.list_tasks()} == {'Primeira': 'Faça Primeiro', 'Segunda': 'Elimine'}
+
+
+def test_linhas_invalidas_sao_recusadas_com_o_numero_da_linha(make_storage):
+    content = "\n".join([
+        json.dumps({'title': 'Válida', 'importance': 1, 'urgency': 1, 'tags': ['Casa', 'Inexistente']}),
+        json.dumps({'title': '', 'importance': 1}),
+        "{não é json",
+        json.dumps({'title': 'Fora do intervalo', 'importance': 9}),
+        json.dumps({'title': 'Data ruim', 'due_date': '05/11/2026'}),
+    ])
+    storage = _empty_storage(make_storage)
+
+    report = storage.import_tasks(io.StringIO(content), fmt='jsonl')
+
+    assert report['imported'] == 1
+    assert report['rejected'] == 4
+    assert [line for line, _ in report['errors']] == [2, 3, 4, 5]
+    assert report['unknown_tags'] == {'Inexistente'}
+    assert storage.list_tasks()[0]['tags'] == 'Casa'
+
+
+def test_importacao_na_planilha_grava_um_bloco_por_chamada(sheet, make_storage, tasks):
+    storage = make_storage(sheet, cached=False)
+    rows = [{'title': f"Importada {i}", 'importance': i % 11 - 5, 'urgency': 1} for i in range(1200)]
+    seen = []
+
+    report = storage.import_tasks(io.StringIO("\n".join(map(json.dumps, rows))), fmt='jsonl', chunk_size=500, progress=seen.append)
+
+    assert report['imported'] == 1200
+    assert seen == [500, 1000, 1200]
+    assert sheet.calls_by_method['append_rows'] == 3
+    assert len(storage.list_tasks()) == len(tasks) + 1200
@@ -0,0 +1,47 @@
+# tests/test_cache.py
+# Cache de leitura compartilhado: acertos, escritas refletidas no lugar e expiração pelo TTL.
+
+import time
+
+
+def _title(storage, task_id: str) -> str:
+    return next(task['title'] for task in storage.list_tasks() if task['id'] == task_id)
+
+
+def test_leituras_repetidas_vem_do_cache(sqlite_backend, make_storage):
+    storage = make_storage(sqlite_backend)
+
+    for _ in range(3):
+        storage.list_tasks()
+        storage.list_tags()
+
+    stats = storage.cache_stats()
+    assert stats['misses'] == {'tasks': 1, 'tags': 1}
+    assert stats['hits']['tasks'] >= 2
+    assert stats['hits']['tags'] == 2
+
+
+def test_escrita_atualiza_o_cache_sem_reler_o_backend(sqlite_backend, make_storage):
+    storage = make_storage(sqlite_backend)
+    storage.list_tasks()
+    storage.list_tags()
+
+    storage.add_tag("Lazer")
+    assert "Lazer" in storage.list_tags()
+    storage.update_task('t1', {'title': 'Renomeada'})
+    assert _title(storage, 't1') == 'Renomeada'
+
+    # A lista de tags e a tabela de tarefas em cache são atualizadas no lugar, sem reler o backend
+    assert storage.cache_stats()['misses'] == {'tasks': 1, 'tags': 1}
+
+
+def test_mudanca_feita_por_fora_aparece_depois_do_ttl(sqlite_backend, make_storage, monkeypatch):
+    monkeypatch.setenv("CACHE_TTL_SECONDS", "0.05")
+    storage = make_storage(sqlite_backend)
+    storage.list_tasks()
+
+    sqlite_backend.update_task('t2', {'title': 'Outra réplica'})
+    assert _title(storage, 't2') == 'Tarefa t2'
+
+    time.sleep(0.1)
+    assert _title(storage, 't2') == 'Outra réplica'
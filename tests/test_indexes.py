@@ -0,0 +1,130 @@
+# tests/test_indexes.py
+# Índices de tags, prioridade e prazos: comportamento isolado e atualização incremental no cache.
+
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from conftest import make_task
+from utils import DueDateIndex, PriorityIndex, TagIndex, _normalize_tasks_df
+
+TODAY = date.today()
+
+
+def _day(offset: int) -> str:
+    return (TODAY + timedelta(days=offset)).isoformat()
+
+
+@pytest.fixture
+def tasks():
+    return [
+        make_task('a', importance=5, urgency=2, due_date=_day(3), tags='Casa, Trabalho'),
+        make_task('b', importance=5, urgency=2, due_date=_day(1), tags='Trabalho'),
+        make_task('c', importance=2, urgency=5, due_date=_day(-2), tags='Estudo'),
+        make_task('d', importance=-1, urgency=-3, due_date='', tags='Casa'),
+        make_task('e', importance=4, urgency=4, due_date='amanhã', tags=''),
+        make_task('f', importance=5, urgency=5, due_date=_day(0), tags='Casa', status='done'),
+    ]
+
+
+@pytest.fixture
+def df(tasks) -> pd.DataFrame:
+    return _normalize_tasks_df(pd.DataFrame(tasks))
+
+
+# --- ÍNDICES ISOLADOS ---
+def test_indice_de_tags_ignora_concluidas_e_combina_filtros(df):
+    index = TagIndex.from_df(df)
+
+    assert index.counts() == {'Casa': 2, 'Trabalho': 2, 'Estudo': 1}
+    assert index.query(all_of=['Casa', 'Trabalho']) == {'a'}
+    assert index.query(any_of=['Estudo', 'Casa']) == {'a', 'c', 'd'}
+    assert index.query(all_of=['Trabalho'], any_of=['Casa']) == {'a'}
+
+    index.set_task('a', ['Estudo'])
+    index.remove_task('d')
+    assert index.counts() == {'Trabalho': 1, 'Estudo': 2}
+    assert index.tags_of('a') == ['Estudo']
+
+
+def test_indice_de_prioridade_desempata_pelo_prazo_mais_proximo(df):
+    index = PriorityIndex.from_df(df)
+
+    assert index.top(3) == ['b', 'a', 'e']
+
+    index.upsert('d', 5, 3, '', 'Tarefa d', 3)
+    index.remove('b')
+    assert index.top(3) == ['d', 'a', 'e']
+    with pytest.raises(ValueError):
+        PriorityIndex('sorteio')
+
+
+def test_indice_de_prazos_so_guarda_datas_validas_de_pendentes(df):
+    index = DueDateIndex.from_df(df)
+
+    assert [key[2] for key in index.between()] == ['c', 'b', 'a']
+    assert [key[2] for key in index.between(None, _day(0))] == ['c']
+    assert [key[2] for key in index.between(_day(1), _day(3))] == ['b', 'a']
+
+    index.upsert('c', _day(10), 2)
+    index.upsert('e', 'amanhã', 4)
+    assert [key[2] for key in index.between(None, _day(0))] == []
+    assert [key[2] for key in index.between()] == ['b', 'a', 'c']
+
+
+# --- ATUALIZAÇÃO INCREMENTAL NO CACHE ---
+def _assert_views_match_rebuild(storage):
+    """Os índices mantidos tarefa a tarefa têm de bater com índices reconstruídos do zero."""
+    snapshot = storage.snapshot
+    views = snapshot._task_views()
+    df = views['df']
+    assert views['positions'] == {task_id: pos for pos, task_id in enumerate(df['id'].astype(str))}
+    assert views['tags'].counts() == TagIndex.from_df(df).counts()
+    assert views['due'].between() == DueDateIndex.from_df(df).between()
+    assert views['urgent'] == set(df['id'].astype(str)[(df['status'] != 'done') & (df['urgency'] > 0)])
+    assert snapshot._priority_index(storage.tiebreak).top(len(df)) == PriorityIndex.from_df(df, storage.tiebreak).top(len(df))
+
+
+def test_indices_do_cache_acompanham_inclusao_edicao_e_conclusao(sqlite_backend, make_storage):
+    storage = make_storage(sqlite_backend)
+    storage.get_top_n_pending_tasks()
+    views = storage.snapshot._task_views()
+
+    storage.add_task("Nova", "", 5, 5, _day(-1), ['Estudo'])
+    storage.update_task('d', {'importance': 5, 'urgency': 5, 'tags': 'Trabalho', 'due_date': _day(0)})
+    storage.mark_done('b')
+    storage.update_task('e', {'urgency': -1})
+
+    # Nada foi reconstruído: as mesmas estruturas foram atualizadas no lugar
+    assert storage.snapshot._task_views() is views
+    _assert_views_match_rebuild(storage)
+    top = [task['title'] for task in storage.get_top_n_pending_tasks(3)]
+    assert top == ["Nova", "Tarefa d", "Tarefa a"]
+    assert storage.tag_counts() == {'Casa': 1, 'Trabalho': 2, 'Estudo': 2}
+    assert {task['id'] for task in storage.tasks_with_tag('Trabalho')} == {'a', 'd'}
+    overdue = [task['title'] for task in storage.overdue_tasks()]
+    assert overdue == ["Tarefa c", "Nova"]
+    assert [task['id'] for task in storage.tasks_due_today()] == ['d']
+    # Urgências do dia: prazo até hoje pelo índice de prazos, mais as urgentes mantidas à parte
+    urgent, total = storage.query_tasks(due_to=_day(0), include_urgent=True)
+    assert [task['title'] for task in urgent] == ["Tarefa a", "Tarefa c", "Tarefa d", "Nova"]
+    assert total == 4
+
+    assert storage.flush(5)
+    storage.snapshot.invalidate()
+    _assert_views_match_rebuild(storage)
+    assert storage.tag_counts() == {'Casa': 1, 'Trabalho': 2, 'Estudo': 2}
+
+
+def test_urgencia_pelo_prazo_grava_so_as_pendentes_que_mudaram(sqlite_backend, make_storage):
+    storage = make_storage(sqlite_backend, cached=False)
+
+    # 'b' vence amanhã e sobe de 2 para 4; 'd' não tem prazo e só corrige o quadrante
+    assert storage.apply_deadline_urgency(TODAY) == 2
+
+    tasks = {task['id']: task for task in storage.list_tasks()}
+    assert (tasks['b']['urgency'], tasks['b']['version']) == (4, 2)
+    assert (tasks['d']['urgency'], tasks['d']['quadrant']) == (-3, 'Elimine')
+    assert tasks['f']['urgency'] == 5
+    assert storage.apply_deadline_urgency(TODAY) == 0
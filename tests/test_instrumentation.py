@@ -0,0 +1,72 @@
+# tests/test_instrumentation.py
+# Instrumentação: fases com tempo exclusivo, contadores por execução e o log estruturado de cada rerun.
+
+import json
+import logging
+import time
+
+import pytest
+
+import utils
+
+
+@pytest.fixture
+def trace(monkeypatch):
+    trace = utils.RerunTrace("teste")
+    monkeypatch.setattr(utils, 'INSTRUMENTATION', True)
+    monkeypatch.setattr(utils._trace_context, 'trace', trace, raising=False)
+    monkeypatch.setattr(utils._trace_context, 'spans', [], raising=False)
+    return trace
+
+
+def test_fases_aninhadas_descontam_o_tempo_da_fase_interna(trace):
+    with utils.timed("fora"):
+        time.sleep(0.02)
+        with utils.timed("dentro"):
+            time.sleep(0.05)
+    utils.record("linhas_lidas", 3)
+    utils.record("linhas_lidas", 2)
+
+    summary = trace.summary()
+    assert summary['phases']['dentro']['ms'] >= 50
+    assert 20 <= summary['phases']['fora']['ms'] < summary['phases']['dentro']['ms']
+    assert summary['counters'] == {'linhas_lidas': 5}
+
+
+def test_metodos_instrumentados_viram_fases(trace, sqlite_backend, make_storage):
+    storage = make_storage(sqlite_backend, cached=False)
+
+    storage.list_tasks()
+    storage.list_tasks()
+
+    assert trace.summary()['phases']['Storage.list_tasks']['calls'] == 2
+    assert 'produtividade_duration_seconds_count{op="Storage.list_tasks"}' in utils.METRICS.prometheus_text()
+
+
+def test_fim_da_execucao_registra_uma_linha_json(trace, caplog):
+    with caplog.at_level(logging.INFO, logger="produtividade"):
+        trace.finish()
+        trace.finish()
+
+    [record] = caplog.records
+    logged = json.loads(record.getMessage())
+    assert logged['event'] == 'rerun'
+    assert logged['page'] == 'teste'
+
+
+def test_log_level_liga_os_traces_no_stderr(monkeypatch, capsys):
+    logger = logging.getLogger("produtividade")
+    monkeypatch.setattr(logger, 'handlers', [])
+    monkeypatch.setattr(logger, 'level', logger.level)
+    monkeypatch.setenv("LOG_LEVEL", "info")
+
+    utils.configure_logging()
+    utils.configure_logging()
+    utils.RerunTrace("teste").finish()
+
+    assert len(logger.handlers) == 1
+    assert '"event": "rerun"' in capsys.readouterr().err
+    # Nível desconhecido volta ao padrão, e os traces deixam de sair
+    monkeypatch.setenv("LOG_LEVEL", "detalhado")
+    utils.configure_logging()
+    assert logger.level == logging.WARNING
@@ -0,0 +1,56 @@
+# tests/test_query.py
+# Listas paginadas e filtradas: as três implementações de query_tasks (tabela completa na
+# planilha, SQLite e cache compartilhado) devolvem as mesmas páginas e totais.
+
+import pytest
+
+from conftest import make_task
+
+
+@pytest.fixture
+def tasks():
+    return [
+        make_task('a', title='Pagar contas', due_date='2026-10-20', tags='Casa'),
+        make_task('b', title='Relatório mensal', importance=3, urgency=-1, quadrant='Agende', due_date='2026-10-25', tags='Trabalho'),
+        make_task('c', title='Ler artigo', importance=-2, urgency=2, quadrant='Delegue', tags='Estudo, Trabalho'),
+        make_task('d', title='Conta de luz', due_date='2026-10-18', tags='Casa', status='done'),
+        make_task('e', title='Revisar contrato', due_date='2026-11-02', tags='Trabalho'),
+        make_task('f', title='Arrumar garagem', importance=-3, urgency=-3, quadrant='Elimine', tags='Casa'),
+        make_task('g', title='100% revisado', importance=2, urgency=-2, quadrant='Agende'),
+    ]
+
+
+@pytest.fixture(params=["planilha", "sqlite", "cache"])
+def storage(request, sheet, sqlite_backend, make_storage):
+    if request.param == "planilha":
+        return make_storage(sheet, cached=False)
+    return make_storage(sqlite_backend, cached=request.param == "cache")
+
+
+def _query(storage, **filters) -> tuple[list[str], int]:
+    tasks, total = storage.query_tasks(**filters)
+    return [task['id'] for task in tasks], total
+
+
+@pytest.mark.parametrize("filters, expected", [
+    ({}, (['a', 'b', 'c', 'e', 'f', 'g'], 6)),
+    ({'quadrant': 'Agende'}, (['b', 'g'], 2)),
+    ({'tag': 'Trabalho'}, (['b', 'c', 'e'], 3)),
+    ({'tag': 'Trabalho', 'urgent': True}, (['c', 'e'], 2)),
+    ({'due_from': '2026-10-19', 'due_to': '2026-10-31'}, (['a', 'b'], 2)),
+    ({'due_to': '2026-10-31'}, (['a', 'b'], 2)),
+    ({'search': 'CONT'}, (['a', 'e'], 2)),
+    ({'search': '100%'}, (['g'], 1)),
+    ({'tag': 'Inexistente'}, ([], 0)),
+    # Lista do dia: vencidas ou para hoje, mais as urgentes sem prazo
+    ({'due_to': '2026-10-20', 'include_urgent': True}, (['a', 'c', 'e'], 3)),
+    ({'due_to': '2026-10-20', 'include_urgent': True, 'tag': 'Trabalho'}, (['c', 'e'], 2)),
+])
+def test_filtros(storage, filters, expected):
+    assert _query(storage, **filters) == expected
+
+
+def test_paginas_trazem_so_a_fatia_pedida_e_o_total(storage):
+    assert _query(storage, offset=0, limit=4) == (['a', 'b', 'c', 'e'], 6)
+    assert _query(storage, offset=4, limit=4) == (['f', 'g'], 6)
+    assert _query(storage, tag='Casa', offset=1, limit=1) == (['f'], 2)
@@ -0,0 +1,88 @@
+# tests/test_scheduler.py
+# Agendador das chamadas ao Sheets: cota por minuto, novas tentativas e prioridade.
+
+import threading
+import time
+
+import pytest
+
+import utils
+from conftest import api_error
+
+
+def _failing(*errors):
+    """Função que lança os erros dados, um por chamada, e depois devolve 'ok'."""
+    pending = list(errors)
+
+    def call():
+        if pending:
+            raise pending.pop(0)
+        return 'ok'
+    return call
+
+
+def test_erro_de_cota_ou_do_servidor_e_repetido(monkeypatch):
+    monkeypatch.setattr(utils.time, 'sleep', lambda seconds: None)
+    scheduler = utils.ApiScheduler(quota_per_minute=6000)
+
+    assert scheduler.call(_failing(api_error(429), api_error(503))) == 'ok'
+
+    metrics = scheduler.metrics()
+    assert metrics['retries'] == 2
+    assert metrics['calls'] == 1
+    assert metrics['errors'] == 0
+
+
+def test_chamada_nao_idempotente_so_e_repetida_no_erro_de_cota(monkeypatch):
+    monkeypatch.setattr(utils.time, 'sleep', lambda seconds: None)
+    scheduler = utils.ApiScheduler(quota_per_minute=6000)
+
+    # 429: o pedido foi recusado antes de ser processado, repetir é seguro
+    assert scheduler.call(_failing(api_error(429)), idempotent=False) == 'ok'
+    # 5xx: o append pode ter sido aplicado, então o erro sobe em vez de duplicar a linha
+    with pytest.raises(utils.gspread.exceptions.APIError):
+        scheduler.call(_failing(api_error(503)), idempotent=False)
+    assert scheduler.metrics()['retries'] == 1
+    assert scheduler.metrics()['errors'] == 1
+
+
+@pytest.mark.parametrize("error", [api_error(400), ValueError("sem relação com a API")])
+def test_outros_erros_sobem_na_primeira_vez(error):
+    scheduler = utils.ApiScheduler(quota_per_minute=6000)
+
+    with pytest.raises(type(error)):
+        scheduler.call(_failing(error))
+    assert scheduler.metrics()['retries'] == 0
+    assert scheduler.metrics()['errors'] == 1
+
+
+def test_rajada_acima_da_cota_espera_a_reposicao():
+    # Duas fichas de rajada e reposição de ~10 por segundo
+    scheduler = utils.ApiScheduler(quota_per_minute=602, burst=2)
+    started = time.monotonic()
+
+    for _ in range(4):
+        scheduler.call(lambda: None)
+
+    assert time.monotonic() - started >= 0.15
+    assert scheduler.metrics()['throttled_seconds'] >= 0.15
+
+
+def test_leitura_da_interface_passa_na_frente_da_gravacao_de_fundo():
+    scheduler = utils.ApiScheduler(quota_per_minute=241, burst=1)
+    order = []
+    scheduler.call(lambda: None)  # esvazia o balde
+
+    def background():
+        with utils.api_priority(utils.PRIORITY_BACKGROUND):
+            scheduler.call(order.append, 'fundo')
+
+    worker = threading.Thread(target=background)
+    worker.start()
+    # A gravação de fundo chega primeiro e fica esperando a ficha
+    while not scheduler.metrics()['queue_depth']:
+        time.sleep(0.001)
+    scheduler.call(order.append, 'interface')
+    worker.join()
+
+    assert order == ['interface', 'fundo']
@@ -0,0 +1,74 @@
+# tests/test_sheets_backend.py
+# SheetsBackend sobre a planilha falsa: edições só nas células alteradas, inclusões no fim da aba
+# e remoção de tags sem depender de números de linha.
+
+from conftest import make_task, sheet_rows
+
+
+def test_edicao_envia_so_as_celulas_alteradas(sheet, sheets_backend):
+    backend = sheets_backend(sheet)
+    backend.read_tasks()
+    sheet.calls_by_method.clear()
+
+    backend.update_tasks({'t2': {'title': 'Alterada', 'status': 'done'}, 't4': {'urgency': -3}})
+
+    # Mais a conferência dos ids das linhas e a troca do marcador de revisão na aba 'Meta'
+    assert sheet.calls_by_method == {'batch_get': 1, 'batch_update': 1, 'update': 1}
+    rows = {row['id']: row for row in sheet_rows(sheet)}
+    assert (rows['t2']['title'], rows['t2']['status']) == ('Alterada', 'done')
+    assert rows['t4']['urgency'] == '-3'
+    assert (rows['t3']['title'], rows['t3']['status']) == ('Tarefa t3', 'pending')
+
+
+def test_inclusao_acrescenta_linhas_sem_reescrever_a_aba(sheet, sheets_backend, tasks):
+    backend = sheets_backend(sheet)
+    backend.read_tasks()
+    sheet.calls_by_method.clear()
+
+    backend.insert_tasks([make_task('n1', title='Nova 1'), make_task('n2', title='Nova 2')])
+    backend.update_tasks({'n2': {'title': 'Renomeada'}})
+
+    assert sheet.calls_by_method == {'append_rows': 1, 'batch_get': 1, 'batch_update': 1, 'update': 2}
+    assert [row['title'] for row in sheet_rows(sheet)[len(tasks):]] == ['Nova 1', 'Renomeada']
+
+
+def test_storage_com_gravacao_adiada_na_planilha(sheet, make_storage, tasks):
+    storage = make_storage(sheet)
+
+    storage.mark_done('t1')
+    storage.add_task("Nova", "", 3, -2, "2026-11-05", ["Casa"])
+    storage.add_tag("Lazer")
+    assert storage.flush(5)
+
+    rows = sheet_rows(sheet)
+    assert len(rows) == len(tasks) + 1
+    assert rows[1]['status'] == 'done'
+    assert (rows[-1]['title'], rows[-1]['quadrant'], rows[-1]['tags']) == ("Nova", "Agende", "Casa")
+    assert [row['tag_name'] for row in sheet_rows(sheet, "Tags")][-1] == "Lazer"
+
+
+def test_remocao_de_tag_nao_depende_da_linha_lida_antes(sheet, sheets_backend):
+    first, second = sheets_backend(sheet), sheets_backend(sheet)
+    sheet._worksheets["Tags"].data.append(["Casa"])
+    second.list_tags()
+
+    # Outra sessão apaga uma tag de cima, e todas as linhas abaixo sobem
+    assert first.delete_tag("Casa") is True
+    sheet.calls_by_method.clear()
+    assert second.delete_tag("Estudo") is True
+    assert second.delete_tag("Inexistente") is False
+
+    assert [row['tag_name'] for row in sheet_rows(sheet, "Tags")] == ["Trabalho"]
+    assert sheet.calls_by_method == {'batch_update': 2}
+    # A próxima tag entra logo depois da última, sem buracos no meio da coluna
+    second.add_tag("Lazer")
+    assert [row['tag_name'] for row in sheet_rows(sheet, "Tags")] == ["Trabalho", "Lazer"]
+
+
+def test_conferencia_de_ids_rele_a_coluna_na_planilha(sheet, sheets_backend, tasks):
+    backend = sheets_backend(sheet)
+    backend.read_tasks()
+    # Linha gravada por um append cuja resposta se perdeu: o mapa de linhas não sabe dela
+    sheet._worksheets["Página1"].data.append([make_task('perdida')[col] for col in sheet_rows(sheet)[0]])
+
+    assert backend.existing_task_ids(['t1', 'perdida', 'inexistente']) == {'t1', 'perdida'}
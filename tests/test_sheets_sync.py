@@ -0,0 +1,120 @@
+# tests/test_sheets_sync.py
+# Sincronização incremental pelo marcador de revisão e controle de concorrência entre réplicas.
+
+import pytest
+
+from conftest import make_task, sheet_rows
+from utils import EXPECTED_VERSION
+
+
+def _calls(sheet, method: str) -> int:
+    return sheet.calls_by_method.get(method, 0)
+
+
+# --- SINCRONIZAÇÃO INCREMENTAL ---
+def test_releitura_com_marcador_igual_nao_baixa_a_aba(sheet, sheets_backend):
+    backend = sheets_backend(sheet)
+    first = backend.read_tasks()
+    calls, full_reads = sheet.calls, _calls(sheet, 'get_all_values')
+
+    again = backend.read_tasks()
+
+    assert again is first
+    assert _calls(sheet, 'get_all_values') == full_reads
+    # Só a leitura do marcador na aba 'Meta'
+    assert sheet.calls == calls + 1
+
+
+def test_releitura_baixa_so_as_linhas_que_outra_replica_alterou(sheet, sheets_backend):
+    reader, writer = sheets_backend(sheet), sheets_backend(sheet)
+    reader.read_tasks()
+    writer.update_tasks({'t2': {'title': 'Alterada', 'version': 2, EXPECTED_VERSION: 1}})
+    writer.insert_tasks([make_task('t9', title='Nova')])
+    full_reads = _calls(sheet, 'get_all_values')
+
+    df = reader.read_tasks().set_index('id')
+
+    assert _calls(sheet, 'get_all_values') == full_reads
+    assert df.loc['t2', 'title'] == 'Alterada'
+    assert df.loc['t2', 'version'] == 2
+    assert df.loc['t9', 'title'] == 'Nova'
+    assert len(df) == 7
+
+
+def test_troca_de_layout_forca_leitura_completa(sheet, sheets_backend, tasks):
+    reader, writer = sheets_backend(sheet), sheets_backend(sheet)
+    reader.read_tasks()
+    writer.update_tasks({'t0': {'status': 'done', 'version': 2, EXPECTED_VERSION: 1}})
+    writer.archive_done_tasks()
+    full_reads = _calls(sheet, 'get_all_values')
+
+    df = reader.read_tasks()
+
+    assert _calls(sheet, 'get_all_values') == full_reads + 1
+    assert list(df['id']) == [task['id'] for task in tasks[1:]]
+
+
+# --- CONFLITOS ENTRE RÉPLICAS ---
+def test_edicao_baseada_em_versao_antiga_e_recusada(sheet, sheets_backend):
+    first, second = sheets_backend(sheet), sheets_backend(sheet)
+
+    assert first.update_tasks({'t1': {'title': 'Primeira', 'version': 2, EXPECTED_VERSION: 1}}) == {'t1': True}
+    assert second.update_tasks({'t1': {'title': 'Segunda', 'version': 2, EXPECTED_VERSION: 1}}) == {'t1': False}
+    assert second.get_task('t1')['title'] == 'Primeira'
+
+
+def test_conflito_com_gravacao_adiada_descarta_a_edicao_e_recarrega(sheet, make_storage):
+    first, second = make_storage(sheet), make_storage(sheet)
+    first.list_tasks()
+    second.list_tasks()
+
+    first.update_task('t1', {'title': 'Primeira'})
+    assert first.flush(5)
+    # A segunda réplica ainda vê a versão 1 no cache
+    second.update_task('t1', {'title': 'Segunda'})
+    assert second.flush(5)
+
+    assert second.sync_status()['conflicts'] == 1
+    assert second.get_task('t1')['title'] == 'Primeira'
+    assert sheet_rows(sheet)[1]['title'] == 'Primeira'
+
+
+def test_versao_exibida_no_formulario_desatualizada_e_recusada(sheet, make_storage):
+    storage = make_storage(sheet, cached=False)
+    storage.update_task('t3', {'title': 'Outra sessão'})
+
+    assert storage.update_task('t3', {'title': 'Formulário antigo'}, expected_version=1) is False
+    assert storage.get_task('t3')['title'] == 'Outra sessão'
+
+
+def test_linhas_deslocadas_por_fora_nao_recebem_a_edicao(sheet, sheets_backend):
+    backend = sheets_backend(sheet)
+    backend.read_tasks()
+    # Alguém inclui uma linha no topo da aba à mão: todas as tarefas descem uma linha
+    sheet._worksheets["Página1"].data.insert(1, [str(value) for value in make_task('manual').values()])
+
+    result = backend.update_tasks({'t3': {'title': 'Editada', 'version': 2, EXPECTED_VERSION: 1}})
+
+    rows = {row['id']: row for row in sheet_rows(sheet)}
+    assert result == {'t3': True}
+    assert rows['t3']['title'] == 'Editada'
+    assert rows['t2']['title'] == 'Tarefa t2'
+
+
+def test_falha_na_regravacao_de_planilha_antiga_nao_altera_a_replica(sheet, sheets_backend, monkeypatch):
+    # Planilha de antes das colunas updated_at/version: a primeira edição regrava a aba inteira
+    worksheet = sheet._worksheets["Página1"]
+    worksheet.data = [row[:-2] for row in worksheet.data]
+    backend = sheets_backend(sheet)
+    replica = backend.read_tasks()
+
+    def offline(df):
+        raise ConnectionError("rede fora")
+
+    monkeypatch.setattr(backend, 'write_tasks', offline)
+    with pytest.raises(ConnectionError):
+        backend.update_tasks({'t1': {'title': 'Não gravada', 'version': 2}})
+
+    assert replica.set_index('id').loc['t1', 'title'] == 'Tarefa t1'
+    assert backend.read_tasks().set_index('id').loc['t1', 'title'] == 'Tarefa t1'
+    assert sheet_rows(sheet)[1]['title'] == 'Tarefa t1'
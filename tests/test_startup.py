@@ -0,0 +1,24 @@
+# tests/test_startup.py
+# Inicialização preguiçosa: importações pesadas e abas da planilha só quando alguém as usa.
+
+import subprocess
+import sys
+
+from conftest import ROOT
+
+
+def test_importar_utils_nao_carrega_o_gtts_nem_o_gspread_dataframe():
+    code = "import sys, utils; print(sorted(m for m in ('gtts', 'gspread_dataframe') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "[]"
+
+
+def test_backend_so_abre_as_abas_que_usa(sheet, sheets_backend):
+    backend = sheets_backend(sheet)
+    assert sheet.calls == 0
+
+    backend.list_tags()
+
+    assert sheet.calls_by_method['worksheet'] == 1
+    assert 'get_all_values' not in sheet.calls_by_method
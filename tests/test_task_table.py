@@ -0,0 +1,55 @@
+# tests/test_task_table.py
+# Tabela de tarefas em tipos compactos e classificação vetorizada dos quadrantes.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils
+from conftest import make_task
+
+
+def test_classificacao_vetorizada_cobre_toda_a_grade():
+    importance, urgency = np.meshgrid(np.arange(-5, 6), np.arange(-5, 6))
+
+    quadrants = utils.classify_quadrants(importance.ravel(), urgency.ravel())
+
+    assert list(quadrants) == [utils.Storage._get_quadrant(i, u) for i, u in zip(importance.ravel(), urgency.ravel())]
+
+
+def test_tabela_usa_tipos_compactos_e_limita_as_notas():
+    df = utils._normalize_tasks_df(pd.DataFrame([
+        make_task('a', importance='9', urgency=-7),
+        make_task('b', importance='x', urgency=3, tags='Casa'),
+    ]))
+
+    assert df['importance'].dtype == 'int8'
+    assert list(df['importance']) == [5, 0]
+    assert list(df['urgency']) == [-5, 3]
+    assert all(isinstance(df[col].dtype, pd.CategoricalDtype) for col in utils.CATEGORY_COLUMNS)
+
+    utils._set_cell(df, 1, 'tags', 'Nova tag')
+    assert df['tags'].iloc[1] == 'Nova tag'
+
+
+@pytest.fixture
+def tasks():
+    return [
+        make_task('a', importance=3, urgency=-1, quadrant='Faça Primeiro'),
+        make_task('b', importance=2, urgency=2, quadrant='Faça Primeiro'),
+        make_task('c', importance=-2, urgency=4, quadrant='Elimine'),
+    ]
+
+
+def test_recalculo_grava_so_os_quadrantes_errados(sqlite_backend, make_storage, monkeypatch):
+    storage = make_storage(sqlite_backend, cached=False)
+    writes = []
+    update_tasks = sqlite_backend.update_tasks
+    monkeypatch.setattr(sqlite_backend, 'update_tasks', lambda updates: writes.append(updates) or update_tasks(updates))
+
+    assert storage.recompute_quadrants() == 2
+
+    assert [{task_id: fields['quadrant'] for task_id, fields in batch.items()} for batch in writes] == [
+        {'a': 'Agende', 'c': 'Delegue'},
+    ]
+    assert storage.recompute_quadrants() == 0
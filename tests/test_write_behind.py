@@ -0,0 +1,211 @@
+# tests/test_write_behind.py
+# Fila de gravação adiada: fusão de edições, novas tentativas, erros permanentes e o cache por cima dela.
+
+import pytest
+
+import utils
+from conftest import api_error, make_task
+from utils import EXPECTED_VERSION
+
+
+class RecordingBackend(utils.SQLiteBackend):
+    """SQLite em memória que registra os lotes recebidos e pode falhar sob comando."""
+    is_remote = True
+
+    def __init__(self, tasks: list[dict], failures=(), reject: dict | None = None, lost_replies=()):
+        super().__init__(":memory:")
+        super().insert_tasks(tasks)
+        self.calls = []
+        # Erros lançados, um por chamada, antes de gravar qualquer coisa
+        self.failures = list(failures)
+        # {id: erro} lançado sempre que um lote contém a tarefa
+        self.reject = reject or {}
+        # Erros lançados depois de gravar as inclusões, como uma resposta perdida no caminho
+        self.lost_replies = list(lost_replies)
+        self.after_read = None
+
+    def _check(self, task_ids):
+        if self.failures:
+            raise self.failures.pop(0)
+        for task_id in task_ids:
+            if task_id in self.reject:
+                raise self.reject[task_id]
+
+    def insert_tasks(self, tasks: list[dict]):
+        self._check([task['id'] for task in tasks])
+        self.calls.append(('insert', [dict(task) for task in tasks]))
+        super().insert_tasks(tasks)
+        if self.lost_replies:
+            raise self.lost_replies.pop(0)
+
+    def update_tasks(self, updates: dict) -> dict:
+        self._check(list(updates))
+        self.calls.append(('update', {task_id: dict(fields) for task_id, fields in updates.items()}))
+        return super().update_tasks(updates)
+
+    def read_tasks(self):
+        df = super().read_tasks()
+        if self.after_read is not None:
+            hook, self.after_read = self.after_read, None
+            hook()
+        return df
+
+
+@pytest.fixture
+def tasks():
+    return [make_task(f"t{i}") for i in range(3)]
+
+
+def test_edicoes_seguidas_da_mesma_tarefa_viram_uma_gravacao(tasks):
+    backend = RecordingBackend(tasks)
+    queue = utils.WriteBehindQueue(backend, interval=0.05)
+    # Segura a thread de fundo enquanto as edições chegam
+    with queue._cond:
+        queue.submit('t1', 'update', {'title': 'a', 'version': 2, EXPECTED_VERSION: 1})
+        queue.submit('t1', 'update', {'title': 'b', 'version': 3, EXPECTED_VERSION: 2})
+        queue.submit('t1', 'update', {'status': 'done', 'version': 4, EXPECTED_VERSION: 3})
+
+    assert queue.flush(5)
+    assert backend.calls == [('update', {'t1': {'title': 'b', 'status': 'done', 'version': 4, EXPECTED_VERSION: 1}})]
+    assert backend.get_task('t1')['status'] == 'done'
+    assert queue.conflicts == 0
+
+
+def test_edicao_de_tarefa_ainda_nao_gravada_entra_na_inclusao(tasks):
+    backend = RecordingBackend(tasks)
+    queue = utils.WriteBehindQueue(backend, interval=0.05)
+    with queue._cond:
+        queue.submit('novo', 'insert', make_task('novo', title='Nova'))
+        queue.submit('novo', 'update', {'title': 'Renomeada', 'version': 2, EXPECTED_VERSION: 1})
+
+    assert queue.flush(5)
+    assert [kind for kind, _ in backend.calls] == ['insert']
+    assert backend.get_task('novo')['title'] == 'Renomeada'
+
+
+def test_lote_com_falha_temporaria_e_reenviado(tasks):
+    backend = RecordingBackend(tasks, failures=[ConnectionError("rede fora"), api_error(503)])
+    queue = utils.WriteBehindQueue(backend, interval=0.01)
+    queue.submit('t0', 'update', {'title': 'Depois da falha', 'version': 2, EXPECTED_VERSION: 1})
+
+    assert queue.flush(5)
+    assert queue.failures == 2
+    assert queue.last_error is None
+    assert queue.discarded == 0
+    assert backend.get_task('t0')['title'] == 'Depois da falha'
+
+
+def test_inclusao_gravada_antes_da_falha_nao_e_repetida(tasks):
+    backend = RecordingBackend(tasks, lost_replies=[api_error(503)])
+    queue = utils.WriteBehindQueue(backend, interval=0.01)
+    with queue._cond:
+        queue.submit('novo', 'insert', make_task('novo', title='Nova'))
+        queue.submit('novo', 'update', {'title': 'Renomeada', 'version': 2, EXPECTED_VERSION: 1})
+
+    assert queue.flush(5)
+    assert queue.failures == 1
+    # O reenvio confere o id no backend e só regrava os campos da linha que já estava lá
+    assert [kind for kind, _ in backend.calls] == ['insert', 'update']
+    assert list(backend.read_tasks()['id']).count('novo') == 1
+    assert backend.get_task('novo')['title'] == 'Renomeada'
+
+
+@pytest.mark.parametrize("error", [api_error(400), ValueError("dado inválido")])
+def test_erro_permanente_descarta_so_a_operacao_culpada(tasks, error):
+    backend = RecordingBackend(tasks, reject={'t2': error})
+    queue = utils.WriteBehindQueue(backend, interval=0.05)
+    discarded = []
+    queue.on_discard = discarded.extend
+    with queue._cond:
+        queue.submit('t1', 'update', {'title': 'Boa', 'version': 2, EXPECTED_VERSION: 1})
+        queue.submit('t2', 'update', {'title': 'Ruim', 'version': 2, EXPECTED_VERSION: 1})
+
+    assert queue.flush(5)
+    assert queue.discarded == 1
+    assert discarded == ['t2']
+    assert queue.pending_count() == 0
+    assert backend.get_task('t1')['title'] == 'Boa'
+    assert backend.get_task('t2')['title'] == 'Tarefa t2'
+
+
+def test_mudanca_aparece_no_cache_antes_de_chegar_ao_backend(tasks, make_storage):
+    backend = RecordingBackend(tasks)
+    storage = make_storage(backend)
+    storage.list_tasks()
+
+    with storage.write_queue._cond:
+        storage.mark_done('t2')
+        storage.add_task("Nova", "", 2, 3, None, [])
+        assert {task['id']: task['status'] for task in storage.list_tasks()}['t2'] == 'done'
+        assert "Nova" in {task['title'] for task in storage.list_tasks()}
+        assert backend.calls == []
+        assert storage.sync_status()['pending'] == 2
+
+    assert storage.flush(5)
+    assert backend.get_task('t2')['status'] == 'done'
+    assert len(backend.list_tasks()) == len(tasks) + 1
+
+
+def test_falhas_seguidas_esperam_mesmo_sem_intervalo(tasks):
+    backend = RecordingBackend(tasks, failures=[ConnectionError("rede fora")] * 1000)
+    queue = utils.WriteBehindQueue(backend, interval=0)
+    queue.submit('t0', 'update', {'title': 'Depois da falha', 'version': 2, EXPECTED_VERSION: 1})
+
+    assert queue.flush(0.35) is False
+    # Esperas de 0,1 s e 0,2 s: três tentativas, não centenas
+    assert queue.failures <= 4
+    backend.failures.clear()
+    assert queue.flush(5)
+
+
+def test_flush_desiste_depois_do_tempo_limite(tasks, make_storage):
+    backend = RecordingBackend(tasks, failures=[ConnectionError("rede fora")] * 1000)
+    storage = make_storage(backend)
+    storage.flush_timeout = 0.2
+    storage.mark_done('t0')
+
+    assert storage.flush() is False
+    # Manutenções que precisam da fila vazia não mexem no backend
+    assert storage.compact() is None
+    assert storage.apply_deadline_urgency() is None
+    assert storage.sync_status()['pending'] == 1
+    # Com a rede de volta, a fila esvazia sozinha
+    backend.failures.clear()
+    assert storage.flush(5)
+    assert backend.get_task('t0')['status'] == 'done'
+
+
+def test_reset_importacao_e_exportacao_esperam_a_fila(tasks, make_storage, tmp_path):
+    backend = RecordingBackend(tasks, failures=[ConnectionError("rede fora")] * 1000)
+    storage = make_storage(backend)
+    storage.flush_timeout = 0.2
+    storage.add_task("Na fila", "", 1, 1, None, [])
+    source = tmp_path / "entrada.csv"
+    source.write_text("title\nImportada\n", encoding="utf-8")
+    destination = tmp_path / "saida.csv"
+
+    assert storage.reset() is False
+    assert storage.import_tasks(source) is None
+    assert storage.export_tasks(destination) is None
+    assert not destination.exists()
+    assert len(backend.read_tasks()) == len(tasks)
+    # Com a rede de volta, o reset apaga também a inclusão que estava na fila
+    backend.failures.clear()
+    assert storage.reset() is True
+    assert storage.flush(5)
+    assert backend.read_tasks().empty
+
+
+def test_recarga_do_cache_durante_um_envio_nao_perde_a_mudanca(tasks):
+    backend = RecordingBackend(tasks)
+    snapshot = utils.SharedSnapshot(backend)
+    queue = utils.WriteBehindQueue(backend, interval=60)
+    snapshot.pending_ops = queue.pending_ops
+    queue.submit('t1', 'update', {'status': 'done', 'version': 2, EXPECTED_VERSION: 1})
+    # O lote é gravado depois de o backend devolver a tabela antiga e antes de a fila ser consultada
+    backend.after_read = lambda: queue.flush(5)
+
+    df = snapshot.read_tasks().set_index('id')
+
+    assert queue.pending_count() == 0
+    assert df.loc['t1', 'status'] == 'done'
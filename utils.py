@@ -3,67 +3,2122 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import gspread
-from gspread_dataframe import set_with_dataframe
 import uuid
-from datetime import datetime
+from datetime import date, datetime, timedelta, timezone
 import json
 import base64
-
-# --- Imports para a IA (agora apenas para a função de voz) ---
-from gtts import gTTS
+import atexit
+import os
+import sqlite3
+import threading
+import re
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+import bisect
+import heapq
+import itertools
+import random
+from contextlib import contextmanager
+import time
+import functools
+import logging
+import csv
 import io
+# gTTS, gspread_dataframe (e o plotly, nas páginas) são importados só no primeiro uso:
+# páginas que não gravam a aba inteira nem geram áudio não pagam esse custo na abertura.
+
+TASK_COLUMNS = ['id', 'title', 'description', 'importance', 'urgency', 'due_date', 'tags', 'quadrant', 'status', 'updated_at', 'version']
+# Chave interna de uma edição com a versão em que ela se baseou (controle de concorrência otimista);
+# nunca é gravada como coluna.
+EXPECTED_VERSION = '_expected_version'
+
+
+def get_config(key: str, default=None):
+    """Lê uma opção de configuração do st.secrets, com fallback para variáveis de ambiente."""
+    try:
+        if key in st.secrets:
+            return st.secrets[key]
+    except FileNotFoundError:
+        pass
+    return os.environ.get(key, default)
+
+
+def get_config_flag(key: str, default: bool = False) -> bool:
+    """Lê uma opção booleana ('true'/'false', '1'/'0', 'on'/'off')."""
+    value = get_config(key, default)
+    if isinstance(value, str):
+        return value.strip().lower() not in ('', '0', 'false', 'no', 'off')
+    return bool(value)
+
+
+# Tipos compactos da tabela de tarefas: notas de -5 a 5 cabem em int8, e colunas
+# com poucos valores distintos (quadrante, status, combinações de tags) viram category.
+SCORE_COLUMNS = ['importance', 'urgency']
+CATEGORY_COLUMNS = ['quadrant', 'status', 'tags']
+QUADRANTS = ["Faça Primeiro", "Agende", "Delegue", "Elimine"]
+
+
+def _normalize_tasks_df(df: pd.DataFrame) -> pd.DataFrame:
+    """Garante todas as colunas de tarefa e converte para os tipos compactos."""
+    for col in TASK_COLUMNS:
+        if col not in df.columns: df[col] = pd.Series(dtype='object')
+    for col in SCORE_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).clip(-5, 5).astype('int8')
+    for col in CATEGORY_COLUMNS:
+        df[col] = df[col].astype('category')
+    df['version'] = pd.to_numeric(df['version'], errors='coerce').fillna(0).astype('int64')
+    return df[TASK_COLUMNS]
+
+
+def _now_stamp() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def classify_quadrants(importance, urgency) -> pd.Categorical:
+    """Classifica de uma vez só vetores de importância/urgência nos quadrantes de Eisenhower."""
+    important = np.asarray(importance) > 0
+    urgent = np.asarray(urgency) > 0
+    codes = np.where(important, np.where(urgent, 0, 1), np.where(urgent, 2, 3)).astype('int8')
+    return pd.Categorical.from_codes(codes, categories=QUADRANTS)
+
+
+def _set_cell(df: pd.DataFrame, position: int, column: str, value):
+    """Atribui uma célula pela posição, incluindo a categoria nova quando a coluna é category."""
+    if isinstance(df[column].dtype, pd.CategoricalDtype) and value not in df[column].cat.categories:
+        df[column] = df[column].cat.add_categories([value])
+    df.iat[position, df.columns.get_loc(column)] = value
+
+
+def _cell_value(value):
+    """Converte um valor do pandas/numpy para algo serializável em uma célula da planilha."""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ''
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def _apply_pending_ops(df: pd.DataFrame, ops: list) -> pd.DataFrame:
+    """Aplica sobre uma cópia do DataFrame as mutações ainda não gravadas no backend."""
+    df = df.copy()
+    positions = {task_id: pos for pos, task_id in enumerate(df['id'].astype(str))}
+    new_rows = {}
+    for task_id, op in ops:
+        if task_id in positions:
+            for key, value in op['fields'].items():
+                if key in df.columns:
+                    _set_cell(df, positions[task_id], key, value)
+        elif task_id in new_rows:
+            new_rows[task_id].update(op['fields'])
+        elif op['kind'] == 'insert':
+            new_rows[task_id] = dict(op['fields'])
+    if new_rows:
+        df = _normalize_tasks_df(pd.concat([df, pd.DataFrame(list(new_rows.values()))], ignore_index=True))
+    return df
+
+
+def _split_tags(tags_str) -> list[str]:
+    """Converte a string de tags separadas por vírgula em uma lista."""
+    if not tags_str or not isinstance(tags_str, str):
+        return []
+    return [tag.strip() for tag in tags_str.split(',') if tag.strip()]
+
+
+# --- INSTRUMENTAÇÃO ---
+# Tempos e contadores baratos (um perf_counter e uma soma em dicionário por evento),
+# pensados para ficar ligados em produção. São acumulados por processo (METRICS) e
+# por execução do script (RerunTrace). INSTRUMENTATION = false desliga tudo; a opção
+# é lida em begin_rerun_trace, já que st.secrets não pode ser lido antes do set_page_config.
+# Os traces saem no logger "produtividade" em nível INFO: só aparecem com LOG_LEVEL = INFO.
+INSTRUMENTATION = True
+logger = logging.getLogger("produtividade")
+_trace_context = threading.local()
+
+
+class Metrics:
+    """Contadores e tempos acumulados pelo processo, exportáveis no formato texto do Prometheus."""
 
-class Storage:
     def __init__(self):
-        self.spreadsheet = self._connect_spreadsheet()
-        self.tasks_worksheet = self.spreadsheet.worksheet("Página1")
-        self.tags_worksheet = self._get_or_create_worksheet("Tags")
-        self.columns = ['id', 'title', 'description', 'importance', 'urgency', 'due_date', 'tags', 'quadrant', 'status']
+        self.counters = {}
+        # nome -> [chamadas, segundos somados, maior duração]
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def count(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                self.timings[name] = [1, seconds, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+                timing[2] = max(timing[2], seconds)
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            counters = sorted(self.counters.items())
+            timings = sorted((name, list(values)) for name, values in self.timings.items())
+        lines = ['# TYPE produtividade_events_total counter']
+        lines += [f'produtividade_events_total{{event="{name}"}} {value}' for name, value in counters]
+        lines.append('# TYPE produtividade_duration_seconds summary')
+        for name, (count, total, _) in timings:
+            lines.append(f'produtividade_duration_seconds_count{{op="{name}"}} {count}')
+            lines.append(f'produtividade_duration_seconds_sum{{op="{name}"}} {total:.6f}')
+        lines.append('# TYPE produtividade_duration_seconds_max gauge')
+        lines += [f'produtividade_duration_seconds_max{{op="{name}"}} {maximum:.6f}' for name, (_, _, maximum) in timings]
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = Metrics()
+
+
+class RerunTrace:
+    """Resumo de uma execução do script: chamadas remotas, linhas lidas/gravadas,
+    acertos de cache e tempo por fase.
+
+    O tempo de cada fase é exclusivo (descontadas as fases internas), então a
+    soma das fases mais o tempo do próprio script (widgets) dá o total.
+    """
+
+    def __init__(self, page: str):
+        self.page = page
+        self.started = time.perf_counter()
+        self.finished = None
+        self.counters = {}
+        # nome -> [chamadas, segundos exclusivos]
+        self.phases = {}
+
+    def count(self, name: str, value: float = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_phase(self, name: str, seconds: float):
+        phase = self.phases.setdefault(name, [0, 0.0])
+        phase[0] += 1
+        phase[1] += seconds
+
+    def finish(self):
+        if self.finished is not None:
+            return
+        self.finished = time.perf_counter()
+        METRICS.observe(f"rerun.{self.page}", self.finished - self.started)
+        logger.info(json.dumps({'event': 'rerun', **self.summary()}, ensure_ascii=False))
+
+    def summary(self) -> dict:
+        total = (self.finished or time.perf_counter()) - self.started
+        measured = sum(seconds for _, seconds in self.phases.values())
+        return {
+            'page': self.page,
+            'total_ms': round(total * 1000, 1),
+            'script_ms': round(max(total - measured, 0) * 1000, 1),
+            'counters': dict(self.counters),
+            'phases': {
+                name: {'calls': calls, 'ms': round(seconds * 1000, 1)}
+                for name, (calls, seconds) in sorted(self.phases.items(), key=lambda item: -item[1][1])
+            },
+        }
+
+
+def record(name: str, value: float = 1):
+    """Soma `value` ao contador do processo e ao trace da execução atual."""
+    if not INSTRUMENTATION:
+        return
+    METRICS.count(name, value)
+    trace = getattr(_trace_context, 'trace', None)
+    if trace is not None:
+        trace.count(name, value)
+
+
+@contextmanager
+def timed(name: str):
+    """Mede o bloco como uma fase; fases aninhadas descontam seu tempo da fase de fora."""
+    if not INSTRUMENTATION:
+        yield
+        return
+    spans = getattr(_trace_context, 'spans', None)
+    if spans is None:
+        spans = _trace_context.spans = []
+    spans.append(0.0)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        inner = spans.pop()
+        if spans:
+            spans[-1] += elapsed
+        METRICS.observe(name, elapsed)
+        trace = getattr(_trace_context, 'trace', None)
+        if trace is not None:
+            trace.add_phase(name, elapsed - inner)
+
+
+def instrumented(fn):
+    """Decorador: mede cada chamada de `fn` como a fase '<Classe>.<método>'."""
+    name = fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not INSTRUMENTATION:
+            return fn(*args, **kwargs)
+        with timed(name):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def configure_logging():
+    """Ajusta o logger "produtividade" a LOG_LEVEL (padrão WARNING) e, na primeira vez, o liga ao stderr."""
+    name = str(get_config("LOG_LEVEL", "WARNING")).strip().upper()
+    level = logging.getLevelNamesMapping().get(name)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(level if level is not None else logging.WARNING)
+    if level is None:
+        logger.warning("LOG_LEVEL desconhecido: '%s'; usando WARNING.", name)
+
+
+def begin_rerun_trace(page: str) -> RerunTrace | None:
+    """Abre o trace desta execução da página e fecha o da anterior, caso um st.rerun o tenha interrompido."""
+    global INSTRUMENTATION
+    configure_logging()
+    INSTRUMENTATION = get_config_flag("INSTRUMENTATION", True)
+    if not INSTRUMENTATION:
+        return None
+    previous = st.session_state.get('_rerun_trace')
+    if previous is not None:
+        previous.finish()
+        st.session_state['_last_rerun_trace'] = previous.summary()
+    trace = RerunTrace(page)
+    st.session_state['_rerun_trace'] = trace
+    _trace_context.trace = trace
+    _trace_context.spans = []
+    return trace
+
+
+def finish_rerun_trace() -> dict | None:
+    """Fecha o trace da execução atual (registrando-o no log) e devolve o resumo."""
+    trace = getattr(_trace_context, 'trace', None)
+    if trace is None:
+        return None
+    trace.finish()
+    _trace_context.trace = None
+    return trace.summary()
+
+
+# --- ÍNDICE INVERTIDO DE TAGS ---
+class TagIndex:
+    """Índice invertido tag -> ids das tarefas pendentes que usam a tag.
+
+    É construído uma vez a partir da tabela de tarefas e depois atualizado
+    tarefa a tarefa, sem precisar reler ou varrer todas as tarefas.
+    """
+
+    def __init__(self):
+        self._tasks_by_tag = {}
+        self._tags_by_task = {}
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame) -> "TagIndex":
+        index = cls()
+        pending = df[df['status'] != 'done']
+        for task_id, tags_str in zip(pending['id'].astype(str), pending['tags']):
+            index.set_task(task_id, _split_tags(tags_str))
+        return index
+
+    def set_task(self, task_id: str, tags: list[str]):
+        self.remove_task(task_id)
+        tags = list(dict.fromkeys(tags))
+        if not tags:
+            return
+        self._tags_by_task[task_id] = tags
+        for tag in tags:
+            self._tasks_by_tag.setdefault(tag, set()).add(task_id)
+
+    def remove_task(self, task_id: str):
+        for tag in self._tags_by_task.pop(task_id, ()):
+            task_ids = self._tasks_by_tag[tag]
+            task_ids.discard(task_id)
+            if not task_ids:
+                del self._tasks_by_tag[tag]
+
+    def tags_of(self, task_id: str) -> list[str]:
+        return list(self._tags_by_task.get(task_id, ()))
+
+    def task_ids(self, tag: str) -> set[str]:
+        return set(self._tasks_by_tag.get(tag, ()))
+
+    def counts(self) -> dict:
+        return {tag: len(task_ids) for tag, task_ids in self._tasks_by_tag.items()}
+
+    def query(self, all_of=(), any_of=()) -> set[str]:
+        """Ids com todas as tags de `all_of` (E) e ao menos uma de `any_of` (OU).
+
+        Sem filtros, devolve todas as tarefas pendentes que têm alguma tag.
+        """
+        result = None
+        # Começa pela tag mais rara para a interseção encolher logo
+        for tag in sorted(set(all_of), key=lambda t: len(self._tasks_by_tag.get(t, ()))):
+            task_ids = self._tasks_by_tag.get(tag, set())
+            result = set(task_ids) if result is None else result & task_ids
+            if not result:
+                return set()
+        if any_of:
+            matches = set().union(*(self._tasks_by_tag.get(tag, set()) for tag in any_of))
+            result = matches if result is None else result & matches
+        return result if result is not None else set(self._tags_by_task)
+
+
+# --- ÍNDICE DE PRIORIDADE (MÉTODO IVY LEE) ---
+# Critérios de desempate entre tarefas com a mesma importância e urgência:
+# 'due_date' (entrega mais próxima primeiro, sem data por último, depois ordem da tabela),
+# 'position' (ordem da tabela) e 'title' (ordem alfabética). O id fecha o empate.
+IVY_LEE_TIEBREAKS = ('due_date', 'position', 'title')
+
+
+class PriorityIndex:
+    """Tarefas pendentes mantidas em ordem de prioridade (importância > urgência > desempate).
+
+    Inclusões e remoções usam busca binária na lista ordenada, e o top-N é
+    só uma fatia do início da lista.
+    """
+
+    def __init__(self, tiebreak: str = 'due_date'):
+        if tiebreak not in IVY_LEE_TIEBREAKS:
+            raise ValueError(f"Critério de desempate inválido: '{tiebreak}'. Use um de {IVY_LEE_TIEBREAKS}.")
+        self.tiebreak = tiebreak
+        self._keys = []
+        self._key_by_task = {}
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame, tiebreak: str = 'due_date') -> "PriorityIndex":
+        index = cls(tiebreak)
+        for position, task in enumerate(df[['id', 'importance', 'urgency', 'due_date', 'title', 'status']].itertuples(index=False)):
+            if task.status != 'done':
+                key = index._key(str(task.id), task.importance, task.urgency, task.due_date, task.title, position)
+                index._key_by_task[key[-1]] = key
+        index._keys = sorted(index._key_by_task.values())
+        return index
+
+    def _key(self, task_id: str, importance, urgency, due_date, title, position: int) -> tuple:
+        if self.tiebreak == 'due_date':
+            due_date = str(due_date or '')
+            tiebreak = (due_date == '', due_date, position)
+        elif self.tiebreak == 'title':
+            tiebreak = (str(title or '').casefold(),)
+        else:
+            tiebreak = (position,)
+        return (-int(importance), -int(urgency), *tiebreak, task_id)
+
+    def upsert(self, task_id: str, importance, urgency, due_date, title, position: int):
+        self.remove(task_id)
+        key = self._key(task_id, importance, urgency, due_date, title, position)
+        bisect.insort(self._keys, key)
+        self._key_by_task[task_id] = key
+
+    def remove(self, task_id: str):
+        key = self._key_by_task.pop(task_id, None)
+        if key is not None:
+            del self._keys[bisect.bisect_left(self._keys, key)]
+
+    def top(self, n: int) -> list[str]:
+        return [key[-1] for key in self._keys[:n]]
+
+
+# --- ÍNDICE DE PRAZOS ---
+# Só datas ISO completas entram nos intervalos de prazo (em memória e no SQLite)
+_ISO_DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+_SQL_ISO_DATE = "due_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'"
+
+
+class DueDateIndex:
+    """Tarefas pendentes com data de entrega, ordenadas por (data, posição).
+
+    Datas ISO ordenam como texto, então "vencidas", "para hoje" e "nos
+    próximos N dias" viram duas buscas binárias e uma fatia da lista.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._key_by_task = {}
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame) -> "DueDateIndex":
+        index = cls()
+        for position, task in enumerate(df[['id', 'due_date', 'status']].itertuples(index=False)):
+            if task.status != 'done' and _ISO_DATE.fullmatch(str(task.due_date)):
+                index._key_by_task[str(task.id)] = (str(task.due_date), position, str(task.id))
+        index._keys = sorted(index._key_by_task.values())
+        return index
+
+    def upsert(self, task_id: str, due_date, position: int):
+        self.remove(task_id)
+        if _ISO_DATE.fullmatch(str(due_date)):
+            key = (str(due_date), position, task_id)
+            bisect.insort(self._keys, key)
+            self._key_by_task[task_id] = key
+
+    def remove(self, task_id: str):
+        key = self._key_by_task.pop(task_id, None)
+        if key is not None:
+            del self._keys[bisect.bisect_left(self._keys, key)]
+
+    def between(self, start=None, end=None) -> list[tuple[str, int, str]]:
+        """Chaves (data, posição, id) com start <= data <= end; None deixa o lado aberto."""
+        low = bisect.bisect_left(self._keys, (str(start),)) if start is not None else 0
+        high = bisect.bisect_left(self._keys, (str(end) + '\uffff',)) if end is not None else len(self._keys)
+        return self._keys[low:high]
+
+
+def _deadline_urgency(due_dates, today: date, horizon_days: int) -> np.ndarray:
+    """Urgência derivada do prazo: 5 para vencidas ou para hoje, caindo até -5 em `horizon_days` dias.
+
+    Datas vazias ou inválidas viram NaN, para quem chama manter a urgência manual.
+    """
+    due = pd.to_datetime(pd.Series(due_dates, dtype='object'), format='%Y-%m-%d', errors='coerce')
+    days_left = (due - pd.Timestamp(today)).dt.days.to_numpy(dtype='float64')
+    return np.clip(np.round(5 - 10 * np.maximum(days_left, 0) / max(horizon_days, 1)), -5, 5)
+
+
+def _rows_for_ids(df: pd.DataFrame, task_ids, positions: dict | None = None) -> list[dict]:
+    """Materializa as tarefas dos ids informados, na ordem da tabela."""
+    if positions is None:
+        return df[df['id'].astype(str).isin(set(task_ids))].to_dict('records')
+    return df.iloc[sorted(positions[task_id] for task_id in task_ids)].to_dict('records')
+
+
+def _group_by_defined_tags(df: pd.DataFrame, index: TagIndex, tags: list[str], positions: dict | None = None) -> dict:
+    groups = {}
+    for tag in tags:
+        task_ids = index.task_ids(tag)
+        if task_ids:
+            groups[tag] = _rows_for_ids(df, task_ids, positions)
+    return groups
 
-    def _connect_spreadsheet(self):
-        try:
-            creds_b64 = st.secrets.GSHEETS_CREDENTIALS_B64
-            creds_bytes = base64.b64decode(creds_b64)
-            creds_json_string = creds_bytes.decode('utf-8')
-            creds_dict = json.loads(creds_json_string)
-            gc = gspread.service_account_from_dict(creds_dict)
-            return gc.open_by_url(st.secrets.GSHEETS_URL)
-        except Exception as e:
-            st.error(f"Erro fatal ao conectar com o Google Sheets: {e}")
-            st.stop()
 
-    def _get_or_create_worksheet(self, name: str):
+def _query_page(df: pd.DataFrame, candidates=None, quadrant: str | None = None, due_from=None, due_to=None,
+                search: str | None = None, urgent: bool = False, offset: int = 0, limit: int | None = None,
+                include_urgent: bool = False) -> tuple[list[dict], int]:
+    """Filtra as tarefas pendentes com máscaras vetorizadas e materializa só a página pedida.
+
+    `candidates` são posições já pré-filtradas (por exemplo, pelo índice de tags).
+    Com `include_urgent`, o intervalo de entrega aceita também as tarefas urgentes
+    (urgência > 0), tenham ou não prazo.
+    Devolve as tarefas da página e o total de tarefas que passaram nos filtros.
+    """
+    positions = np.arange(len(df)) if candidates is None else np.sort(np.fromiter(candidates, dtype=np.int64))
+    subset = df if candidates is None else df.iloc[positions]
+    mask = (subset['status'] != 'done').to_numpy()
+    if quadrant:
+        mask &= (subset['quadrant'] == quadrant).to_numpy()
+    if urgent:
+        mask &= (subset['urgency'] > 0).to_numpy()
+    if due_from or due_to:
+        due = subset['due_date'].fillna('').astype(str)
+        in_range = due.str.fullmatch(_ISO_DATE.pattern).to_numpy()
+        if due_from: in_range &= (due >= str(due_from)).to_numpy()
+        if due_to: in_range &= (due <= str(due_to)).to_numpy()
+        if include_urgent: in_range |= (subset['urgency'] > 0).to_numpy()
+        mask &= in_range
+    if search:
+        mask &= subset['title'].astype(str).str.contains(search, case=False, regex=False).to_numpy()
+    matched = positions[mask]
+    page = matched[offset:offset + limit if limit is not None else None]
+    return df.iloc[page].to_dict('records'), len(matched)
+
+
+# --- ARQUIVO DE TAREFAS CONCLUÍDAS ---
+# Tarefas concluídas saem da tabela ativa e vão para partições mensais (AAAA-MM)
+ARCHIVE_PREFIX = "Arquivo "
+
+
+def _archive_months(updated_at) -> np.ndarray:
+    """Partição de cada tarefa concluída, pelo mês da última alteração (a conclusão); sem data, o mês atual."""
+    months = pd.Series(updated_at, dtype='object').fillna('').astype(str).str[:7]
+    return np.where(months.str.fullmatch(r'\d{4}-\d{2}'), months, datetime.now(timezone.utc).strftime('%Y-%m')).astype(str)
+
+
+def _months_between(months, start_month=None, end_month=None) -> list[str]:
+    return [month for month in sorted(months)
+            if (start_month is None or month >= start_month) and (end_month is None or month <= end_month)]
+
+
+# --- BACKENDS DE ARMAZENAMENTO ---
+class StorageBackend:
+    """Interface comum dos motores de armazenamento usados pelo Storage.
+
+    As consultas têm uma implementação padrão sobre o DataFrame completo;
+    motores com índices próprios (como o SQLite) as sobrescrevem.
+    """
+    columns = TASK_COLUMNS
+    # Indica se cada leitura custa uma chamada de rede
+    is_remote = False
+
+    def read_tasks(self) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def write_tasks(self, df: pd.DataFrame):
+        raise NotImplementedError
+
+    def list_tags(self) -> list[str]:
+        raise NotImplementedError
+
+    def add_tag(self, tag_name: str):
+        raise NotImplementedError
+
+    def delete_tag(self, tag_name: str) -> bool:
+        raise NotImplementedError
+
+    def insert_task(self, task: dict):
+        self.insert_tasks([task])
+
+    def update_task(self, task_id: str, updates: dict) -> bool:
+        updates = dict(updates)
+        expected = updates.pop(EXPECTED_VERSION, None)
+        # Cópia: read_tasks pode devolver a réplica em cache, compartilhada com as outras sessões
+        df = self.read_tasks().copy()
+        df['id'] = df['id'].astype(str)
+        task_id = str(task_id)
+        if task_id not in df['id'].values: return False
+        position = int(np.flatnonzero(df['id'].to_numpy() == task_id)[0])
+        if expected is not None and int(df['version'].iat[position]) != int(expected):
+            return False
+        for key, value in updates.items():
+            if key not in df.columns: df[key] = pd.Series(dtype='object')
+            _set_cell(df, position, key, value)
+        self.write_tasks(df)
+        return True
+
+    def insert_tasks(self, tasks: list[dict]):
+        df = pd.concat([self.read_tasks(), pd.DataFrame(tasks)], ignore_index=True)
+        self.write_tasks(df)
+
+    def update_tasks(self, updates: dict) -> dict:
+        """Aplica várias edições {id: campos}; devolve {id: gravada?}.
+
+        Uma edição com EXPECTED_VERSION só é gravada se a tarefa ainda estiver
+        nessa versão; caso contrário (conflito) volta False.
+        """
+        return {task_id: self.update_task(task_id, changes) for task_id, changes in updates.items()}
+
+    def reset(self):
+        self.write_tasks(pd.DataFrame(columns=self.columns))
+
+    def existing_task_ids(self, task_ids) -> set[str]:
+        """Quais destes ids já têm linha gravada, lidos do backend e não de um cache."""
+        return set(map(str, task_ids)) & set(self.read_tasks()['id'].astype(str))
+
+    def get_task(self, task_id: str) -> dict | None:
+        df = self.read_tasks()
+        match = df[df['id'].astype(str) == str(task_id)]
+        return match.iloc[0].to_dict() if not match.empty else None
+
+    def list_tasks(self) -> list[dict]:
+        return self.read_tasks().to_dict('records')
+
+    def get_urgent_tasks(self) -> list[dict]:
+        df = self.read_tasks()
+        urgent_df = df[(df['urgency'] > 0) & (df['status'] != 'done')]
+        return urgent_df.to_dict('records')
+
+    def get_top_n_pending_tasks(self, n: int = 6, tiebreak: str = 'due_date') -> list[dict]:
+        df = self.read_tasks()
+        positions = {task_id: pos for pos, task_id in enumerate(df['id'].astype(str))}
+        top_ids = PriorityIndex.from_df(df, tiebreak).top(n)
+        return df.iloc[[positions[task_id] for task_id in top_ids]].to_dict('records')
+
+    def group_pending_tasks_by_tag(self) -> dict:
+        df = self.read_tasks()
+        return _group_by_defined_tags(df, TagIndex.from_df(df), self.list_tags())
+
+    def find_tasks_by_tags(self, all_of=(), any_of=()) -> list[dict]:
+        df = self.read_tasks()
+        return _rows_for_ids(df, TagIndex.from_df(df).query(all_of, any_of))
+
+    def tag_counts(self) -> dict:
+        return TagIndex.from_df(self.read_tasks()).counts()
+
+    def tasks_due_between(self, start=None, end=None) -> list[dict]:
+        """Tarefas pendentes com entrega entre `start` e `end` (inclusive), da mais próxima para a mais distante."""
+        df = self.read_tasks()
+        return df.iloc[[key[1] for key in DueDateIndex.from_df(df).between(start, end)]].to_dict('records')
+
+    def query_tasks(self, quadrant=None, tag=None, due_from=None, due_to=None, search=None, urgent=False,
+                    offset: int = 0, limit: int | None = None, include_urgent: bool = False) -> tuple[list[dict], int]:
+        df = self.read_tasks()
+        candidates = None
+        if tag:
+            positions = {task_id: pos for pos, task_id in enumerate(df['id'].astype(str))}
+            candidates = [positions[task_id] for task_id in TagIndex.from_df(df).task_ids(tag)]
+        return _query_page(df, candidates, quadrant, due_from, due_to, search, urgent, offset, limit, include_urgent)
+
+    def task_tags(self, task_id: str) -> list[str]:
+        return _split_tags((self.get_task(task_id) or {}).get('tags'))
+
+    def archive_done_tasks(self) -> dict:
+        """Move as tarefas concluídas para o arquivo mensal; devolve {mês: quantidade movida}."""
+        raise NotImplementedError
+
+    def archive_months(self) -> list[str]:
+        return []
+
+    def read_archive(self, start_month: str | None = None, end_month: str | None = None) -> pd.DataFrame:
+        """Tarefas arquivadas de `start_month` a `end_month` (AAAA-MM, inclusive), lendo só essas partições."""
+        return _normalize_tasks_df(pd.DataFrame(columns=self.columns))
+
+
+def _connect_spreadsheet():
+    try:
+        creds_b64 = st.secrets.GSHEETS_CREDENTIALS_B64
+        creds_bytes = base64.b64decode(creds_b64)
+        creds_json_string = creds_bytes.decode('utf-8')
+        creds_dict = json.loads(creds_json_string)
+        gc = gspread.service_account_from_dict(creds_dict)
+        return gc.open_by_url(st.secrets.GSHEETS_URL)
+    except Exception as e:
+        st.error(f"Erro fatal ao conectar com o Google Sheets: {e}")
+        st.stop()
+
+
+# --- CONTROLE DE COTA DA API DO GOOGLE SHEETS ---
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+_api_context = threading.local()
+
+
+@contextmanager
+def api_priority(priority: int):
+    """Define a prioridade das chamadas à API feitas pela thread atual dentro do bloco."""
+    previous = getattr(_api_context, 'priority', PRIORITY_INTERACTIVE)
+    _api_context.priority = priority
+    try:
+        yield
+    finally:
+        _api_context.priority = previous
+
+
+def _is_retryable_api_error(error: Exception, idempotent: bool = True) -> bool:
+    """429 (pedido recusado antes de ser processado) sempre; 5xx só se repetir a chamada não causa dano.
+
+    Um 5xx não diz se o servidor chegou a aplicar o pedido: repetir um append ou a
+    remoção de uma linha por posição pode duplicar linhas ou apagar a linha errada.
+    """
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if not isinstance(error, gspread.exceptions.APIError) or status is None:
+        return False
+    return status == 429 or (idempotent and status >= 500)
+
+
+class ApiScheduler:
+    """Fila única para as chamadas à API do Sheets, respeitando a cota por minuto.
+
+    Usa um balde de fichas com rajada `burst` e reposição contínua calculada
+    para que nenhuma janela de 60 s passe de `quota_per_minute` chamadas.
+    Quem espera é atendido por prioridade (leituras da interface antes das
+    gravações de fundo) e, dentro da mesma prioridade, por ordem de chegada.
+    Erros 429/5xx são repetidos com espera exponencial e jitter; chamadas
+    marcadas com `idempotent=False` só são repetidas no 429.
+    """
+
+    def __init__(self, quota_per_minute: int = 60, burst: int | None = None, max_retries: int = 5,
+                 base_delay: float = 1.0, max_delay: float = 32.0):
+        self.capacity = burst if burst is not None else max(1, quota_per_minute // 4)
+        self.rate = max(quota_per_minute - self.capacity, 1) / 60.0
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.calls = 0
+        self.retries = 0
+        self.errors = 0
+        self.max_queue_depth = 0
+        self.throttled_seconds = 0.0
+        self.backoff_seconds = 0.0
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._waiting = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _acquire(self, priority: int, cost: int):
+        ticket = (priority, next(self._seq))
+        needed = min(cost, self.capacity)
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._waiting))
+            self._cond.notify_all()
+            started = time.monotonic()
+            while True:
+                self._refill()
+                is_next = self._waiting[0] == ticket
+                if is_next and self._tokens >= needed:
+                    break
+                self._cond.wait((needed - self._tokens) / self.rate if is_next else None)
+            heapq.heappop(self._waiting)
+            self._tokens -= cost
+            self.throttled_seconds += time.monotonic() - started
+            self._cond.notify_all()
+
+    def call(self, fn, *args, cost: int = 1, idempotent: bool = True, **kwargs):
+        priority = getattr(_api_context, 'priority', PRIORITY_INTERACTIVE)
+        name = f"api.{getattr(fn, '__name__', 'call')}"
+        attempt = 0
+        while True:
+            with timed("api.quota_wait"):
+                self._acquire(priority, cost)
+            try:
+                record('api_calls')
+                with timed(name):
+                    result = fn(*args, **kwargs)
+            except Exception as e:
+                if not _is_retryable_api_error(e, idempotent) or attempt >= self.max_retries:
+                    with self._cond: self.errors += 1
+                    raise
+                attempt += 1
+                record('api_retries')
+                delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+                with self._cond:
+                    self.retries += 1
+                    self.backoff_seconds += delay
+                    # Cota estourada: esvazia o balde para que as outras chamadas também esperem
+                    self._tokens = min(self._tokens, 0.0)
+                time.sleep(delay)
+                continue
+            with self._cond: self.calls += 1
+            return result
+
+    def metrics(self) -> dict:
+        with self._cond:
+            self._refill()
+            return {
+                'queue_depth': len(self._waiting),
+                'max_queue_depth': self.max_queue_depth,
+                'throttled_seconds': round(self.throttled_seconds, 3),
+                'backoff_seconds': round(self.backoff_seconds, 3),
+                'calls': self.calls,
+                'retries': self.retries,
+                'errors': self.errors,
+                'tokens': round(self._tokens, 2),
+            }
+
+
+class SheetsBackend(StorageBackend):
+    """Armazena tarefas na aba 'Página1' e tags na aba 'Tags' de uma planilha Google.
+
+    Mantém um mapa id -> número da linha para que edições e inclusões
+    escrevam apenas as células alteradas, sem reenviar a aba inteira.
+    Todas as chamadas à API passam pelo `ApiScheduler`.
+
+    Com DELTA_SYNC (padrão), guarda uma réplica das linhas lidas. Cada gravação
+    troca o marcador de revisão na aba 'Meta' (B1; C1 muda só quando a aba é
+    reescrita inteira). Uma releitura com o marcador igual não baixa nada; com
+    ele diferente, baixa só a coluna `version` e as linhas cuja versão mudou.
+    """
+    is_remote = True
+
+    def __init__(self, spreadsheet=None, scheduler: ApiScheduler | None = None):
+        self.scheduler = scheduler if scheduler is not None else ApiScheduler(int(get_config("SHEETS_QUOTA_PER_MINUTE", 60)))
+        # Conexão e abas são resolvidas no primeiro uso: criar o backend não faz chamadas à API
+        self._spreadsheet = spreadsheet
+        self._worksheets = {}
+        self._handles_lock = threading.Lock()
+        self.delta_sync = get_config_flag("DELTA_SYNC", True)
+        # Edições feitas à mão na planilha não trocam o marcador: de tempos em tempos a leitura é completa
+        self.full_sync_interval = float(get_config("FULL_SYNC_SECONDS", 300))
+        self._replica = None
+        self._header = None
+        self._row_index = {}
+        # O backend é compartilhado entre as sessões; o lock protege o mapa de linhas.
+        self._lock = threading.RLock()
+
+    def _api(self, fn, *args, **kwargs):
+        return self.scheduler.call(fn, *args, **kwargs)
+
+    # --- ABAS (RESOLVIDAS SOB DEMANDA) ---
+    @property
+    def spreadsheet(self):
+        if self._spreadsheet is None:
+            with self._handles_lock:
+                if self._spreadsheet is None:
+                    self._spreadsheet = _connect_spreadsheet()
+        return self._spreadsheet
+
+    def _worksheet(self, name: str, header: list | None = None):
+        """Aba buscada (ou criada com `header`) na primeira vez que é usada e guardada para as próximas."""
+        worksheet = self._worksheets.get(name)
+        if worksheet is None:
+            spreadsheet = self.spreadsheet
+            with self._handles_lock:
+                worksheet = self._worksheets.get(name)
+                if worksheet is None:
+                    worksheet = (self._api(spreadsheet.worksheet, name) if header is None
+                                 else self._get_or_create_worksheet(name, header))
+                    self._worksheets[name] = worksheet
+        return worksheet
+
+    @property
+    def tasks_worksheet(self):
+        return self._worksheet("Página1")
+
+    @property
+    def tags_worksheet(self):
+        return self._worksheet("Tags", ['tag_name'])
+
+    @property
+    def meta_worksheet(self):
+        if not self.delta_sync:
+            return None
+        return self._worksheets.get("Meta") or self._worksheet("Meta", ['revision', uuid.uuid4().hex, uuid.uuid4().hex])
+
+    def _get_or_create_worksheet(self, name: str, header: list):
         try:
-            return self.spreadsheet.worksheet(name)
+            return self._api(self.spreadsheet.worksheet, name)
         except gspread.exceptions.WorksheetNotFound:
-            worksheet = self.spreadsheet.add_worksheet(title=name, rows="100", cols="1")
-            worksheet.update('A1', 'tag_name')
+            worksheet = self._api(self.spreadsheet.add_worksheet, title=name, rows="100", cols=str(len(header)))
+            self._api(worksheet.update, 'A1', [header])
             return worksheet
 
-    def _read_data(self) -> pd.DataFrame:
+    # --- SINCRONIZAÇÃO INCREMENTAL ---
+    def _read_marker(self) -> tuple[str, str]:
+        """(revisão, layout) gravados na aba 'Meta'; vazios se ainda não houver marcador."""
+        values = self._api(self.meta_worksheet.row_values, 1) + ['', '']
+        return values[1], values[2]
+
+    def _touch(self, layout: bool = False):
+        """Troca o marcador de revisão (e o de layout, se a aba foi reescrita) depois de uma gravação."""
+        if self.meta_worksheet is None:
+            return
+        if layout:
+            self._api(self.meta_worksheet.update, 'B1:C1', [[uuid.uuid4().hex, uuid.uuid4().hex]])
+        else:
+            self._api(self.meta_worksheet.update, 'B1', [[uuid.uuid4().hex]])
+
+    def _read_changed_rows(self, replica: dict) -> list[list] | None:
+        """Linhas atuais da aba, baixando só a coluna de versões e as linhas alteradas ou novas.
+
+        Devolve None quando a leitura completa sai mais barata ou é necessária.
+        """
+        rows = replica['rows']
+        header = rows[0] if rows else []
+        if 'version' not in header:
+            return None
+        version_index = header.index('version')
+        versions = self._api(self.tasks_worksheet.col_values, version_index + 1)
+        if len(versions) < len(rows):
+            return None
+        changed = [i for i in range(1, len(versions)) if i >= len(rows) or versions[i] != rows[i][version_index]]
+        if not changed:
+            return rows
+        if len(changed) > max(50, len(versions) // 4):
+            return None
+        # Linhas alteradas vizinhas vão num mesmo intervalo; todos os intervalos numa só chamada
+        runs = []
+        for i in changed:
+            if runs and runs[-1][1] == i - 1:
+                runs[-1][1] = i
+            else:
+                runs.append([i, i])
+        width = len(header)
+        last_column = gspread.utils.rowcol_to_a1(1, width).rstrip('0123456789')
+        fetched = self._api(self.tasks_worksheet.batch_get, [f"A{start + 1}:{last_column}{end + 1}" for start, end in runs])
+        new_rows = rows + [None] * (len(versions) - len(rows))
+        for (start, end), values in zip(runs, fetched):
+            for offset in range(end - start + 1):
+                row = list(values[offset]) if offset < len(values) else []
+                new_rows[start + offset] = row + [''] * (width - len(row))
+        record('rows_read', len(changed))
+        return new_rows
+
+    def _store_replica(self, rows: list[list], marker: tuple | None, full: bool) -> pd.DataFrame:
+        replica = self._replica
+        if replica is not None and rows is replica['rows']:
+            df = replica['df']
+        else:
+            header = [str(col) for col in rows[0]] if rows else []
+            df = _normalize_tasks_df(pd.DataFrame(rows[1:], columns=header))
+        with self._lock:
+            if not rows:
+                self._header = None
+            elif full or replica is None or rows is not replica['rows']:
+                self._set_layout(rows[0], df['id'])
+            if self.delta_sync:
+                self._replica = {
+                    'rows': rows, 'df': df, 'marker': marker,
+                    'full_at': time.monotonic() if full or replica is None else replica['full_at'],
+                }
+        return df
+
+    # --- MAPA DE LINHAS (ESCRITA INCREMENTAL) ---
+    def _set_layout(self, header: list, ids: list):
+        self._header = [str(col) for col in header]
+        self._row_index = {str(task_id): row for row, task_id in enumerate(ids, start=2) if str(task_id) != ''}
+
+    def _load_layout(self):
+        header = self._api(self.tasks_worksheet.row_values, 1)
+        ids = self._api(self.tasks_worksheet.col_values, header.index('id') + 1)[1:] if 'id' in header else []
+        self._set_layout(header, ids)
+
+    def _has_full_header(self) -> bool:
+        if self._header is None:
+            self._load_layout()
+        return all(col in self._header for col in self.columns)
+
+    def _row_for(self, task_id: str) -> int | None:
+        if self._header is None or str(task_id) not in self._row_index:
+            self._load_layout()
+        return self._row_index.get(str(task_id))
+
+    def _row_values(self, task: dict) -> list:
+        return [_cell_value(task.get(col, '')) for col in self._header]
+
+    @instrumented
+    def read_tasks(self) -> pd.DataFrame:
+        # A leitura não segura o lock: assim não espera atrás de gravações de fundo na fila da API
         try:
-            df = pd.DataFrame(self.tasks_worksheet.get_all_records(head=1))
-            for col in self.columns:
-                if col not in df.columns: df[col] = pd.Series(dtype='object')
-            df['importance'] = pd.to_numeric(df['importance'], errors='coerce').fillna(0).astype(int)
-            df['urgency'] = pd.to_numeric(df['urgency'], errors='coerce').fillna(0).astype(int)
-            return df[self.columns]
+            replica, marker, rows = self._replica, None, None
+            if self.delta_sync:
+                marker = self._read_marker()
+                fresh = replica is not None and time.monotonic() - replica['full_at'] < self.full_sync_interval
+                if fresh and marker[0] and marker == replica['marker']:
+                    record('sync_skipped')
+                    return replica['df']
+                if fresh and marker[0] and marker[1] == replica['marker'][1]:
+                    rows = self._read_changed_rows(replica)
+            full = rows is None
+            if full:
+                rows = self._api(self.tasks_worksheet.get_all_values)
+                record('rows_read', max(len(rows) - 1, 0))
+            record('sync_full' if full else 'sync_delta')
         except gspread.exceptions.WorksheetNotFound:
             st.error("Aba 'Página1' não encontrada na sua planilha. Verifique o nome.")
             st.stop()
+        return self._store_replica(rows, marker, full)
+
+    def write_tasks(self, df: pd.DataFrame):
+        with self._lock:
+            from gspread_dataframe import set_with_dataframe
+            # set_with_dataframe faz duas chamadas: resize e update_cells
+            self._api(set_with_dataframe, self.tasks_worksheet, df, resize=True, cost=2)
+            record('rows_written', len(df))
+            self._touch(layout=True)
+            self._set_layout(df.columns, df['id'] if 'id' in df.columns else [])
+
+    def insert_tasks(self, tasks: list[dict]):
+        if not tasks: return
+        with self._lock:
+            if not self._has_full_header():
+                return super().insert_tasks(tasks)
+            response = self._api(
+                self.tasks_worksheet.append_rows,
+                [self._row_values(task) for task in tasks], value_input_option='USER_ENTERED', table_range='A1',
+                idempotent=False,
+            )
+            self._register_appended(tasks, response)
+            record('rows_written', len(tasks))
+            self._touch()
+
+    def _register_appended(self, tasks: list[dict], response: dict):
+        updated_range = (response or {}).get('updates', {}).get('updatedRange', '')
+        if not updated_range:
+            self._header = None
+            return
+        first_cell = updated_range.split('!')[-1].split(':')[0].replace('$', '')
+        first_row = gspread.utils.a1_to_rowcol(first_cell)[0]
+        for offset, task in enumerate(tasks):
+            self._row_index[str(task['id'])] = first_row + offset
+
+    def update_task(self, task_id: str, updates: dict) -> bool:
+        return self.update_tasks({task_id: updates})[str(task_id)]
+
+    def _current_cells(self, rows: dict) -> dict:
+        """(id, versão) gravados agora na planilha para cada {id: linha}, numa só chamada (versão None sem a coluna)."""
+        if not rows:
+            return {}
+        columns = [self._header.index(col) + 1 for col in ('id', 'version') if col in self._header]
+        values = self._api(self.tasks_worksheet.batch_get,
+                           [gspread.utils.rowcol_to_a1(row, column) for row in rows.values() for column in columns])
+        cells = [str(value[0][0]).strip() if value and value[0] else '' for value in values]
+        current = {}
+        for i, task_id in enumerate(rows):
+            found = cells[i * len(columns):(i + 1) * len(columns)]
+            version = None if len(found) < 2 else int(found[1]) if found[1] else 0
+            current[task_id] = (found[0], version)
+        return current
+
+    def _locate(self, task_ids: list[str]) -> tuple[dict, dict]:
+        """Linha e versão atuais de cada tarefa, conferindo que a linha ainda guarda a mesma tarefa.
+
+        Se outro processo reescreveu ou encolheu a aba (arquivamento, reset), o mapa
+        de linhas está velho: ele é refeito e a conferência repetida uma vez. Tarefas
+        que continuam sem linha própria ficam de fora do resultado.
+        """
+        for attempt in range(2):
+            rows = {task_id: self._row_for(task_id) for task_id in task_ids}
+            rows = {task_id: row for task_id, row in rows.items() if row is not None}
+            current = self._current_cells(rows)
+            moved = [task_id for task_id in rows if current[task_id][0] != task_id]
+            if not moved or attempt:
+                break
+            record('layout_reloads')
+            self._load_layout()
+        rows = {task_id: row for task_id, row in rows.items() if task_id not in moved}
+        return rows, {task_id: current[task_id][1] for task_id in rows}
+
+    def update_tasks(self, updates: dict) -> dict:
+        with self._lock:
+            result, data = {}, []
+            updates = {str(task_id): changes for task_id, changes in updates.items()}
+            # Janela curta entre a conferência e a gravação; cobre as edições vindas de outros processos
+            rows, current = self._locate(list(updates))
+            for task_id, changes in updates.items():
+                row = rows.get(task_id)
+                result[task_id] = row is not None
+                if row is None: continue
+                if EXPECTED_VERSION in changes and current[task_id] is not None and current[task_id] != int(changes[EXPECTED_VERSION]):
+                    record('write_conflicts')
+                    result[task_id] = False
+                    continue
+                changes = {key: value for key, value in changes.items() if key != EXPECTED_VERSION}
+                if any(key not in self._header for key in changes):
+                    result[task_id] = super().update_task(task_id, changes)
+                    continue
+                data.extend(
+                    {'range': gspread.utils.rowcol_to_a1(row, self._header.index(key) + 1), 'values': [[_cell_value(value)]]}
+                    for key, value in changes.items()
+                )
+            # Todas as células alteradas seguem numa única chamada
+            if data:
+                self._api(self.tasks_worksheet.batch_update, data, value_input_option='USER_ENTERED')
+                record('rows_written', sum(result.values()))
+                self._touch()
+            return result
+
+    def existing_task_ids(self, task_ids) -> set[str]:
+        # Só a coluna de ids, relida agora: o mapa de linhas pode não saber de um append que deu erro
+        with self._lock:
+            self._load_layout()
+            return set(map(str, task_ids)) & self._row_index.keys()
+
+    def get_task(self, task_id: str) -> dict | None:
+        with self._lock:
+            row = self._row_for(task_id)
+            header = self._header
+        if row is None: return None
+        values = self._api(self.tasks_worksheet.row_values, row)
+        task = dict(zip(header, values + [''] * (len(header) - len(values))))
+        if str(task.get('id')) != str(task_id):
+            # A planilha mudou por fora (linhas inseridas/removidas): refaz o mapa e tenta de novo.
+            with self._lock:
+                self._load_layout()
+            return super().get_task(task_id)
+        return _normalize_tasks_df(pd.DataFrame([task])).iloc[0].to_dict()
+
+    # --- ARQUIVO MENSAL ---
+    def _archive_worksheets(self) -> dict:
+        """Abas de arquivo existentes, {mês: aba}."""
+        return {
+            worksheet.title[len(ARCHIVE_PREFIX):]: worksheet
+            for worksheet in self._api(self.spreadsheet.worksheets) if worksheet.title.startswith(ARCHIVE_PREFIX)
+        }
+
+    def archive_done_tasks(self) -> dict:
+        """Copia as concluídas para as abas 'Arquivo AAAA-MM' e apaga as linhas delas de 'Página1'.
+
+        A remoção é uma única chamada e não toca nas demais linhas, nem nas incluídas
+        por outros processos enquanto o arquivamento corria.
+        """
+        with self._lock:
+            rows = self._api(self.tasks_worksheet.get_all_values)
+            record('rows_read', max(len(rows) - 1, 0))
+            if len(rows) < 2:
+                return {}
+            df = _normalize_tasks_df(pd.DataFrame(rows[1:], columns=[str(col) for col in rows[0]]))
+            done = (df['status'] == 'done').to_numpy()
+            if not done.any():
+                return {}
+            archived = df[done]
+            months = _archive_months(archived['updated_at'])
+            worksheets = self._archive_worksheets()
+            moved = {}
+            for month in sorted(set(months)):
+                part = archived[months == month]
+                worksheet = worksheets.get(month) or self._get_or_create_worksheet(ARCHIVE_PREFIX + month, list(self.columns))
+                # Uma compactação interrompida pode ter deixado parte das linhas já arquivadas
+                already = set(self._api(worksheet.col_values, 1)[1:])
+                part = part[~part['id'].astype(str).isin(already)]
+                if len(part):
+                    self._api(
+                        worksheet.append_rows,
+                        [[_cell_value(value) for value in task] for task in part[self.columns].itertuples(index=False)],
+                        value_input_option='USER_ENTERED', table_range='A1', idempotent=False,
+                    )
+                    record('rows_written', len(part))
+                moved[month] = int((months == month).sum())
+            self._delete_task_rows(rows[0], set(archived['id'].astype(str)))
+            return moved
 
-    def _write_data(self, df: pd.DataFrame):
-        set_with_dataframe(self.tasks_worksheet, df, resize=True)
+    def _delete_task_rows(self, header: list, task_ids: set):
+        """Apaga as linhas dessas tarefas com um único batch_update de deleteDimension.
 
+        As posições vêm de uma releitura da coluna de ids logo antes da remoção, então
+        linhas incluídas ou deslocadas por outros processos não são apagadas por engano.
+        A troca do marcador de layout avisa as outras réplicas que as linhas mudaram de lugar.
+        """
+        ids = self._api(self.tasks_worksheet.col_values, header.index('id') + 1)
+        doomed = [row for row, task_id in enumerate(ids, start=1) if row > 1 and task_id in task_ids]
+        if not doomed:
+            return
+        self._delete_rows(self.tasks_worksheet, doomed)
+        record('rows_written', len(doomed))
+        self._touch(layout=True)
+        removed = set(doomed)
+        self._set_layout(header, [task_id for row, task_id in enumerate(ids, start=1) if row > 1 and row not in removed])
+
+    def _delete_rows(self, worksheet, rows: list[int]):
+        """Apaga as linhas informadas (em ordem crescente) num único batch_update de deleteDimension."""
+        runs = []
+        for row in rows:
+            if runs and runs[-1][1] == row - 1:
+                runs[-1][1] = row
+            else:
+                runs.append([row, row])
+        # De baixo para cima: cada remoção não desloca as que ainda faltam
+        requests = [
+            {'deleteDimension': {'range': {'sheetId': worksheet.id, 'dimension': 'ROWS',
+                                           'startIndex': start - 1, 'endIndex': end}}}
+            for start, end in reversed(runs)
+        ]
+        self._api(self.spreadsheet.batch_update, {'requests': requests}, idempotent=False)
+
+    def archive_months(self) -> list[str]:
+        return sorted(self._archive_worksheets())
+
+    def read_archive(self, start_month: str | None = None, end_month: str | None = None) -> pd.DataFrame:
+        worksheets = self._archive_worksheets()
+        frames = []
+        for month in _months_between(worksheets, start_month, end_month):
+            rows = self._api(worksheets[month].get_all_values)
+            record('rows_read', max(len(rows) - 1, 0))
+            if len(rows) > 1:
+                frames.append(pd.DataFrame(rows[1:], columns=[str(col) for col in rows[0]]))
+        if not frames:
+            return super().read_archive()
+        return _normalize_tasks_df(pd.concat(frames, ignore_index=True))
+
+    def list_tags(self) -> list[str]:
+        tags = self._api(self.tags_worksheet.col_values, 1)[1:]
+        return sorted([tag for tag in tags if tag])
+
+    def add_tag(self, tag_name: str):
+        self._api(self.tags_worksheet.append_row, [tag_name], idempotent=False)
+
+    def delete_tag(self, tag_name: str) -> bool:
+        # Sem números de linha: um único batch_update esvazia a célula onde ela estiver e reordena
+        # a coluna, levando as linhas vazias para o fim. Remoções simultâneas de outras sessões não
+        # deslocam nada que esta tenha lido antes
+        column = {'sheetId': self.tags_worksheet.id, 'startRowIndex': 1, 'startColumnIndex': 0, 'endColumnIndex': 1}
+        reply = self._api(self.spreadsheet.batch_update, {'requests': [
+            {'findReplace': {'find': tag_name, 'replacement': '', 'matchCase': True, 'matchEntireCell': True, 'range': column}},
+            {'sortRange': {'range': column, 'sortSpecs': [{'dimensionIndex': 0, 'sortOrder': 'ASCENDING'}]}},
+        ]})
+        return reply['replies'][0].get('findReplace', {}).get('occurrencesChanged', 0) > 0
+
+
+class SQLiteBackend(StorageBackend):
+    """Motor local em SQLite, com índices para as consultas das páginas.
+
+    Útil para cargas pesadas e para rodar o app sem acesso à rede.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id TEXT NOT NULL,
+            title TEXT NOT NULL DEFAULT '',
+            description TEXT NOT NULL DEFAULT '',
+            importance INTEGER NOT NULL DEFAULT 0,
+            urgency INTEGER NOT NULL DEFAULT 0,
+            due_date TEXT NOT NULL DEFAULT '',
+            tags TEXT NOT NULL DEFAULT '',
+            quadrant TEXT NOT NULL DEFAULT '',
+            status TEXT NOT NULL DEFAULT 'pending',
+            updated_at TEXT NOT NULL DEFAULT '',
+            version INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_id ON tasks(id);
+        CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+        CREATE INDEX IF NOT EXISTS idx_tasks_quadrant ON tasks(quadrant);
+        CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks(due_date);
+        CREATE INDEX IF NOT EXISTS idx_tasks_pending_priority ON tasks(importance DESC, urgency DESC) WHERE status != 'done';
+        CREATE INDEX IF NOT EXISTS idx_tasks_pending_urgency ON tasks(urgency) WHERE status != 'done';
+        CREATE INDEX IF NOT EXISTS idx_tasks_pending_due ON tasks(due_date) WHERE status != 'done' AND due_date != '';
+        CREATE TABLE IF NOT EXISTS tags (name TEXT PRIMARY KEY);
+        CREATE TABLE IF NOT EXISTS task_tags (
+            tag TEXT NOT NULL,
+            task_id TEXT NOT NULL,
+            PRIMARY KEY (tag, task_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_task_tags_task ON task_tags(task_id);
+        CREATE TABLE IF NOT EXISTS tasks_archive (
+            archive_month TEXT NOT NULL,
+            id TEXT NOT NULL,
+            title TEXT NOT NULL DEFAULT '',
+            description TEXT NOT NULL DEFAULT '',
+            importance INTEGER NOT NULL DEFAULT 0,
+            urgency INTEGER NOT NULL DEFAULT 0,
+            due_date TEXT NOT NULL DEFAULT '',
+            tags TEXT NOT NULL DEFAULT '',
+            quadrant TEXT NOT NULL DEFAULT '',
+            status TEXT NOT NULL DEFAULT 'done',
+            updated_at TEXT NOT NULL DEFAULT '',
+            version INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_archive_month ON tasks_archive(archive_month);
+    """
+
+    def __init__(self, path: str = "tasks.db"):
+        self.path = path
+        # O Streamlit executa cada sessão numa thread; a conexão é compartilhada sob um lock.
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self._lock, self.conn:
+            self.conn.executescript(self.SCHEMA)
+            # Bancos criados antes das colunas de versão
+            existing = {row['name'] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+            if 'updated_at' not in existing:
+                self.conn.execute("ALTER TABLE tasks ADD COLUMN updated_at TEXT NOT NULL DEFAULT ''")
+            if 'version' not in existing:
+                self.conn.execute("ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def _query(self, sql: str, params=()) -> list[dict]:
+        with self._lock:
+            rows = [dict(row) for row in self.conn.execute(sql, params)]
+        record('rows_read', len(rows))
+        return rows
+
+    def _task_values(self, task: dict) -> tuple:
+        return tuple(
+            int(task.get(col) or 0) if col in ('importance', 'urgency', 'version') else str(task.get(col) or '')
+            for col in self.columns
+        )
+
+    def _sync_task_tags(self, task_id: str, tags_str: str):
+        self.conn.execute("DELETE FROM task_tags WHERE task_id = ?", (task_id,))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO task_tags (tag, task_id) VALUES (?, ?)",
+            [(tag, task_id) for tag in _split_tags(tags_str)],
+        )
+
+    @instrumented
+    def read_tasks(self) -> pd.DataFrame:
+        return _normalize_tasks_df(pd.DataFrame(self.list_tasks()))
+
+    def write_tasks(self, df: pd.DataFrame):
+        records = df.to_dict('records')
+        placeholders = ", ".join("?" for _ in self.columns)
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM tasks")
+            self.conn.execute("DELETE FROM task_tags")
+            self.conn.executemany(
+                f"INSERT INTO tasks ({', '.join(self.columns)}) VALUES ({placeholders})",
+                [self._task_values(task) for task in records],
+            )
+            for task in records:
+                self._sync_task_tags(str(task['id']), task.get('tags'))
+
+    def insert_tasks(self, tasks: list[dict]):
+        placeholders = ", ".join("?" for _ in self.columns)
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f"INSERT INTO tasks ({', '.join(self.columns)}) VALUES ({placeholders})",
+                [self._task_values(task) for task in tasks],
+            )
+            for task in tasks:
+                self._sync_task_tags(str(task['id']), task.get('tags'))
+
+    def update_task(self, task_id: str, updates: dict) -> bool:
+        expected = updates.get(EXPECTED_VERSION)
+        updates = {key: value for key, value in updates.items() if key in self.columns and key != 'id'}
+        if not updates:
+            return self.get_task(task_id) is not None
+        assignments = ", ".join(f"{key} = ?" for key in updates)
+        condition, params = "id = ?", [str(task_id)]
+        if expected is not None:
+            condition += " AND version = ?"
+            params.append(int(expected))
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                f"UPDATE tasks SET {assignments} WHERE {condition}",
+                (*(_cell_value(value) for value in updates.values()), *params),
+            )
+            if not cursor.rowcount and expected is not None:
+                record('write_conflicts')
+            if cursor.rowcount and 'tags' in updates:
+                self._sync_task_tags(str(task_id), updates['tags'])
+        return cursor.rowcount > 0
+
+    def reset(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM tasks")
+            self.conn.execute("DELETE FROM task_tags")
+
+    def archive_done_tasks(self) -> dict:
+        """Move as concluídas para `tasks_archive` (partição = archive_month) numa única transação."""
+        columns = ', '.join(self.columns)
+        month = ("CASE WHEN updated_at GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*' "
+                 "THEN substr(updated_at, 1, 7) ELSE ? END")
+        current_month = datetime.now(timezone.utc).strftime('%Y-%m')
+        with self._lock, self.conn:
+            moved = {
+                row['month']: row['total'] for row in self.conn.execute(
+                    f"SELECT {month} AS month, COUNT(*) AS total FROM tasks WHERE status = 'done' GROUP BY month", (current_month,)
+                )
+            }
+            if moved:
+                self.conn.execute(
+                    f"INSERT INTO tasks_archive (archive_month, {columns}) SELECT {month}, {columns} FROM tasks WHERE status = 'done'",
+                    (current_month,),
+                )
+                self.conn.execute("DELETE FROM task_tags WHERE task_id IN (SELECT id FROM tasks WHERE status = 'done')")
+                self.conn.execute("DELETE FROM tasks WHERE status = 'done'")
+        record('rows_written', sum(moved.values()))
+        return moved
+
+    def archive_months(self) -> list[str]:
+        return [row['archive_month'] for row in self._query("SELECT DISTINCT archive_month FROM tasks_archive ORDER BY archive_month")]
+
+    def read_archive(self, start_month: str | None = None, end_month: str | None = None) -> pd.DataFrame:
+        where, params = [], []
+        if start_month is not None: where.append("archive_month >= ?"); params.append(start_month)
+        if end_month is not None: where.append("archive_month <= ?"); params.append(end_month)
+        rows = self._query(
+            f"SELECT {', '.join(self.columns)} FROM tasks_archive {'WHERE ' + ' AND '.join(where) if where else ''} "
+            "ORDER BY archive_month, rowid",
+            params,
+        )
+        return _normalize_tasks_df(pd.DataFrame(rows, columns=self.columns))
+
+    def get_task(self, task_id: str) -> dict | None:
+        rows = self._query(f"SELECT {', '.join(self.columns)} FROM tasks WHERE id = ?", (str(task_id),))
+        return rows[0] if rows else None
+
+    def existing_task_ids(self, task_ids) -> set[str]:
+        task_ids = list(map(str, task_ids))
+        if not task_ids:
+            return set()
+        rows = self._query(f"SELECT id FROM tasks WHERE id IN ({', '.join('?' * len(task_ids))})", task_ids)
+        return {row['id'] for row in rows}
+
+    def list_tags(self) -> list[str]:
+        return [row['name'] for row in self._query("SELECT name FROM tags WHERE name != '' ORDER BY name")]
+
+    def add_tag(self, tag_name: str):
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (tag_name,))
+
+    def delete_tag(self, tag_name: str) -> bool:
+        with self._lock, self.conn:
+            cursor = self.conn.execute("DELETE FROM tags WHERE name = ?", (tag_name,))
+        return cursor.rowcount > 0
+
+    def list_tasks(self) -> list[dict]:
+        return self._query(f"SELECT {', '.join(self.columns)} FROM tasks ORDER BY rowid")
+
+    def get_urgent_tasks(self) -> list[dict]:
+        return self._query(
+            f"SELECT {', '.join(self.columns)} FROM tasks INDEXED BY idx_tasks_pending_urgency "
+            "WHERE status != 'done' AND urgency > 0 ORDER BY rowid"
+        )
+
+    TIEBREAK_ORDER = {
+        'due_date': "due_date = '', due_date, rowid",
+        'position': "rowid",
+        'title': "title COLLATE NOCASE",
+    }
+
+    def get_top_n_pending_tasks(self, n: int = 6, tiebreak: str = 'due_date') -> list[dict]:
+        if tiebreak not in self.TIEBREAK_ORDER:
+            raise ValueError(f"Critério de desempate inválido: '{tiebreak}'. Use um de {IVY_LEE_TIEBREAKS}.")
+        return self._query(
+            f"SELECT {', '.join(self.columns)} FROM tasks WHERE status != 'done' "
+            f"ORDER BY importance DESC, urgency DESC, {self.TIEBREAK_ORDER[tiebreak]}, id LIMIT ?",
+            (n,),
+        )
+
+    def group_pending_tasks_by_tag(self) -> dict:
+        columns = ", ".join(f"t.{col}" for col in self.columns)
+        rows = self._query(
+            f"SELECT tt.tag AS group_tag, {columns} FROM tags g "
+            "JOIN task_tags tt ON tt.tag = g.name "
+            "JOIN tasks t ON t.id = tt.task_id "
+            "WHERE t.status != 'done' ORDER BY g.name, t.rowid"
+        )
+        grouped_tasks = {}
+        for row in rows:
+            grouped_tasks.setdefault(row.pop('group_tag'), []).append(row)
+        return grouped_tasks
+
+    def find_tasks_by_tags(self, all_of=(), any_of=()) -> list[dict]:
+        all_of, any_of = sorted(set(all_of)), sorted(set(any_of))
+        conditions, params = [], []
+        if all_of:
+            conditions.append(
+                f"id IN (SELECT task_id FROM task_tags WHERE tag IN ({', '.join('?' for _ in all_of)}) "
+                "GROUP BY task_id HAVING COUNT(*) = ?)"
+            )
+            params += [*all_of, len(all_of)]
+        if any_of:
+            conditions.append(f"id IN (SELECT task_id FROM task_tags WHERE tag IN ({', '.join('?' for _ in any_of)}))")
+            params += any_of
+        if not conditions:
+            conditions.append("id IN (SELECT task_id FROM task_tags)")
+        return self._query(
+            f"SELECT {', '.join(self.columns)} FROM tasks WHERE status != 'done' AND "
+            + " AND ".join(conditions) + " ORDER BY rowid",
+            params,
+        )
+
+    def tag_counts(self) -> dict:
+        rows = self._query(
+            "SELECT tt.tag AS tag, COUNT(*) AS total FROM task_tags tt "
+            "JOIN tasks t ON t.id = tt.task_id WHERE t.status != 'done' GROUP BY tt.tag"
+        )
+        return {row['tag']: row['total'] for row in rows}
+
+    def tasks_due_between(self, start=None, end=None) -> list[dict]:
+        where, params = ["status != 'done'", "due_date != ''", _SQL_ISO_DATE], []
+        if start is not None: where.append("due_date >= ?"); params.append(str(start))
+        if end is not None: where.append("due_date <= ?"); params.append(str(end))
+        return self._query(
+            f"SELECT {', '.join(self.columns)} FROM tasks INDEXED BY idx_tasks_pending_due "
+            f"WHERE {' AND '.join(where)} ORDER BY due_date, rowid",
+            params,
+        )
+
+    def query_tasks(self, quadrant=None, tag=None, due_from=None, due_to=None, search=None, urgent=False,
+                    offset: int = 0, limit: int | None = None, include_urgent: bool = False) -> tuple[list[dict], int]:
+        where, params = ["status != 'done'"], []
+        if quadrant:
+            where.append("quadrant = ?"); params.append(quadrant)
+        if urgent:
+            where.append("urgency > 0")
+        if due_from or due_to:
+            in_range = ["due_date != ''", _SQL_ISO_DATE]
+            if due_from: in_range.append("due_date >= ?"); params.append(str(due_from))
+            if due_to: in_range.append("due_date <= ?"); params.append(str(due_to))
+            where.append(f"(({' AND '.join(in_range)}) OR urgency > 0)" if include_urgent else " AND ".join(in_range))
+        if search:
+            escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            where.append("title LIKE ? ESCAPE '\\'"); params.append(f"%{escaped}%")
+        if tag:
+            where.append("id IN (SELECT task_id FROM task_tags WHERE tag = ?)"); params.append(tag)
+        condition = " AND ".join(where)
+        with self._lock:
+            total = self.conn.execute(f"SELECT COUNT(*) FROM tasks WHERE {condition}", params).fetchone()[0]
+        tasks = self._query(
+            f"SELECT {', '.join(self.columns)} FROM tasks WHERE {condition} ORDER BY rowid LIMIT ? OFFSET ?",
+            (*params, -1 if limit is None else limit, offset),
+        )
+        return tasks, total
+
+
+class SharedSnapshot(StorageBackend):
+    """Cache de leitura, em memória, das tarefas e tags de um backend.
+
+    Uma única instância é compartilhada por todas as sessões do processo: a
+    primeira leitura carrega os dados e as demais reaproveitam o mesmo
+    DataFrame até o TTL expirar ou alguma sessão escrever e chamar
+    `invalidate`. O DataFrame devolvido é compartilhado e não deve ser
+    alterado por quem o recebe.
+    """
+
+    def __init__(self, backend: StorageBackend, ttl: float = 60):
+        self.backend = backend
+        self.ttl = ttl
+        self.version = 0
+        self.hits = {'tasks': 0, 'tags': 0}
+        self.misses = {'tasks': 0, 'tags': 0}
+        # Fonte das mutações ainda não gravadas (fila de gravação adiada), reaplicadas a cada recarga
+        self.pending_ops = None
+        self._entries = {}
+        self._views = None
+        self._lock = threading.RLock()
+
+    def _get(self, kind: str, loader):
+        with self._lock:
+            entry = self._entries.get(kind)
+            if entry is not None and (self.ttl <= 0 or time.monotonic() - entry[0] < self.ttl):
+                self.hits[kind] += 1
+                record('cache_hits')
+                return entry[1]
+            self.misses[kind] += 1
+            record('cache_misses')
+            value = loader()
+            self._entries[kind] = (time.monotonic(), value)
+            return value
+
+    def _load_tasks(self) -> pd.DataFrame:
+        if self.pending_ops is None:
+            return self.backend.read_tasks()
+        # Captura as mutações antes da leitura: um lote gravado enquanto a leitura está em
+        # andamento sai da fila mas pode não aparecer no que o backend devolveu
+        before = self.pending_ops()
+        df = self.backend.read_tasks()
+        ops = before + self.pending_ops()
+        return _apply_pending_ops(df, ops) if ops else df
+
+    def read_tasks(self) -> pd.DataFrame:
+        return self._get('tasks', self._load_tasks)
+
+    def list_tags(self) -> list[str]:
+        return list(self._get('tags', self.backend.list_tags))
+
+    def _task_views(self) -> dict:
+        """DataFrame atual e os índices derivados dele, construídos uma vez por carga."""
+        with self._lock:
+            df = self.read_tasks()
+            if self._views is None or self._views['df'] is not df:
+                self._views = {
+                    'df': df,
+                    'positions': {task_id: pos for pos, task_id in enumerate(df['id'].astype(str))},
+                    'tags': TagIndex.from_df(df),
+                    'due': DueDateIndex.from_df(df),
+                    # Pendentes com urgência > 0, que entram nas "urgências do dia" mesmo sem prazo
+                    'urgent': set(df['id'].astype(str)[(df['status'] != 'done') & (df['urgency'] > 0)]),
+                    'priority': {},
+                }
+            return self._views
+
+    def _priority_index(self, tiebreak: str) -> PriorityIndex:
+        views = self._task_views()
+        if tiebreak not in views['priority']:
+            views['priority'][tiebreak] = PriorityIndex.from_df(views['df'], tiebreak)
+        return views['priority'][tiebreak]
+
+    def _update_views(self, df: pd.DataFrame, task_id: str):
+        views = self._views
+        views['df'] = df
+        position = views['positions'].setdefault(task_id, len(df) - 1)
+        task = df.iloc[position]
+        if task['status'] != 'done' and task['urgency'] > 0:
+            views['urgent'].add(task_id)
+        else:
+            views['urgent'].discard(task_id)
+        if task['status'] == 'done':
+            views['tags'].remove_task(task_id)
+            views['due'].remove(task_id)
+            for priority in views['priority'].values():
+                priority.remove(task_id)
+        else:
+            views['tags'].set_task(task_id, _split_tags(task['tags']))
+            views['due'].upsert(task_id, task['due_date'], position)
+            for priority in views['priority'].values():
+                priority.upsert(task_id, task['importance'], task['urgency'], task['due_date'], task['title'], position)
+
+    def apply_local(self, task_id: str, op: dict):
+        """Reflete uma mutação no cache antes de ela chegar ao backend (cópia na escrita)."""
+        with self._lock:
+            self.version += 1
+            entry = self._entries.get('tasks')
+            if entry is not None:
+                df = _apply_pending_ops(entry[1], [(task_id, op)])
+                self._entries['tasks'] = (entry[0], df)
+                if self._views is not None and self._views['df'] is entry[1]:
+                    self._update_views(df, task_id)
+
+    def apply_tag_change(self, tag_name: str, added: bool):
+        """Atualiza a lista de tags em cache depois de uma inclusão/remoção já gravada."""
+        with self._lock:
+            self.version += 1
+            entry = self._entries.get('tags')
+            if entry is None:
+                return
+            tags = [tag for tag in entry[1] if tag != tag_name]
+            if added:
+                bisect.insort(tags, tag_name)
+            self._entries['tags'] = (entry[0], tags)
+
+    def get_top_n_pending_tasks(self, n: int = 6, tiebreak: str = 'due_date') -> list[dict]:
+        with self._lock:
+            top_ids = self._priority_index(tiebreak).top(n)
+            views = self._views
+            return views['df'].iloc[[views['positions'][task_id] for task_id in top_ids]].to_dict('records')
+
+    def group_pending_tasks_by_tag(self) -> dict:
+        with self._lock:
+            views = self._task_views()
+            return _group_by_defined_tags(views['df'], views['tags'], self.list_tags(), views['positions'])
+
+    def find_tasks_by_tags(self, all_of=(), any_of=()) -> list[dict]:
+        with self._lock:
+            views = self._task_views()
+            return _rows_for_ids(views['df'], views['tags'].query(all_of, any_of), views['positions'])
+
+    def tag_counts(self) -> dict:
+        with self._lock:
+            return self._task_views()['tags'].counts()
+
+    def get_task(self, task_id: str) -> dict | None:
+        with self._lock:
+            views = self._task_views()
+            position = views['positions'].get(str(task_id))
+            return None if position is None else views['df'].iloc[[position]].to_dict('records')[0]
+
+    def query_tasks(self, quadrant=None, tag=None, due_from=None, due_to=None, search=None, urgent=False,
+                    offset: int = 0, limit: int | None = None, include_urgent: bool = False) -> tuple[list[dict], int]:
+        with self._lock:
+            views = self._task_views()
+            candidates = None
+            if due_from or due_to:
+                # O índice de prazos já entrega só as posições dentro do intervalo
+                candidates = {key[1] for key in views['due'].between(due_from, due_to)}
+                if include_urgent:
+                    candidates |= {views['positions'][task_id] for task_id in views['urgent']}
+            if tag:
+                tagged = {views['positions'][task_id] for task_id in views['tags'].task_ids(tag)}
+                candidates = tagged if candidates is None else candidates & tagged
+            return _query_page(views['df'], candidates, quadrant, due_from, due_to, search, urgent, offset, limit, include_urgent)
+
+    def tasks_due_between(self, start=None, end=None) -> list[dict]:
+        with self._lock:
+            views = self._task_views()
+            return views['df'].iloc[[key[1] for key in views['due'].between(start, end)]].to_dict('records')
+
+    def task_tags(self, task_id: str) -> list[str]:
+        with self._lock:
+            views = self._task_views()
+            task_id = str(task_id)
+            if task_id not in views['positions']:
+                return []
+            # Tarefas pendentes já têm as tags separadas no índice
+            return views['tags'].tags_of(task_id) or _split_tags(views['df'].iloc[views['positions'][task_id]]['tags'])
+
+    def invalidate(self, tasks: bool = True, tags: bool = True):
+        with self._lock:
+            self.version += 1
+            if tasks: self._entries.pop('tasks', None)
+            if tags: self._entries.pop('tags', None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'version': self.version,
+                'hits': dict(self.hits),
+                'misses': dict(self.misses),
+                'cached': sorted(self._entries),
+            }
+
+
+def create_backend() -> StorageBackend:
+    """Instancia o motor configurado em STORAGE_BACKEND ('sheets' ou 'sqlite')."""
+    backend_name = str(get_config("STORAGE_BACKEND", "sheets")).lower()
+    if backend_name == "sqlite":
+        return SQLiteBackend(get_config("SQLITE_PATH", "tasks.db"))
+    if backend_name == "sheets":
+        return SheetsBackend()
+    st.error(f"Backend de armazenamento desconhecido: '{backend_name}'. Use 'sheets' ou 'sqlite'.")
+    st.stop()
+
+
+# --- GRAVAÇÃO ADIADA (WRITE-BEHIND) ---
+def _is_permanent_write_error(error: Exception) -> bool:
+    """Erros que reenviar não resolve: 4xx da API (exceto 429) e dados inválidos."""
+    if isinstance(error, gspread.exceptions.APIError):
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+        return status is not None and 400 <= status < 500 and status != 429
+    return isinstance(error, (ValueError, TypeError, KeyError))
+
+
+class WriteBehindQueue:
+    """Fila de mutações de tarefas gravadas no backend por uma thread de fundo.
+
+    Edições seguidas da mesma tarefa são fundidas em uma só operação, e o
+    envio acontece em lotes (`insert_tasks`/`update_tasks`). Em caso de falha
+    temporária o lote volta para a fila e é reenviado com espera exponencial
+    (inclusões cujo envio falhou são conferidas no backend antes de irem de novo);
+    num erro permanente as operações do lote são regravadas uma a uma e só as
+    que falham de novo são descartadas (contadas em `discarded`).
+    """
+
+    def __init__(self, backend: StorageBackend, interval: float = 0.5, batch_size: int = 50, max_backoff: float = 30):
+        self.backend = backend
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.flushed = 0
+        self.failures = 0
+        self.last_error = None
+        # Edições recusadas pelo backend (tarefa alterada em outro processo ou removida)
+        self.conflicts = 0
+        self.on_conflict = None
+        # Operações que o backend recusou com erro permanente
+        self.discarded = 0
+        self.discard_error = None
+        self.on_discard = None
+        self._pending = {}
+        self._inflight = {}
+        # Inclusões cujo envio falhou sem garantia de que a linha não foi gravada
+        self._unconfirmed = set()
+        self._flush_requested = False
+        self._cond = threading.Condition()
+        self._thread = None
+        atexit.register(self.flush, timeout=10)
+
+    @staticmethod
+    def _merge(old: dict, new: dict) -> dict:
+        kind = 'insert' if 'insert' in (old['kind'], new['kind']) else 'update'
+        fields = {**old['fields'], **new['fields']}
+        # A operação fundida vale a partir da versão em que a primeira edição se baseou
+        if kind == 'insert' or EXPECTED_VERSION not in old['fields']:
+            fields.pop(EXPECTED_VERSION, None)
+        else:
+            fields[EXPECTED_VERSION] = old['fields'][EXPECTED_VERSION]
+        return {'kind': kind, 'fields': fields}
+
+    def submit(self, task_id: str, kind: str, fields: dict) -> dict:
+        op = {'kind': kind, 'fields': dict(fields)}
+        with self._cond:
+            previous = self._pending.get(task_id)
+            self._pending[task_id] = self._merge(previous, op) if previous else op
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="storage-write-behind", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return op
+
+    def pending_ops(self) -> list[tuple[str, dict]]:
+        with self._cond:
+            return list(self._inflight.items()) + list(self._pending.items())
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._inflight.keys() | self._pending.keys())
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Pede o envio imediato e espera a fila esvaziar; devolve False se o tempo acabar."""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._pending and not self._inflight, timeout)
+
+    def _run(self):
+        backoff = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                if not self._flush_requested:
+                    # Janela curta para juntar cliques e edições em sequência
+                    self._cond.wait_for(lambda: self._flush_requested, self.interval)
+                batch = list(self._pending.items())[:self.batch_size]
+                for task_id, op in batch:
+                    del self._pending[task_id]
+                    self._inflight[task_id] = op
+            try:
+                with api_priority(PRIORITY_BACKGROUND):
+                    self._send(batch)
+            except Exception as e:
+                with self._cond:
+                    self.failures += 1
+                    self.last_error = str(e)
+                    self._unconfirmed.update(task_id for task_id, op in self._inflight.items() if op['kind'] == 'insert')
+                    pending = self._pending
+                    self._pending = {}
+                    for task_id, op in list(self._inflight.items()) + list(pending.items()):
+                        previous = self._pending.get(task_id)
+                        self._pending[task_id] = self._merge(previous, op) if previous else op
+                    self._inflight.clear()
+                # Piso de 0,1 s: com intervalo zero a repetição não pode virar laço ocupado
+                backoff = min(max(backoff * 2, self.interval, 0.1), self.max_backoff)
+                time.sleep(backoff)
+                continue
+            backoff = 0
+            with self._cond:
+                self.flushed += len(batch)
+                self.last_error = None
+                if not self._pending:
+                    self._flush_requested = False
+                self._cond.notify_all()
+
+    def _send(self, batch: list):
+        """Grava o lote; num erro permanente, isola as operações para descartar só as que falham."""
+        try:
+            self._write_batch(batch)
+        except Exception as e:
+            if not _is_permanent_write_error(e):
+                raise
+            with self._cond:
+                remaining = [(task_id, op) for task_id, op in batch if task_id in self._inflight]
+            if len(remaining) == 1:
+                self._discard(remaining, e)
+                return
+            for item in remaining:
+                try:
+                    self._write_batch([item])
+                except Exception as item_error:
+                    if not _is_permanent_write_error(item_error):
+                        raise
+                    self._discard([item], item_error)
+
+    def _discard(self, items: list, error: Exception):
+        with self._cond:
+            for task_id, _ in items:
+                self._inflight.pop(task_id, None)
+                self._unconfirmed.discard(task_id)
+            self.discarded += len(items)
+            self.discard_error = str(error)
+        logger.warning("gravação descartada (%s): %s", ", ".join(task_id for task_id, _ in items), error)
+        # A mudança já aparecia no cache: ele volta a mostrar o que está de fato no backend
+        if self.on_discard is not None:
+            self.on_discard([task_id for task_id, _ in items])
+
+    def _write_batch(self, batch: list):
+        inserts = {task_id: op['fields'] for task_id, op in batch if op['kind'] == 'insert'}
+        updates = {task_id: op['fields'] for task_id, op in batch if op['kind'] == 'update'}
+        with self._cond:
+            unsure = [task_id for task_id in inserts if task_id in self._unconfirmed]
+        # Um envio anterior pode ter gravado a linha antes de falhar: ela vira edição, não linha repetida
+        for task_id in self.backend.existing_task_ids(unsure) if unsure else ():
+            updates[task_id] = {key: value for key, value in inserts.pop(task_id).items() if key != 'id'}
+        if inserts:
+            self.backend.insert_tasks(list(inserts.values()))
+            # Inclusões já gravadas não podem ser reenviadas se as edições falharem
+            with self._cond:
+                for task_id in inserts:
+                    self._inflight.pop(task_id, None)
+                    self._unconfirmed.discard(task_id)
+        rejected = []
+        if updates:
+            result = self.backend.update_tasks(updates)
+            rejected = [task_id for task_id in updates if not result.get(str(task_id), True)]
+        with self._cond:
+            for task_id, _ in batch:
+                self._inflight.pop(task_id, None)
+                self._unconfirmed.discard(task_id)
+            self.conflicts += len(rejected)
+        # Descarta a edição recusada e deixa o cache buscar a versão que venceu
+        if rejected and self.on_conflict is not None:
+            self.on_conflict(rejected)
+
+
+@st.cache_resource(show_spinner=False)
+def get_shared_backend() -> tuple[StorageBackend, SharedSnapshot | None, WriteBehindQueue | None]:
+    """Conexão, cache e fila de gravação únicos por processo, compartilhados entre todas as sessões."""
+    backend = create_backend()
+    return (backend, *_create_sync_layers(backend))
+
+
+def _create_sync_layers(backend: StorageBackend) -> tuple[SharedSnapshot | None, WriteBehindQueue | None]:
+    # Só vale a pena manter a cópia em memória quando cada leitura custa uma ida à rede
+    if not get_config_flag("SHARED_SNAPSHOT", backend.is_remote):
+        return None, None
+    snapshot = SharedSnapshot(backend, ttl=float(get_config("CACHE_TTL_SECONDS", 60)))
+    # A gravação adiada depende do cache: é nele que a mudança aparece antes de chegar ao backend
+    if not get_config_flag("WRITE_BEHIND", backend.is_remote):
+        return snapshot, None
+    write_queue = WriteBehindQueue(
+        backend,
+        interval=float(get_config("WRITE_BEHIND_INTERVAL", 0.5)),
+        batch_size=int(get_config("WRITE_BEHIND_BATCH_SIZE", 50)),
+    )
+    snapshot.pending_ops = write_queue.pending_ops
+    write_queue.on_conflict = write_queue.on_discard = lambda task_ids: snapshot.invalidate(tags=False)
+    return snapshot, write_queue
+
+
+# --- IMPORTAÇÃO E EXPORTAÇÃO EM LOTE ---
+# Etapas encadeadas por geradores: só um bloco de `chunk_size` tarefas fica em memória
+# por vez, qualquer que seja o tamanho do arquivo.
+IMPORT_CHUNK_SIZE = 500
+# Quantas linhas recusadas guardar como exemplo no relatório (as demais só são contadas)
+MAX_REPORTED_ERRORS = 100
+
+
+def _bulk_format(target, fmt: str | None) -> str:
+    fmt = fmt or Path(str(getattr(target, 'name', target))).suffix.lstrip('.').lower()
+    if fmt not in ('csv', 'jsonl'):
+        raise ValueError(f"Formato não suportado: '{fmt}'. Use 'csv' ou 'jsonl'.")
+    return fmt
+
+
+@contextmanager
+def _open_text(target, mode: str):
+    """Abre um caminho como texto UTF-8; arquivos já abertos são usados como estão.
+
+    Na leitura, um BOM inicial (CSV salvo pelo Excel) é descartado.
+    """
+    if isinstance(target, (str, Path)):
+        with open(target, mode, encoding='utf-8-sig' if 'r' in mode else 'utf-8', newline='') as handle:
+            yield handle
+    else:
+        yield target
+
+
+def _read_task_rows(handle, fmt: str):
+    """Linha a linha do arquivo: (número da linha, dict com os campos)."""
+    if fmt == 'csv':
+        for line_number, row in enumerate(csv.DictReader(handle), start=2):
+            yield line_number, row
+        return
+    for line_number, line in enumerate(handle, start=1):
+        if line.strip():
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, e
+
+
+def _validated_tasks(rows, known_tags: set, report: dict, create_tags: bool):
+    """Valida cada linha e a converte em tarefa nova (com UUID novo); linhas inválidas vão para o relatório."""
+    stamp = _now_stamp()
+    for line_number, row in rows:
+        try:
+            if not isinstance(row, dict):
+                raise ValueError(f"JSON inválido ({row})" if isinstance(row, Exception) else "a linha não é um objeto")
+            title = str(row.get('title') or '').strip()
+            if not title:
+                raise ValueError("título vazio")
+            scores = {}
+            for key in SCORE_COLUMNS:
+                value = int(str(row.get(key) if row.get(key) not in (None, '') else 0).strip())
+                if not -5 <= value <= 5:
+                    raise ValueError(f"{key} fora do intervalo -5 a 5")
+                scores[key] = value
+            due_date = str(row.get('due_date') or '').strip()
+            if due_date and not _ISO_DATE.fullmatch(due_date):
+                raise ValueError(f"data de entrega inválida: '{due_date}'")
+        except ValueError as e:
+            report['rejected'] += 1
+            if len(report['errors']) < MAX_REPORTED_ERRORS:
+                report['errors'].append((line_number, str(e)))
+            continue
+        tags = row.get('tags')
+        tags = [str(tag).strip() for tag in tags] if isinstance(tags, list) else _split_tags(tags)
+        unknown = [tag for tag in tags if tag and tag not in known_tags]
+        if unknown:
+            report['unknown_tags'].update(unknown)
+            if not create_tags:
+                tags = [tag for tag in tags if tag in known_tags]
+        status = str(row.get('status') or 'pending').strip()
+        yield {
+            'id': str(uuid.uuid4()), 'title': title, 'description': str(row.get('description') or ''),
+            **scores, 'due_date': due_date, 'tags': ", ".join(dict.fromkeys(tag for tag in tags if tag)),
+            'quadrant': '', 'status': status if status in ('pending', 'done') else 'pending',
+            'updated_at': stamp, 'version': 1,
+        }
+
+
+def _chunked(items, size: int):
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def _classified_chunks(chunks, deadline_horizon: int | None = None):
+    """Quadrante (e, no modo de urgência por prazo, a urgência) calculados de uma vez para o bloco todo."""
+    for chunk in chunks:
+        urgency = np.fromiter((task['urgency'] for task in chunk), dtype='int64', count=len(chunk))
+        if deadline_horizon is not None:
+            derived = _deadline_urgency([task['due_date'] for task in chunk], date.today(), deadline_horizon)
+            urgency = np.where(np.isnan(derived), urgency, derived).astype('int64')
+        importance = np.fromiter((task['importance'] for task in chunk), dtype='int64', count=len(chunk))
+        for task, value, quadrant in zip(chunk, urgency, np.asarray(classify_quadrants(importance, urgency), dtype=object)):
+            task['urgency'], task['quadrant'] = int(value), quadrant
+        yield chunk
+
+
+def _write_task_rows(handle, fmt: str, records) -> int:
+    """Escreve as tarefas conforme chegam do gerador; devolve quantas foram escritas."""
+    written = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(handle, fieldnames=TASK_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        write = lambda record: handle.write(json.dumps(record, ensure_ascii=False) + '\n')
+    for record in records:
+        write(record)
+        written += 1
+    return written
+
+
+class Storage:
+    def __init__(self, backend: StorageBackend | None = None):
+        if backend is None:
+            self.backend, self.snapshot, self.write_queue = get_shared_backend()
+        else:
+            self.backend = backend
+            self.snapshot, self.write_queue = _create_sync_layers(backend)
+        # Leituras passam pelo snapshot compartilhado (quando existe); escritas vão direto ao backend
+        self.reader = self.snapshot if self.snapshot is not None else self.backend
+        self.columns = TASK_COLUMNS
+        self.tiebreak = str(get_config("IVY_LEE_TIEBREAK", "due_date"))
+        # Modo opcional: a urgência deixa de ser manual e passa a ser derivada do prazo
+        self.deadline_urgency = get_config_flag("URGENCY_FROM_DEADLINE")
+        self.deadline_horizon = int(get_config("DEADLINE_HORIZON_DAYS", 10))
+        # Quanto uma operação espera a fila de gravação esvaziar antes de desistir
+        self.flush_timeout = float(get_config("FLUSH_TIMEOUT_SECONDS", 30))
+
+    def _invalidate(self, tasks: bool = True, tags: bool = False):
+        if self.snapshot is not None:
+            self.snapshot.invalidate(tasks=tasks, tags=tags)
+
+    def _submit(self, task_id: str, kind: str, fields: dict):
+        """Enfileira a mutação e a reflete no cache na hora, sem esperar o backend."""
+        op = self.write_queue.submit(task_id, kind, fields)
+        record('writes_queued')
+        self.snapshot.apply_local(task_id, op)
+
+    def sync_status(self) -> dict:
+        """Quantas mutações aguardam gravação no backend, o último erro de envio e as descartadas."""
+        if self.write_queue is None:
+            return {'pending': 0, 'error': None, 'conflicts': 0, 'discarded': 0, 'discard_error': None}
+        queue = self.write_queue
+        return {'pending': queue.pending_count(), 'error': queue.last_error, 'conflicts': queue.conflicts,
+                'discarded': queue.discarded, 'discard_error': queue.discard_error}
+
+    @instrumented
+    def flush(self, timeout: float | None = None) -> bool:
+        """Espera as mutações pendentes chegarem ao backend, por até `timeout` segundos (FLUSH_TIMEOUT_SECONDS).
+
+        Se o tempo acabar, avisa na tela e devolve False.
+        """
+        if self.write_queue is None or self.write_queue.flush(self.flush_timeout if timeout is None else timeout):
+            return True
+        status = self.sync_status()
+        st.warning(f"{status['pending']} alteração(ões) ainda não chegaram ao armazenamento"
+                   + (f" ({status['error']})" if status['error'] else "") + ". Tente de novo em instantes.")
+        return False
+
+    def api_metrics(self) -> dict:
+        """Métricas do agendador de chamadas à API (vazio para backends locais)."""
+        scheduler = getattr(self.backend, 'scheduler', None)
+        return scheduler.metrics() if scheduler is not None else {}
+
+    def cache_stats(self) -> dict:
+        """Contadores de acertos/faltas do cache de leitura (vazio se não houver cache)."""
+        return self.snapshot.stats() if self.snapshot is not None else {}
+
+    @instrumented
     def list_tags(self) -> list[str]:
         try:
-            tags = self.tags_worksheet.col_values(1)[1:]
-            return sorted([tag for tag in tags if tag])
+            return self.reader.list_tags()
         except Exception as e:
             st.error(f"Não foi possível ler as tags: {e}")
             return []
 
+    @instrumented
     def add_tag(self, tag_name: str):
         if not tag_name or tag_name.isspace():
             st.warning("O nome da tag не pode estar vazio.")
@@ -72,103 +2127,583 @@ class Storage:
         if tag_name in current_tags:
             st.warning(f"A tag '{tag_name}' já existe.")
             return
-        self.tags_worksheet.append_row([tag_name])
+        self.backend.add_tag(tag_name)
+        if self.snapshot is not None:
+            self.snapshot.apply_tag_change(tag_name, added=True)
         st.success(f"Tag '{tag_name}' adicionada com sucesso!")
 
+    @instrumented
     def delete_tag(self, tag_name: str):
         try:
-            cell = self.tags_worksheet.find(tag_name)
-            if cell:
-                self.tags_worksheet.delete_rows(cell.row)
+            removed = self.backend.delete_tag(tag_name)
+            if removed and self.snapshot is not None:
+                self.snapshot.apply_tag_change(tag_name, added=False)
+            if removed:
                 st.success(f"Tag '{tag_name}' removida.")
         except gspread.exceptions.CellNotFound:
             st.error(f"Tag '{tag_name}' não encontrada para remoção.")
         except Exception as e:
             st.error(f"Erro ao remover a tag: {e}")
 
+    @instrumented
     def list_tasks(self) -> list[dict]:
-        df = self._read_data()
-        return df.to_dict('records')
+        return self.reader.list_tasks()
+
+    @instrumented
+    def get_task(self, task_id: str) -> dict | None:
+        return self.reader.get_task(str(task_id))
 
+    @instrumented
     def add_task(self, title: str, description: str, importance: int, urgency: int, due_date: str | None, tags: list[str]):
+        urgency = self._urgency_for(due_date, urgency)
         quadrant = self._get_quadrant(importance, urgency)
-        new_task_df = pd.DataFrame([{"id": str(uuid.uuid4()), "title": title, "description": description, "importance": importance, "urgency": urgency, "due_date": due_date if due_date else "", "tags": ", ".join(tags), "quadrant": quadrant, "status": "pending"}])
-        existing_df = self._read_data()
-        updated_df = pd.concat([existing_df, new_task_df], ignore_index=True)
-        self._write_data(updated_df)
+        new_task = {"id": str(uuid.uuid4()), "title": title, "description": description, "importance": importance, "urgency": urgency, "due_date": due_date if due_date else "", "tags": ", ".join(tags), "quadrant": quadrant, "status": "pending", "updated_at": _now_stamp(), "version": 1}
+        if self.write_queue is not None:
+            self._submit(new_task['id'], 'insert', new_task)
+            return
+        self.backend.insert_task(new_task)
+        self._invalidate()
     
-    def update_task(self, task_id: str, updates: dict):
-        df = self._read_data()
-        df['id'] = df['id'].astype(str)
+    def _versioned(self, current: dict, changes: dict) -> dict:
+        """Carimba a edição com a próxima versão e com a versão em que ela se baseou."""
+        version = int(current.get('version') or 0)
+        return {**changes, 'updated_at': _now_stamp(), 'version': version + 1, EXPECTED_VERSION: version}
+
+    def _warn_conflict(self):
+        st.warning("Esta tarefa foi alterada em outra sessão e a sua alteração não foi salva. Confira os dados atuais e tente de novo.")
+
+    @instrumented
+    def update_task(self, task_id: str, updates: dict, expected_version: int | None = None):
+        """Grava só os campos alterados. Com `expected_version` (versão exibida no formulário),
+        recusa a edição se a tarefa tiver mudado desde então."""
         task_id = str(task_id)
-        if task_id not in df['id'].values: return False
-        idx = df[df['id'] == task_id].index[0]
-        for key, value in updates.items():
-            df.loc[idx, key] = value
-        if 'importance' in updates or 'urgency' in updates:
-            importance = int(df.loc[idx, 'importance'])
-            urgency = int(df.loc[idx, 'urgency'])
-            df.loc[idx, 'quadrant'] = self._get_quadrant(importance, urgency)
-        self._write_data(df)
-        return True
+        current = self.reader.get_task(task_id)
+        if current is None: return False
+        if expected_version is not None and int(expected_version) != int(current.get('version') or 0):
+            self._warn_conflict()
+            return False
+        if 'due_date' in updates:
+            updates = {**updates, 'urgency': self._urgency_for(updates['due_date'], updates.get('urgency', current.get('urgency')))}
+        # Envia ao backend apenas os campos que realmente mudaram
+        changes = {key: value for key, value in updates.items() if str(current.get(key, '')) != str(value)}
+        if 'importance' in changes or 'urgency' in changes:
+            merged = {**current, **changes}
+            quadrant = self._get_quadrant(int(merged['importance']), int(merged['urgency']))
+            if quadrant != current.get('quadrant'):
+                changes['quadrant'] = quadrant
+        if not changes:
+            return True
+        changes = self._versioned(current, changes)
+        if self.write_queue is not None:
+            self._submit(task_id, 'update', changes)
+            return True
+        updated = self.backend.update_task(task_id, changes)
+        self._invalidate()
+        if not updated:
+            self._warn_conflict()
+        return updated
 
+    @instrumented
     def mark_done(self, task_id: str):
-        df = self._read_data()
-        df['id'] = df['id'].astype(str)
         task_id = str(task_id)
-        if task_id in df['id'].values:
-            df.loc[df['id'] == task_id, 'status'] = 'done'
-            self._write_data(df)
+        current = self.reader.get_task(task_id)
+        if current is None: return
+        changes = self._versioned(current, {'status': 'done'})
+        if self.write_queue is not None:
+            self._submit(task_id, 'update', changes)
+            return
+        if not self.backend.update_task(task_id, changes):
+            self._warn_conflict()
+        self._invalidate()
 
+    @instrumented
     def get_urgent_tasks(self) -> list[dict]:
-        df = self._read_data()
-        urgent_df = df[(df['urgency'] > 0) & (df['status'] != 'done')]
-        return urgent_df.to_dict('records')
+        return self.reader.get_urgent_tasks()
     
+    @instrumented
+    def tasks_due_between(self, start=None, end=None) -> list[dict]:
+        """Tarefas pendentes com entrega entre `start` e `end` (datas ISO, inclusive), por ordem de prazo."""
+        return self.reader.tasks_due_between(start, end)
+
+    def overdue_tasks(self) -> list[dict]:
+        return self.tasks_due_between(None, (date.today() - timedelta(days=1)).isoformat())
+
+    def tasks_due_today(self) -> list[dict]:
+        today = date.today().isoformat()
+        return self.tasks_due_between(today, today)
+
+    def tasks_due_within(self, days: int) -> list[dict]:
+        """Tarefas que vencem de hoje até daqui a `days` dias."""
+        today = date.today()
+        return self.tasks_due_between(today.isoformat(), (today + timedelta(days=days)).isoformat())
+
+    @instrumented
     def get_top_n_pending_tasks(self, n: int = 6) -> list[dict]:
-        df = self._read_data()
-        pending_df = df[df['status'] != 'done']
-        sorted_df = pending_df.sort_values(by=['importance', 'urgency'], ascending=[False, False])
-        return sorted_df.head(n).to_dict('records')
+        return self.reader.get_top_n_pending_tasks(n, tiebreak=self.tiebreak)
 
-    def reset(self):
-        header = pd.DataFrame(columns=self.columns)
-        self._write_data(header)
+    @instrumented
+    def reset(self) -> bool:
+        """Apaga todas as tarefas; devolve False (sem apagar nada) se a fila de gravação não esvaziou a tempo.
 
-    def _get_quadrant(self, importance: int, urgency: int) -> str:
+        Sem essa checagem, inserções ainda na fila seriam gravadas depois do
+        reset e ressuscitariam tarefas.
+        """
+        if not self.flush():
+            return False
+        self.backend.reset()
+        self._invalidate()
+        return True
+
+    @staticmethod
+    def _get_quadrant(importance: int, urgency: int) -> str:
         if importance > 0 and urgency > 0: return "Faça Primeiro"
         if importance > 0 and not urgency > 0: return "Agende"
         if not importance > 0 and urgency > 0: return "Delegue"
         return "Elimine"
 
+    @instrumented
+    def recompute_quadrants(self) -> int | None:
+        """Recalcula o quadrante de todas as tarefas numa só passada vetorizada.
+
+        Útil depois de uma importação em massa ou de mudar a regra dos
+        quadrantes; grava em lote apenas as tarefas cujo quadrante mudou e
+        devolve quantas foram corrigidas (None se a fila de gravação não esvaziou a tempo).
+        """
+        if not self.flush():
+            return None
+        df = self.reader.read_tasks()
+        expected = classify_quadrants(df['importance'].to_numpy(), df['urgency'].to_numpy())
+        changed = df['quadrant'].astype(object).to_numpy() != np.asarray(expected, dtype=object)
+        stamp = _now_stamp()
+        updates = {
+            task_id: {'quadrant': quadrant, 'updated_at': stamp, 'version': int(version) + 1, EXPECTED_VERSION: int(version)}
+            for task_id, quadrant, version in zip(
+                df['id'].astype(str).to_numpy()[changed], np.asarray(expected, dtype=object)[changed], df['version'].to_numpy()[changed]
+            )
+        }
+        if updates:
+            self.backend.update_tasks(updates)
+            self._invalidate()
+        return len(updates)
+
+    def _urgency_for(self, due_date, urgency):
+        """No modo de urgência por prazo, troca a urgência informada pela derivada da data de entrega."""
+        if not self.deadline_urgency or not due_date:
+            return urgency
+        derived = _deadline_urgency([due_date], date.today(), self.deadline_horizon)[0]
+        return urgency if np.isnan(derived) else int(derived)
+
+    @instrumented
+    def apply_deadline_urgency(self, today: date | None = None) -> int | None:
+        """Recalcula urgência e quadrante das tarefas pendentes a partir do prazo, numa passada vetorizada.
+
+        Tarefas sem data mantêm a urgência manual. Grava num único lote só as
+        tarefas que mudaram e devolve quantas foram atualizadas (None se a fila
+        de gravação não esvaziou a tempo).
+        """
+        if not self.flush():
+            return None
+        df = self.reader.read_tasks()
+        pending = (df['status'] != 'done').to_numpy()
+        derived = _deadline_urgency(df['due_date'].to_numpy(), today or date.today(), self.deadline_horizon)
+        current = df['urgency'].to_numpy(dtype='float64')
+        urgency = np.where(np.isnan(derived), current, derived).astype('int64')
+        quadrants = np.asarray(classify_quadrants(df['importance'].to_numpy(), urgency), dtype=object)
+        changed = pending & ((urgency != current) | (df['quadrant'].astype(object).to_numpy() != quadrants))
+        stamp = _now_stamp()
+        updates = {
+            task_id: {'urgency': int(value), 'quadrant': quadrant, 'updated_at': stamp, 'version': int(version) + 1, EXPECTED_VERSION: int(version)}
+            for task_id, value, quadrant, version in zip(
+                df['id'].astype(str).to_numpy()[changed], urgency[changed], quadrants[changed], df['version'].to_numpy()[changed]
+            )
+        }
+        if updates:
+            self.backend.update_tasks(updates)
+            self._invalidate()
+        return len(updates)
+
+    # --- IMPORTAÇÃO E EXPORTAÇÃO EM LOTE ---
+    @instrumented
+    def import_tasks(self, source, fmt: str | None = None, chunk_size: int = IMPORT_CHUNK_SIZE,
+                     create_tags: bool = False, progress=None) -> dict | None:
+        """Importa tarefas de um CSV ou JSONL (caminho ou arquivo aberto) em blocos de `chunk_size`.
+
+        Cada tarefa recebe um UUID novo. Tags que não existem são descartadas da
+        tarefa, ou criadas com `create_tags=True`. `progress(importadas)` é
+        chamado após cada bloco gravado. Devolve um relatório com as contagens,
+        exemplos de linhas recusadas e as tags desconhecidas, ou None se a fila
+        de gravação não esvaziou a tempo.
+        """
+        fmt = _bulk_format(source, fmt)
+        report = {'imported': 0, 'rejected': 0, 'errors': [], 'unknown_tags': set()}
+        # Mutações pendentes chegam antes, para o lote não disputar a planilha com a fila
+        if not self.flush():
+            return None
+        known_tags = set(self.list_tags())
+        try:
+            with _open_text(source, 'r') as handle:
+                tasks = _validated_tasks(_read_task_rows(handle, fmt), known_tags, report, create_tags)
+                horizon = self.deadline_horizon if self.deadline_urgency else None
+                for chunk in _classified_chunks(_chunked(tasks, chunk_size), horizon):
+                    if create_tags and report['unknown_tags'] - known_tags:
+                        for tag in sorted(report['unknown_tags'] - known_tags):
+                            self.backend.add_tag(tag)
+                        known_tags |= report['unknown_tags']
+                    self.backend.insert_tasks(chunk)
+                    report['imported'] += len(chunk)
+                    if progress is not None:
+                        progress(report['imported'])
+        finally:
+            if report['imported'] or create_tags:
+                self._invalidate(tags=create_tags)
+        return report
+
+    @instrumented
+    def export_tasks(self, destination, fmt: str | None = None, include_archived: bool = False,
+                     chunk_size: int = IMPORT_CHUNK_SIZE) -> int | None:
+        """Grava as tarefas (e, opcionalmente, o arquivo mensal) em CSV ou JSONL.
+
+        Devolve quantas foram exportadas, ou None (sem gravar nada) se a fila de
+        gravação não esvaziou a tempo.
+        """
+        fmt = _bulk_format(destination, fmt)
+
+        def frames():
+            yield self.reader.read_tasks()
+            if include_archived:
+                # Uma partição por vez, para não carregar o histórico inteiro de uma só vez
+                for month in self.backend.archive_months():
+                    yield self.backend.read_archive(month, month)
+
+        def records():
+            for df in frames():
+                for start in range(0, len(df), chunk_size):
+                    for task in df.iloc[start:start + chunk_size].to_dict('records'):
+                        yield {key: _cell_value(task.get(key, '')) for key in TASK_COLUMNS}
+
+        if not self.flush():
+            return None
+        with _open_text(destination, 'w') as handle:
+            return _write_task_rows(handle, fmt, records())
+
+    # --- ARQUIVO DE CONCLUÍDAS ---
+    @instrumented
+    def compact(self) -> dict | None:
+        """Tira as tarefas concluídas da tabela ativa e as guarda no arquivo mensal.
+
+        Depois disso leituras e gravações do dia a dia só carregam o backlog ativo.
+        Devolve {mês: quantidade arquivada}, ou None se a fila de gravação não esvaziou a tempo.
+        """
+        if not self.flush():
+            return None
+        moved = self.backend.archive_done_tasks()
+        if moved:
+            self._invalidate()
+        return moved
+
+    @instrumented
+    def archive_months(self) -> list[str]:
+        """Meses (AAAA-MM) que têm tarefas arquivadas."""
+        return self.backend.archive_months()
+
+    @instrumented
+    def archived_tasks(self, start_month: str | None = None, end_month: str | None = None) -> pd.DataFrame:
+        """Histórico de concluídas entre dois meses (AAAA-MM, inclusive); lê só as partições do intervalo."""
+        return self.backend.read_archive(start_month, end_month)
+
     # --- NOVA FUNÇÃO DE AGRUPAMENTO (MAIS SIMPLES E EFICIENTE) ---
+    @instrumented
     def group_tasks_by_tag(self) -> dict:
         """Agrupa tarefas pendentes pelas suas tags."""
-        tasks = [t for t in self.list_tasks() if t.get('status') != 'done']
-        all_defined_tags = self.list_tags()
-        
-        grouped_tasks = {tag: [] for tag in all_defined_tags}
-        
-        for task in tasks:
-            task_tags_str = task.get('tags', '')
-            if task_tags_str:
-                task_tags_list = [tag.strip() for tag in task_tags_str.split(',')]
-                for tag in task_tags_list:
-                    if tag in grouped_tasks:
-                        grouped_tasks[tag].append(task)
-                        
-        final_groups = {tag: tasks for tag, tasks in grouped_tasks.items() if tasks}
-        
-        return final_groups
-
-def generate_audio_from_text(text: str, lang='pt', tld='com.br', slow=False):
-    try:
+        return self.reader.group_pending_tasks_by_tag()
+
+    @instrumented
+    def tasks_with_tag(self, tag: str) -> list[dict]:
+        """Tarefas pendentes marcadas com a tag."""
+        return self.reader.find_tasks_by_tags(all_of=[tag])
+
+    @instrumented
+    def find_tasks_by_tags(self, all_of: list[str] | None = None, any_of: list[str] | None = None) -> list[dict]:
+        """Tarefas pendentes com todas as tags de `all_of` e ao menos uma de `any_of`."""
+        return self.reader.find_tasks_by_tags(all_of or (), any_of or ())
+
+    @instrumented
+    def tag_counts(self) -> dict:
+        """Quantidade de tarefas pendentes por tag."""
+        return self.reader.tag_counts()
+
+    @instrumented
+    def task_tags(self, task_id: str) -> list[str]:
+        """Lista de tags de uma tarefa."""
+        return self.reader.task_tags(task_id)
+
+    @instrumented
+    def tag_group_counts(self) -> dict:
+        """Quantidade de tarefas pendentes por tag cadastrada, na ordem das tags (sem materializar os grupos)."""
+        counts = self.tag_counts()
+        return {tag: counts[tag] for tag in self.list_tags() if counts.get(tag)}
+
+    @instrumented
+    def query_tasks(self, quadrant: str | None = None, tag: str | None = None, due_from=None, due_to=None,
+                    search: str | None = None, urgent: bool = False, offset: int = 0, limit: int | None = None,
+                    include_urgent: bool = False) -> tuple[list[dict], int]:
+        """Tarefas pendentes filtradas por quadrante, tag, intervalo de entrega e trecho do título.
+
+        Com `include_urgent`, o intervalo de entrega também deixa passar as tarefas
+        marcadas como urgentes, mesmo sem prazo. Só a página [offset, offset + limit)
+        é materializada; devolve (tarefas, total filtrado).
+        """
+        return self.reader.query_tasks(quadrant, tag, due_from, due_to, search, urgent, offset, limit, include_urgent)
+
+    @instrumented
+    def pending_tasks_df(self) -> pd.DataFrame:
+        """Tabela das tarefas pendentes (cópia), para gráficos e agregações."""
+        df = self.reader.read_tasks()
+        return df[(df['status'] != 'done').to_numpy()].reset_index(drop=True)
+
+def task_page_size() -> int:
+    return int(get_config("TASKS_PAGE_SIZE", 20))
+
+
+def paginated_query(storage: Storage, key: str, page_size: int | None = None, **filters) -> tuple[list[dict], int]:
+    """Busca só a página atual (guardada em st.session_state[key]) das tarefas filtradas."""
+    page_size = page_size or task_page_size()
+    page = int(st.session_state.get(key, 1))
+    tasks, total = storage.query_tasks(offset=(page - 1) * page_size, limit=page_size, **filters)
+    if not tasks and total and page > 1:
+        # Os filtros mudaram e a página guardada ficou fora do intervalo: volta à primeira
+        st.session_state[key] = 1
+        tasks, total = storage.query_tasks(offset=0, limit=page_size, **filters)
+    return tasks, total
+
+
+def render_pagination(key: str, total: int, page_size: int | None = None):
+    """Seletor de página para uma lista buscada com paginated_query (some se houver uma página só)."""
+    page_size = page_size or task_page_size()
+    pages = max(1, -(-total // page_size))
+    if pages == 1:
+        return
+    if int(st.session_state.get(key, 1)) > pages:
+        st.session_state[key] = pages
+    st.number_input(f"Página (de {pages}, {total} tarefas)", min_value=1, max_value=pages, step=1, key=key)
+
+
+def render_sync_status(storage: Storage):
+    """Mostra na barra lateral se há alterações aguardando sincronização com o backend."""
+    status = storage.sync_status()
+    # Conflitos são contados no processo; cada sessão avisa só dos que ainda não mostrou
+    seen_conflicts = st.session_state.setdefault('_seen_conflicts', status['conflicts'])
+    if status['conflicts'] > seen_conflicts:
+        st.sidebar.warning(f"⚠️ {status['conflicts'] - seen_conflicts} alteração(ões) descartada(s): a tarefa mudou em outra sessão.")
+        st.session_state['_seen_conflicts'] = status['conflicts']
+    seen_discarded = st.session_state.setdefault('_seen_discarded', status['discarded'])
+    if status['discarded'] > seen_discarded:
+        st.sidebar.error(f"❌ {status['discarded'] - seen_discarded} alteração(ões) recusada(s) pelo armazenamento e descartada(s): "
+                         f"{status['discard_error']}")
+        st.session_state['_seen_discarded'] = status['discarded']
+    if status['error']:
+        st.sidebar.warning(f"⚠️ Falha ao sincronizar ({status['error']}). Tentando novamente...")
+    elif status['pending']:
+        st.sidebar.caption(f"🔄 {status['pending']} alteração(ões) aguardando sincronização")
+
+
+def render_debug_panel():
+    """Painel de diagnóstico na barra lateral com o trace desta execução e as métricas do processo.
+
+    Aparece com DEBUG_PANEL = true ou com `?debug=1` na URL; deve ser chamado no fim da página.
+    """
+    summary = finish_rerun_trace()
+    if summary is None or not (get_config_flag("DEBUG_PANEL", False) or st.query_params.get("debug") == "1"):
+        return
+    counters = summary['counters']
+    with st.sidebar.expander("🩺 Diagnóstico desta execução"):
+        col1, col2 = st.columns(2)
+        col1.metric("Tempo total", f"{summary['total_ms']:.0f} ms")
+        col2.metric("Chamadas remotas", int(counters.get('api_calls', 0)))
+        col1.metric("Linhas lidas", int(counters.get('rows_read', 0)))
+        col2.metric("Linhas gravadas", int(counters.get('rows_written', 0) + counters.get('writes_queued', 0)))
+        col1.metric("Acertos de cache", int(counters.get('cache_hits', 0)))
+        col2.metric("Faltas de cache", int(counters.get('cache_misses', 0)))
+        rows = [f"| {name} | {phase['calls']} | {phase['ms']:.1f} |" for name, phase in summary['phases'].items()]
+        rows.append(f"| script (widgets) | 1 | {summary['script_ms']:.1f} |")
+        st.markdown("\n".join(["| Fase | Chamadas | ms |", "|---|---:|---:|", *rows]))
+        previous = st.session_state.get('_last_rerun_trace')
+        if previous:
+            st.caption(f"Execução anterior ({previous['page']}): {previous['total_ms']:.0f} ms, "
+                       f"{int(previous['counters'].get('api_calls', 0))} chamada(s) remota(s)")
+    with st.sidebar.expander("📈 Métricas do processo (Prometheus)"):
+        st.code(METRICS.prometheus_text(), language="text")
+
+# --- VOZ (TTS) COM CACHE ---
+class TTSEngine:
+    """Motor de síntese de voz usado pelo cache de áudio."""
+
+    def synthesize(self, text: str, lang: str, tld: str, slow: bool) -> bytes:
+        raise NotImplementedError
+
+
+class GTTSEngine(TTSEngine):
+    """Síntese pela API do Google Translate (gTTS); cada chamada vai à rede."""
+
+    def synthesize(self, text: str, lang: str, tld: str, slow: bool) -> bytes:
+        from gtts import gTTS
         tts = gTTS(text=text, lang=lang, tld=tld, slow=slow)
         audio_buffer = io.BytesIO()
         tts.write_to_fp(audio_buffer)
-        audio_buffer.seek(0)
-        return audio_buffer
+        return audio_buffer.getvalue()
+
+
+class AudioCache:
+    """Cache de MP3 endereçado pelo conteúdo (texto, idioma, sotaque, velocidade).
+
+    Tem duas camadas: uma memória quente pequena e um diretório em disco
+    limitado a `max_bytes`, ambas despejando o item usado há mais tempo.
+    O disco é compartilhado entre sessões e entre reinícios do servidor.
+    """
+
+    def __init__(self, directory: str, engine: TTSEngine | None = None, max_bytes: int = 50 * 1024 * 1024,
+                 hot_max_bytes: int = 8 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.engine = engine if engine is not None else GTTSEngine()
+        self.max_bytes = max_bytes
+        self.hot_max_bytes = hot_max_bytes
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        self._hot = OrderedDict()
+        self._hot_bytes = 0
+        self._lock = threading.RLock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Índice LRU do disco, reconstruído pela data de modificação dos arquivos
+        files = sorted(self.directory.glob("*.mp3"), key=lambda path: path.stat().st_mtime)
+        self._disk = OrderedDict((path.stem, path.stat().st_size) for path in files)
+        self._disk_bytes = sum(self._disk.values())
+
+    @staticmethod
+    def key(text: str, lang: str, tld: str, slow: bool) -> str:
+        payload = json.dumps([text, lang, tld, bool(slow)], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.mp3"
+
+    def _remember_hot(self, key: str, audio: bytes):
+        if len(audio) > self.hot_max_bytes:
+            return
+        if key in self._hot:
+            self._hot_bytes -= len(self._hot.pop(key))
+        self._hot[key] = audio
+        self._hot_bytes += len(audio)
+        while self._hot_bytes > self.hot_max_bytes:
+            _, evicted = self._hot.popitem(last=False)
+            self._hot_bytes -= len(evicted)
+
+    def _store_disk(self, key: str, audio: bytes):
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(audio)
+        os.replace(tmp_path, path)
+        self._disk_bytes += len(audio) - self._disk.pop(key, 0)
+        self._disk[key] = len(audio)
+        while self._disk_bytes > self.max_bytes and len(self._disk) > 1:
+            old_key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.stats['evictions'] += 1
+            self._path(old_key).unlink(missing_ok=True)
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            if key in self._hot:
+                self._hot.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return self._hot[key]
+            if key in self._disk:
+                try:
+                    audio = self._path(key).read_bytes()
+                except FileNotFoundError:
+                    self._disk_bytes -= self._disk.pop(key)
+                    return None
+                self._disk.move_to_end(key)
+                os.utime(self._path(key))
+                self._remember_hot(key, audio)
+                self.stats['disk_hits'] += 1
+                return audio
+            return None
+
+    def get_or_synthesize(self, text: str, lang: str, tld: str, slow: bool) -> bytes:
+        key = self.key(text, lang, tld, slow)
+        audio = self.get(key)
+        if audio is not None:
+            record('tts_cache_hits')
+            return audio
+        # A síntese fica fora do lock para não travar as outras sessões
+        audio = self.engine.synthesize(text, lang, tld, slow)
+        record('tts_synthesized')
+        with self._lock:
+            self.stats['misses'] += 1
+            self._store_disk(key, audio)
+            self._remember_hot(key, audio)
+        return audio
+
+
+@st.cache_resource(show_spinner=False)
+def get_audio_cache() -> AudioCache:
+    """Cache de áudio único por processo, compartilhado entre todas as sessões."""
+    return AudioCache(
+        get_config("TTS_CACHE_DIR", ".cache/tts"),
+        max_bytes=int(float(get_config("TTS_CACHE_MAX_MB", 50)) * 1024 * 1024),
+    )
+
+
+@instrumented
+def generate_audio_from_text(text: str, lang='pt', tld='com.br', slow=False, cache: AudioCache | None = None):
+    try:
+        cache = cache if cache is not None else get_audio_cache()
+        return io.BytesIO(cache.get_or_synthesize(text, lang, tld, slow))
     except Exception as e:
         print(f"Erro ao gerar áudio: {e}")
         return None
 
+
+def split_sentences(text: str) -> list[str]:
+    """Quebra um texto em frases, sem cortar numerações como '1. Tarefa'."""
+    return [sentence.strip() for sentence in re.split(r'(?<=[^\d\s][.!?])\s+', text) if sentence.strip()]
+
+
+def _strip_id3(audio: bytes) -> bytes:
+    """Remove o cabeçalho ID3v2 para que os quadros MP3 possam ser concatenados."""
+    if audio[:3] != b'ID3' or len(audio) < 10:
+        return audio
+    size = (audio[6] << 21) | (audio[7] << 14) | (audio[8] << 7) | audio[9]
+    return audio[10 + size:]
+
+
+def iter_summary_audio(segments: list[str] | str, lang='pt', tld='com.br', slow=False,
+                       cache: AudioCache | None = None, max_workers: int | None = None):
+    """Sintetiza cada frase em paralelo (com cache próprio) e entrega os trechos MP3 na ordem.
+
+    Assim, quando uma tarefa muda, só a frase dela precisa ser sintetizada de novo.
+    """
+    if isinstance(segments, str):
+        segments = split_sentences(segments)
+    segments = [segment for segment in segments if segment and segment.strip()]
+    if not segments:
+        return
+    cache = cache if cache is not None else get_audio_cache()
+    unique_segments = list(dict.fromkeys(segments))
+    max_workers = max_workers or int(get_config("TTS_MAX_WORKERS", 4))
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_segments))) as executor:
+        futures = {segment: executor.submit(cache.get_or_synthesize, segment, lang, tld, slow) for segment in unique_segments}
+        for position, segment in enumerate(segments):
+            audio = futures[segment].result()
+            yield audio if position == 0 else _strip_id3(audio)
+
+
+@instrumented
+def generate_summary_audio(segments: list[str] | str, lang='pt', tld='com.br', slow=False,
+                           cache: AudioCache | None = None):
+    """Versão segmentada de generate_audio_from_text: junta os trechos num único MP3 (None se não houver o que falar)."""
+    try:
+        audio = b''.join(iter_summary_audio(segments, lang, tld, slow, cache=cache))
+        return io.BytesIO(audio) if audio else None
+    except Exception as e:
+        print(f"Erro ao gerar áudio: {e}")
+        return None